@@ -1,30 +1,306 @@
+import atexit
+import logging
 import os
-from flask import Flask, jsonify, request
+import tempfile
+import time
+from flask import Flask, Request, Response, g, jsonify, request, stream_with_context, url_for
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+# Before the services are imported: some read their settings at import time
+# (METRICS_ENABLED), and pool processes inherit this environment
 load_dotenv()
 
+from services.batch_processor import (
+    INSUFFICIENT_TEXT_ERROR, MIN_TEXT_CHARS, NO_TOPICS_ERROR, PREFLIGHT_ERRORS, SUPPORTED_EXTENSIONS, BatchProcessor, read_zip_documents
+)
+from services.budget import WorkBudget, stage
+from services.extraction_backends import BACKEND_NAMES
+from services.fast_json import FastJSONProvider, dumps
+from services.incremental import IncrementalGenerator
+from services.job_queue import COMPLETED, FAILED, JobQueue, QueueFullError, SQLiteJobStore
+from services.metrics import metrics
+from services.nlp_engine import EngineUnavailableError
+from services.recommendations import RecommendationScorer, iter_input_frames
+from services.registry import ServiceRegistry
+from services.result_cache import ResultCache, pipeline_variant
+from services.serving import BATCH, HEAVY, LIGHT, PipelinePool, RouteLimiter
+from services.topic_graph import TopicGraph
+from services.topic_ranker import model_fingerprint
+
+# Pipeline progress is logged at DEBUG; set LOG_LEVEL=DEBUG to see it
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s pid=%(process)d %(message)s'
+)
+logger = logging.getLogger('ai-service')
+
+# Uploads are parsed straight from the request body. Werkzeug keeps each
+# file part in memory and only spools it to a temp file above this size.
+UPLOAD_SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_KB', 2048)) * 1024
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode='rb+')
+
 app = Flask(__name__)
+app.request_class = UploadRequest
+# jsonify and request.get_json through orjson when it is installed
+app.json = FastJSONProvider(app)
+
+# Reject oversized uploads before any multipart or PDF parsing starts. Batch
+# uploads carry many syllabi, so they get their own (larger) limit.
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_MB', 20)) * 1024 * 1024
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv('MAX_BATCH_UPLOAD_MB', 200)) * 1024 * 1024
+app.config['MAX_CONTENT_LENGTH'] = max(MAX_UPLOAD_BYTES, MAX_BATCH_UPLOAD_BYTES)
+
+# Process pool size for per-page extraction of long PDFs
+PDF_WORKERS = int(os.getenv('MAX_WORKERS', 4))
+
+# Pipeline services built and warmed once per worker (see gunicorn.conf.py)
+# (curated resource index, page/character budgets and bounded-memory mode
+# are read from the environment)
+registry = ServiceRegistry.from_env(pdf_workers=PDF_WORKERS)
+
+# Shared cache of extracted text and generated mind maps, keyed by upload digest
+# (and by the topic ranker model, so refitting it never serves stale rankings)
+result_cache = ResultCache(
+    max_entries=int(os.getenv('RESULT_CACHE_SIZE', 256)),
+    disk_dir=os.getenv('RESULT_CACHE_DIR') or None,
+    namespace=model_fingerprint(registry.topic_model_path)
+)
+
+# Previous revision of each document (page text, sections, topics) for
+# incremental regeneration. Set REVISION_STORE_DIR to keep them across restarts;
+# with more than one gunicorn worker it defaults to a directory in the temp
+# directory, so a re-upload finds its previous revision on any worker.
+REVISION_STORE_DIR = os.getenv('REVISION_STORE_DIR') or (
+    os.path.join(tempfile.gettempdir(), 'ai-service-revisions')
+    if int(os.getenv('GUNICORN_WORKERS', 2)) > 1 else None
+)
+revision_store = ResultCache(
+    # Revisions change under the same key, so with a shared directory every
+    # lookup reads the disk instead of a copy another worker may have replaced
+    max_entries=0 if REVISION_STORE_DIR else int(os.getenv('REVISION_STORE_SIZE', 128)),
+    disk_dir=REVISION_STORE_DIR,
+    namespace=result_cache.namespace
+)
+
+# Topics of every generated mind map, linked across courses, for related-topic
+# and course-overlap queries. Set TOPIC_GRAPH_PATH to keep it across restarts.
+topic_graph = TopicGraph.load(
+    os.getenv('TOPIC_GRAPH_PATH') or None,
+    save_interval=float(os.getenv('TOPIC_GRAPH_SAVE_SECONDS', 30))
+)
+atexit.register(topic_graph.save)
+
+# Shared page text store (PAGE_STORE_DIR), if enabled
+page_store = registry.pdf_options.get('page_store')
+
+# Process pool for batch mind-map generation, one syllabus per task
+batch_processor = BatchProcessor(max_workers=PDF_WORKERS, cache=result_cache)
+
+# Background jobs for long-running mind-map generation. JOB_STORE_PATH is a
+# SQLite file so jobs can be polled through any worker on the host; with more
+# than one gunicorn worker it defaults to one in the temp directory, since
+# in-memory jobs could only be polled through the worker that accepted them.
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH') or (
+    os.path.join(tempfile.gettempdir(), 'ai-service-jobs.sqlite3')
+    if int(os.getenv('GUNICORN_WORKERS', 2)) > 1 else None
+)
+job_queue = JobQueue(
+    max_workers=PDF_WORKERS,
+    max_pending=int(os.getenv('JOB_QUEUE_SIZE', 32)),
+    ttl_seconds=int(os.getenv('JOB_RESULT_TTL_SECONDS', 3600)),
+    store=SQLiteJobStore(JOB_STORE_PATH) if JOB_STORE_PATH else None,
+    cache=result_cache
+)
+
+# Single-document pipelines (extraction and mind map) run in the request thread,
+# or with PIPELINE_PROCESSES set on the batch process pool, up to that many at a
+# time, so request threads of a threaded worker (see gunicorn.conf.py) stay free
+# for light endpoints. A pooled pipeline waits at most TIMEOUT_SECONDS (or its
+# budget's deadline) for its result.
+PIPELINE_PROCESSES = int(os.getenv('PIPELINE_PROCESSES', 0))
+pipeline_pool = PipelinePool(
+    batch_processor,
+    max_workers=PIPELINE_PROCESSES,
+    timeout=float(os.getenv('TIMEOUT_SECONDS', 60)) or None
+) if PIPELINE_PROCESSES else None
+
+# Uploads the pre-flight check expects to take longer than this to extract are
+# queued as background jobs (202 with a job id) instead (0 = always in the request)
+SYNC_MAX_SECONDS = float(os.getenv('SYNC_MAX_SECONDS', 0))
+
+# Concurrency limit and wait queue per route class; endpoints not listed are light
+route_limiter = RouteLimiter.from_env()
+ROUTE_CLASSES = {
+    'parse_syllabus': HEAVY,
+    'generate_mindmap_simple': HEAVY,
+    'generate_mindmap_stream': HEAVY,
+    'generate_mindmap': HEAVY,
+    'generate_mindmap_incremental': HEAVY,
+    'generate_mindmap_batch': BATCH,
+    'generate_recommendations_batch': BATCH
+}
+
+# Vectorized cohort scoring for /api/ai/recommendations/batch
+RECOMMENDATION_CHUNK_ROWS = int(os.getenv('RECOMMENDATION_CHUNK_ROWS', 10000))
+recommendation_scorer = RecommendationScorer(chunk_size=RECOMMENDATION_CHUNK_ROWS)
 
 # CORS configuration - Allow all routes for frontend access
 cors_origins = os.getenv('CORS_ORIGINS', 'http://localhost:4200,http://localhost:3000').split(',')
 CORS(app, resources={r"/*": {"origins": cors_origins}})
 
+@app.before_request
+def start_request_metrics():
+    if metrics.enabled:
+        g.metrics_start = time.perf_counter()
+        g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.request_started(g.metrics_route, request.content_length)
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses are timed until the first byte; their body size is unknown
+    if metrics.enabled and 'metrics_start' in g:
+        metrics.request_finished(
+            g.metrics_route, request.method, response.status_code,
+            time.perf_counter() - g.metrics_start, response.content_length
+        )
+    return response
+
+@app.before_request
+def reject_oversized_upload():
+    batch_endpoints = ('generate_mindmap_batch', 'generate_recommendations_batch')
+    max_length = MAX_BATCH_UPLOAD_BYTES if request.endpoint in batch_endpoints else MAX_UPLOAD_BYTES
+    if request.content_length is not None and request.content_length > max_length:
+        return jsonify({
+            'error': f'Upload too large. Maximum size is {max_length // (1024 * 1024)} MB'
+        }), 413
+
+@app.before_request
+def limit_route_concurrency():
+    route_class = ROUTE_CLASSES.get(request.endpoint, LIGHT)
+    if not route_limiter.acquire(route_class):
+        response = jsonify({'error': f'Too many {route_class} requests in progress, please retry shortly'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    g.route_class = route_class
+
+@app.teardown_request
+def release_route_slot(error=None):
+    # Streamed responses keep their slot until the stream ends
+    route_class = g.pop('route_class', None)
+    if route_class is not None:
+        route_limiter.release(route_class)
+
+def _requested_backend():
+    """Read the optional extraction backend override from the upload form"""
+    backend = request.form.get('backend') or None
+    if backend and backend != 'auto' and backend not in BACKEND_NAMES:
+        return None, (jsonify({'error': f"Unknown backend '{backend}'. Use one of: auto, {', '.join(BACKEND_NAMES)}"}), 400)
+    return None if backend == 'auto' else backend, None
+
+def _requested_engine():
+    """Read the optional topic/concept engine ('regex' or 'spacy') from the upload form"""
+    try:
+        return registry.mindmap_service.resolve_engine(request.form.get('engine') or None), None
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+    except EngineUnavailableError as e:
+        return None, (jsonify({'error': str(e)}), 503)
+
+def _requested_budget():
+    """
+    Read the optional per-request budget (deadlineSeconds, maxPages,
+    maxChars) from the upload form; MINDMAP_DEADLINE_SECONDS and
+    MINDMAP_MAX_REGEX_CHARS apply when set. None means no budget.
+    """
+    try:
+        seconds = float(request.form.get('deadlineSeconds') or 0) or None
+        max_pages = int(request.form.get('maxPages') or 0) or None
+        max_chars = int(request.form.get('maxChars') or 0) or None
+    except ValueError:
+        return None, (jsonify({'error': 'deadlineSeconds, maxPages and maxChars must be numbers'}), 400)
+    if (seconds and seconds < 0) or (max_pages and max_pages < 0) or (max_chars and max_chars < 0):
+        return None, (jsonify({'error': 'deadlineSeconds, maxPages and maxChars must be positive'}), 400)
+    return WorkBudget.from_env(seconds, max_pages=max_pages, max_chars=max_chars), None
+
+def _preflight(file, backend):
+    """Pre-flight check of an upload; returns (report, 400 response if the file is encrypted or corrupt)"""
+    report = registry.pdf_processor.preflight(file.stream, backend)
+    if not report['usable']:
+        logger.info("Rejected %s in pre-flight (%s): %s", file.filename, report['kind'], report['reason'])
+        return report, (jsonify({'error': PREFLIGHT_ERRORS[report['kind']], 'preflight': report}), 400)
+    return report, None
+
+def _queue_if_slow(file, report, backend, engine):
+    """202 with a background job for uploads expected to exceed SYNC_MAX_SECONDS, else None"""
+    if not SYNC_MAX_SECONDS or report['estimated_seconds'] <= SYNC_MAX_SECONDS:
+        return None
+    try:
+        file.stream.seek(0)
+        job = job_queue.submit(file.stream.read(), filename=file.filename, backend=backend, engine=engine)
+    except QueueFullError as e:
+        # Still answer in the request rather than turn the upload away
+        logger.warning("Processing %s in the request: %s", file.filename, e)
+        return None
+    logger.info("Queued %s as job %s (estimated %ss)", file.filename, job['id'], report['estimated_seconds'])
+    response = jsonify({'success': True, 'data': _job_status(job)})
+    response.headers['Location'] = url_for('get_mindmap_job', job_id=job['id'])
+    return response, 202
+
+def _cache_entry(cache_key, entry):
+    """Cache a pipeline result unless a request budget cut it short"""
+    report = entry.pop('budget', None)
+    if not (report and report['degraded']):
+        result_cache.set(cache_key, entry)
+    return report
+
+def _record_course_topics(course_id, mindmap_data):
+    """
+    Add a generated mind map to the cross-course topic graph (never fails
+    the request). Only uploads that name their course are recorded, so
+    one-off documents do not show up as related courses.
+    """
+    if not course_id:
+        return
+    try:
+        topic_graph.add_course(course_id, mindmap_data['course_info']['title'], mindmap_data['topics'])
+    except Exception as e:
+        logger.warning("Could not record topics for %s: %s", course_id, e)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
         'status': 'ok',
         'service': 'AI/ML Service',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'cache': result_cache.stats(),
+        'jobs': job_queue.stats(),
+        'topicGraph': topic_graph.stats(),
+        'routes': route_limiter.stats(),
+        'pageStore': page_store.stats() if page_store else None,
+        'resources': registry.mindmap_service.resource_linker.stats() if registry.status()['ready'] else None
     })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request and pipeline stage metrics in the Prometheus text format"""
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled (set METRICS_ENABLED=true)'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Report whether this worker has finished warming up its services"""
+    status = registry.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
 @app.route('/api/ai/parse-syllabus', methods=['POST'])
 def parse_syllabus():
     """Parse syllabus document and extract topics"""
     try:
-        from services.pdf_processor import PDFProcessor
-        
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
         
@@ -32,15 +308,13 @@ def parse_syllabus():
         if not file or file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Save uploaded file
-        upload_folder = 'uploads/syllabus'
-        os.makedirs(upload_folder, exist_ok=True)
-        file_path = os.path.join(upload_folder, file.filename)
-        file.save(file_path)
+        backend, error = _requested_backend()
+        if error:
+            return error
         
-        # Extract text from PDF
-        pdf_processor = PDFProcessor()
-        text = pdf_processor.extract_text(file_path)
+        # Extract text straight from the uploaded stream
+        pdf_processor = registry.pdf_processor
+        text = pdf_processor.extract_text(file.stream, backend=backend)
         topics = pdf_processor.extract_topics(text)
         
         return jsonify({
@@ -57,9 +331,6 @@ def parse_syllabus():
 def generate_mindmap_simple():
     """Generate mind map from uploaded PDF syllabus - Intelligent extraction"""
     try:
-        from services.pdf_processor import PDFProcessor
-        from services.mindmap_service import MindMapService
-        
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
         
@@ -68,72 +339,253 @@ def generate_mindmap_simple():
         if not file or file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        if not file.filename.lower().endswith('.pdf'):
-            return jsonify({'error': 'Only PDF files are allowed'}), 400
+        if not file.filename.lower().endswith(('.pdf', '.txt', '.md')):
+            return jsonify({'error': 'Only PDF, TXT or MD files are allowed'}), 400
+        
+        # Optional extraction backend override (pypdf2, pdfplumber, text)
+        backend, error = _requested_backend()
+        if error:
+            return error
+        
+        # Optional topic/concept engine (regex, spacy)
+        engine, error = _requested_engine()
+        if error:
+            return error
         
-        # Save uploaded file
-        upload_folder = 'uploads/syllabus'
-        os.makedirs(upload_folder, exist_ok=True)
-        file_path = os.path.join(upload_folder, file.filename)
-        file.save(file_path)
+        # Optional deadline and page/character budget
+        budget, error = _requested_budget()
+        if error:
+            return error
+        
+        # Serve repeat uploads of the same document straight from the cache
+        cache_key = result_cache.make_key(file.stream, variant=pipeline_variant(backend, engine))
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            if len(cached['text'].strip()) < 50:
+                return jsonify({'error': INSUFFICIENT_TEXT_ERROR}), 400
+            return _mindmap_response(file.filename, cached['mindmap'], cached['resources'])
+        
+        # Turn away encrypted and broken files before parsing them, and hand
+        # documents too large to answer in the request to the job queue
+        report, error = _preflight(file, backend)
+        if error:
+            return error
+        queued = _queue_if_slow(file, report, backend, engine)
+        if queued:
+            return queued
         
         try:
-            # Extract text from PDF
-            pdf_processor = PDFProcessor()
-            text = pdf_processor.extract_text(file_path)
+            entry = _run_pipeline(file.stream, backend, engine, budget)
             
-            if not text or len(text.strip()) < 50:
-                return jsonify({'error': 'Could not extract sufficient text from PDF. Please ensure the PDF contains readable text.'}), 400
+            # A scanned cover page alone does not reject a document, only no text anywhere
+            if not entry['text'] or len(entry['text'].strip()) < 50:
+                return jsonify({'error': PREFLIGHT_ERRORS.get(report['kind'], INSUFFICIENT_TEXT_ERROR)}), 400
             
-            print(f"Extracted {len(text)} characters from PDF")
+            report = _cache_entry(cache_key, entry)
             
-            # Generate mind map with intelligent extraction
-            mindmap_service = MindMapService()
-            mindmap_data = mindmap_service.generate_mindmap(text)
+            return _mindmap_response(file.filename, entry['mindmap'], entry['resources'], report)
             
-            # Check if we got meaningful topics
-            if not mindmap_data.get('topics') or len(mindmap_data['topics']) == 0:
-                return jsonify({'error': 'Could not extract topics from PDF. Please ensure the PDF has a clear structure with headings.'}), 400
+        except Exception as e:
+            logger.warning("Error processing PDF %s: %s", file.filename, e)
+            raise e
+    
+    except Exception as e:
+        logger.exception("Error generating mindmap")
+        return jsonify({'error': f'Failed to generate mind map: {str(e)}'}), 500
+
+def _run_pipeline(stream, backend, engine, budget=None):
+    """
+    Extract an upload and build its mind map and resources, as a result
+    cache entry ({'text', 'mindmap', 'resources', 'extraction'}, plus the
+    budget report under 'budget' when there is a budget). Runs on the
+    pipeline process pool when there is one, else in this thread.
+    """
+    if pipeline_pool is not None:
+        stream.seek(0)
+        entry = pipeline_pool.run(stream.read(), backend, engine, budget)
+    else:
+        # Extract text straight from the uploaded stream
+        extraction = registry.pdf_processor.extract(stream, backend=backend, budget=budget)
+        text = extraction.pop('text')
+        lines = extraction.pop('lines')
+        boilerplate_lines = extraction.pop('boilerplate_lines', None)
+        
+        # Generate mind map with intelligent extraction
+        mindmap_service = registry.mindmap_service
+        mindmap_data = mindmap_service.generate_mindmap(text, lines, engine=engine, boilerplate_lines=boilerplate_lines,
+                                                        budget=budget)
+        
+        # Link study resources
+        with stage('link_resources', budget):
+            resources = mindmap_service.link_resources(mindmap_data['topics'])
+        
+        entry = {
+            'text': text,
+            'mindmap': mindmap_data,
+            'resources': resources,
+            'extraction': extraction
+        }
+        if budget is not None:
+            entry['budget'] = budget.report()
+    
+    extraction = entry['extraction']
+    logger.info(
+        "Extracted %d characters from %d pages with %s in %ss",
+        extraction['characters'], extraction['pages'], extraction['backend'], extraction['seconds']
+    )
+    return entry
+
+def _mindmap_response(filename, mindmap_data, resources, budget=None):
+    """Build the /generate-mindmap response from pipeline output (and the budget report, if any)"""
+    # Check if we got meaningful topics
+    if not mindmap_data.get('topics') or len(mindmap_data['topics']) == 0:
+        return jsonify({'error': NO_TOPICS_ERROR}), 400
+    
+    result = {
+        'course_info': mindmap_data.get('course_info', {
+            'title': filename.replace('.pdf', ''),
+            'description': 'Generated from uploaded syllabus'
+        }),
+        'topics': mindmap_data.get('topics', []),
+        'resources': resources,
+        'key_concepts': mindmap_data.get('key_concepts', [])
+    }
+    if budget is not None:
+        result['budget'] = budget
+    
+    logger.info("Generated mind map with %d topics", len(result['topics']))
+    
+    return jsonify(result), 200
+
+def _stream_event(stream_format, event, data):
+    """Encode one streaming event as an SSE frame or an NDJSON line"""
+    if stream_format == 'sse':
+        return f"event: {event}\ndata: {dumps(data)}\n\n"
+    return dumps({'event': event, 'data': data}) + '\n'
+
+@app.route('/generate-mindmap/stream', methods=['POST'])
+def generate_mindmap_stream():
+    """
+    Streaming variant of /generate-mindmap. Sends course_info first, then one
+    topic event per topic as soon as it is finalized, then key_concepts,
+    resources and a closing done event (or an error event). Responds with
+    Server-Sent Events when the client accepts text/event-stream or passes
+    format=sse, and NDJSON otherwise.
+    """
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        file = request.files['file']
+        if not file or file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        
+        if not file.filename.lower().endswith(('.pdf', '.txt', '.md')):
+            return jsonify({'error': 'Only PDF, TXT or MD files are allowed'}), 400
+        
+        backend, error = _requested_backend()
+        if error:
+            return error
+        
+        stream_format = request.values.get('format')
+        if stream_format is None:
+            stream_format = 'sse' if 'text/event-stream' in request.headers.get('Accept', '') else 'ndjson'
+        if stream_format not in ('sse', 'ndjson'):
+            return jsonify({'error': "format must be 'sse' or 'ndjson'"}), 400
+        
+        # Same entry as /generate-mindmap with the regex engine
+        cache_key = result_cache.make_key(file.stream, variant=pipeline_variant(backend))
+        cached = result_cache.get(cache_key)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def replay(entry):
+        mindmap_data = entry['mindmap']
+        yield 'course_info', mindmap_data['course_info']
+        for topic in mindmap_data['topics']:
+            yield 'topic', topic
+        yield 'key_concepts', mindmap_data['key_concepts']
+        yield 'mindmap', mindmap_data
+    
+    def generate():
+        start = time.perf_counter()
+        try:
+            extraction = {}
+            text_lines = []
             
-            # Link study resources
-            resources = mindmap_service.link_resources(mindmap_data.get('topics', []))
+            if cached is not None:
+                events = replay(cached)
+                text = cached['text']
+            else:
+                # Only a page store reports boilerplate pages
+                boilerplate_lines = [] if page_store is not None else None
+                
+                def pages():
+                    for page_lines in registry.pdf_processor.iter_page_lines(
+                            file.stream, backend=backend, stats=extraction, boilerplate_lines=boilerplate_lines):
+                        text_lines.extend(page_lines)
+                        yield page_lines
+                events = registry.mindmap_service.iter_mindmap(pages(), boilerplate_lines)
+                text = None
             
-            result = {
-                'course_info': mindmap_data.get('course_info', {
-                    'title': file.filename.replace('.pdf', ''),
-                    'description': 'Generated from uploaded syllabus'
-                }),
-                'topics': mindmap_data.get('topics', []),
-                'resources': resources,
-                'key_concepts': mindmap_data.get('key_concepts', [])
-            }
+            topic_index = 0
+            for event, data in events:
+                if event == 'topic':
+                    yield _stream_event(stream_format, 'topic', dict(data, index=topic_index))
+                    topic_index += 1
+                elif event == 'mindmap':
+                    mindmap_data = data
+                else:
+                    yield _stream_event(stream_format, event, data)
             
-            print(f"Generated mind map with {len(result['topics'])} topics")
+            if text is None:
+                text = '\n'.join(text_lines)
+                extraction['seconds'] = round(time.perf_counter() - start, 4)
             
-            # Clean up
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            if len(text.strip()) < 50:
+                yield _stream_event(stream_format, 'error', {'error': INSUFFICIENT_TEXT_ERROR})
+                return
+            if not mindmap_data['topics']:
+                yield _stream_event(stream_format, 'error', {'error': NO_TOPICS_ERROR})
+                return
             
-            return jsonify(result), 200
+            if cached is not None:
+                resources = cached['resources']
+                extraction = cached.get('extraction')
+            else:
+                with metrics.stage('link_resources'):
+                    resources = registry.mindmap_service.link_resources(mindmap_data['topics'])
+                result_cache.set(cache_key, {
+                    'text': text,
+                    'mindmap': mindmap_data,
+                    'resources': resources,
+                    'extraction': extraction
+                })
             
+            yield _stream_event(stream_format, 'resources', resources)
+            yield _stream_event(stream_format, 'done', {
+                'topics': topic_index,
+                'cached': cached is not None,
+                'extraction': extraction,
+                'seconds': round(time.perf_counter() - start, 4)
+            })
+        
         except Exception as e:
-            # Clean up on error
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            print(f"Error processing PDF: {str(e)}")
-            raise e
+            logger.warning("Streaming mind map failed for %s: %s", file.filename, e)
+            yield _stream_event(stream_format, 'error', {'error': f'Failed to generate mind map: {str(e)}'})
     
-    except Exception as e:
-        print(f"Error generating mindmap: {str(e)}")
-        return jsonify({'error': f'Failed to generate mind map: {str(e)}'}), 500
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    # Keep reverse proxies from buffering the stream
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/ai/generate-mindmap', methods=['POST'])
 def generate_mindmap():
     """Generate mind map from extracted topics"""
     try:
-        from services.mindmap_service import MindMapService
-        from services.pdf_processor import PDFProcessor
-        
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
         
@@ -144,35 +596,211 @@ def generate_mindmap():
         if not file or file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Save uploaded file
-        upload_folder = 'uploads/syllabus'
-        os.makedirs(upload_folder, exist_ok=True)
-        file_path = os.path.join(upload_folder, file.filename)
-        file.save(file_path)
+        backend, error = _requested_backend()
+        if error:
+            return error
         
-        # Extract text from PDF
-        pdf_processor = PDFProcessor()
-        text = pdf_processor.extract_text(file_path)
+        engine, error = _requested_engine()
+        if error:
+            return error
         
-        # Generate mind map
-        mindmap_service = MindMapService()
-        mindmap_data = mindmap_service.generate_mindmap(text)
+        budget, error = _requested_budget()
+        if error:
+            return error
         
-        # Link study resources
-        resources = mindmap_service.link_resources(mindmap_data['topics'])
+        cache_key = result_cache.make_key(file.stream, variant=pipeline_variant(backend, engine))
+        cached = result_cache.get(cache_key)
+        report = None
+        
+        if cached is not None:
+            mindmap_data = cached['mindmap']
+            resources = cached['resources']
+            extraction = cached.get('extraction')
+        else:
+            preflight, error = _preflight(file, backend)
+            if error:
+                return error
+            queued = _queue_if_slow(file, preflight, backend, engine)
+            if queued:
+                return queued
+            entry = _run_pipeline(file.stream, backend, engine, budget)
+            # Sampled pages without text are rejected only if the whole document has none
+            if preflight['kind'] in PREFLIGHT_ERRORS and len(entry['text'].strip()) < MIN_TEXT_CHARS:
+                return jsonify({'error': PREFLIGHT_ERRORS[preflight['kind']], 'preflight': preflight}), 400
+            mindmap_data = entry['mindmap']
+            resources = entry['resources']
+            extraction = entry['extraction']
+            report = _cache_entry(cache_key, entry)
+        
+        _record_course_topics(course_id, mindmap_data)
         
         result = {
             'mindmap': mindmap_data,
             'resources': resources,
+            'extraction': extraction,
             'courseId': course_id,
             'studentId': student_id
         }
+        # Partial results say what was cut and where the time went
+        if report is not None:
+            result['budget'] = report
         
         return jsonify({'success': True, 'data': result})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ai/generate-mindmap/incremental', methods=['POST'])
+def generate_mindmap_incremental():
+    """
+    Regenerate the mind map for a revised upload of a known document
+    ('documentId', or 'courseId'). Only changed pages and sections are
+    re-processed, and the response includes a topic diff against the
+    previous revision (null on the first upload).
+    """
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        file = request.files['file']
+        if not file or file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        
+        document_id = request.form.get('documentId') or request.form.get('courseId')
+        if not document_id:
+            return jsonify({'error': 'documentId (or courseId) is required for incremental generation'}), 400
+        
+        backend, error = _requested_backend()
+        if error:
+            return error
+        
+        generator = IncrementalGenerator(registry.pdf_processor, registry.mindmap_service, revision_store)
+        result = generator.regenerate(file.stream, document_id, backend=backend)
+        result['documentId'] = document_id
+        # A documentId alone names a document, not a course
+        _record_course_topics(request.form.get('courseId'), result['mindmap'])
+        
+        return jsonify({'success': True, 'data': result})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ai/generate-mindmap/batch', methods=['POST'])
+def generate_mindmap_batch():
+    """
+    Generate mind maps for many syllabi at once (multipart 'files' and/or
+    zip archives). Streams one NDJSON line per syllabus as it finishes,
+    followed by a summary line.
+    """
+    try:
+        backend, error = _requested_backend()
+        if error:
+            return error
+        
+        engine, error = _requested_engine()
+        if error:
+            return error
+        
+        documents = []
+        for file in request.files.getlist('files') + request.files.getlist('file'):
+            if not file or file.filename == '':
+                continue
+            if file.filename.lower().endswith('.zip'):
+                documents.extend(read_zip_documents(file.stream, MAX_BATCH_UPLOAD_BYTES))
+            elif file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                documents.append((file.filename, file.read()))
+        
+        if not documents:
+            return jsonify({'error': 'No PDF, TXT or MD files provided'}), 400
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        start = time.perf_counter()
+        succeeded = 0
+        for result in batch_processor.iter_results(documents, backend=backend, engine=engine):
+            succeeded += result['success']
+            # Batch items carry no course ids, so they are not added to the topic graph
+            yield dumps(result) + '\n'
+        yield dumps({
+            'done': True,
+            'total': len(documents),
+            'succeeded': succeeded,
+            'failed': len(documents) - succeeded,
+            'seconds': round(time.perf_counter() - start, 4)
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _job_status(job):
+    """Public view of a job record, without its result payload"""
+    return {
+        'jobId': job['id'],
+        'status': job['status'],
+        'filename': job['filename'],
+        'submittedAt': job['submitted_at'],
+        'startedAt': job['started_at'],
+        'finishedAt': job['finished_at'],
+        'queueSeconds': job['queue_seconds'],
+        'runSeconds': job['run_seconds'],
+        'expiresAt': job['expires_at'],
+        'error': job['error']
+    }
+
+@app.route('/api/ai/jobs', methods=['POST'])
+def submit_mindmap_job():
+    """Queue mind-map generation for an uploaded syllabus and return a job id at once"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        file = request.files['file']
+        if not file or file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        
+        backend, error = _requested_backend()
+        if error:
+            return error
+        
+        engine, error = _requested_engine()
+        if error:
+            return error
+        
+        _, error = _preflight(file, backend)
+        if error:
+            return error
+        
+        job = job_queue.submit(file.read(), filename=file.filename, backend=backend, engine=engine)
+        return jsonify({'success': True, 'data': _job_status(job)}), 202
+    
+    except QueueFullError as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ai/jobs/<job_id>', methods=['GET'])
+def get_mindmap_job(job_id):
+    """Poll the status and timing of a mind-map job"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify({'success': True, 'data': _job_status(job)})
+
+@app.route('/api/ai/jobs/<job_id>/result', methods=['GET'])
+def get_mindmap_job_result(job_id):
+    """Fetch the mind map produced by a job (202 while it is still running)"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    if job['status'] == FAILED:
+        return jsonify({'error': job['error'], 'data': _job_status(job)}), 422
+    if job['status'] != COMPLETED:
+        return jsonify({'success': True, 'data': _job_status(job)}), 202
+    return jsonify({'success': True, 'data': job['result']})
+
 @app.route('/api/ai/find-references', methods=['POST'])
 def find_references():
     """Find reference links for topics"""
@@ -183,33 +811,54 @@ def find_references():
         if not topics:
             return jsonify({'error': 'No topics provided'}), 400
         
-        from services.mindmap_service import MindMapService
-        mindmap_service = MindMapService()
-        
-        resources = []
-        for topic in topics:
-            topic_resources = {
-                'topic': topic,
-                'resources': [
-                    {
-                        'type': 'video',
-                        'title': f"Learn {topic}",
-                        'url': f"https://www.youtube.com/results?search_query={topic.replace(' ', '+')}"
-                    },
-                    {
-                        'type': 'article',
-                        'title': f"{topic} - Wikipedia",
-                        'url': f"https://en.wikipedia.org/wiki/{topic.replace(' ', '_')}"
-                    }
-                ]
-            }
-            resources.append(topic_resources)
+        links = registry.mindmap_service.resource_linker.bulk(str(topic) for topic in topics)
+        resources = [{'topic': topic, 'resources': topic_links} for topic, topic_links in links.items()]
         
         return jsonify({'success': True, 'data': resources})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ai/topics/related', methods=['GET'])
+def related_topics():
+    """
+    Topics like ?topic= taught in other courses (excluding ?courseId=),
+    from every mind map this service has generated
+    """
+    try:
+        topic = request.args.get('topic', '').strip()
+        if not topic:
+            return jsonify({'error': 'topic is required'}), 400
+        
+        related = topic_graph.related_topics(
+            topic,
+            course_id=request.args.get('courseId') or None,
+            limit=int(request.args.get('limit', 10)),
+            threshold=float(request.args.get('threshold', 0.3))
+        )
+        return jsonify({'success': True, 'data': {'topic': topic, 'related': related}})
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ai/topics/overlap', methods=['POST'])
+def topic_overlap():
+    """Topics shared (exactly or by similarity) between each pair of the given courses"""
+    try:
+        data = request.get_json() or {}
+        course_ids = [str(course_id) for course_id in data.get('courseIds', [])]
+        
+        if len(course_ids) < 2:
+            return jsonify({'error': 'At least two courseIds are required'}), 400
+        
+        overlap = topic_graph.course_overlap(course_ids, threshold=float(data.get('threshold', 0.5)))
+        return jsonify({'success': True, 'data': overlap})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/ai/recommendations', methods=['POST'])
 def generate_recommendations():
     """Generate study recommendations"""
@@ -251,6 +900,47 @@ def generate_recommendations():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _flag(name, default=False):
+    """Read a boolean option from the query string or form"""
+    value = request.values.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+@app.route('/api/ai/recommendations/batch', methods=['POST'])
+def generate_recommendations_batch():
+    """
+    Score a whole cohort at once. Accepts a JSON body of column arrays
+    ({'studentId': [...], 'topic': [...], 'score': [...]}) or a CSV upload
+    ('file') with those columns. Streams NDJSON chunks in columnar
+    ('split') form, optional per-student summaries (?aggregate=true),
+    then a done line.
+    """
+    try:
+        aggregate = _flag('aggregate')
+        include_rows = _flag('rows', default=True)
+        
+        if 'file' in request.files:
+            frames = iter_input_frames(None, request.files['file'].stream, RECOMMENDATION_CHUNK_ROWS)
+        else:
+            data = request.get_json(silent=True)
+            if not data:
+                return jsonify({'error': 'No performance data provided'}), 400
+            frames = iter_input_frames(data, None, RECOMMENDATION_CHUNK_ROWS)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        try:
+            yield from recommendation_scorer.iter_ndjson(frames, aggregate=aggregate, include_rows=include_rows)
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            logger.warning("Batch recommendations failed: %s", e)
+            yield dumps({'type': 'error', 'error': str(e)}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.errorhandler(Exception)
 def handle_error(error):
     return jsonify({
@@ -262,5 +952,6 @@ def handle_error(error):
     }), 500
 
 if __name__ == '__main__':
+    registry.warm_up()
     port = int(os.getenv('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=os.getenv('FLASK_ENV') == 'development')
@@ -0,0 +1,100 @@
+"""
+Regression benchmark for ConceptExtractor against the four backtracking
+definition regexes it replaced.
+
+Checks that both produce identical raw matches on generated prose, fuzzed
+edge cases and adversarial inputs (long runs of words without periods,
+very long tokens), and reports the time each takes as inputs grow.
+
+Run from the ai-service directory:
+    python -m benchmarks.concept_extractor [--fuzz 20000]
+"""
+import argparse
+import random
+import re
+import time
+
+from services.concept_extractor import ConceptExtractor, DEFINITION_FORMS
+
+LEGACY_PATTERNS = [
+    r'(\w+(?:\s+\w+){0,3})\s+is\s+(?:a|an|the)\s+([^.]{10,150})',
+    r'(\w+(?:\s+\w+){0,3})\s+refers to\s+([^.]{10,150})',
+    r'(\w+(?:\s+\w+){0,3})\s+means\s+([^.]{10,150})',
+    r'(\w+(?:\s+\w+){0,3}):\s+([A-Z][^.]{10,150})'
+]
+
+
+def legacy_find_definitions(text):
+    return {
+        form: [match.groups() for match in re.finditer(pattern, text, re.IGNORECASE)]
+        for form, pattern in zip(DEFINITION_FORMS, LEGACY_PATTERNS)
+    }
+
+
+WORDS = ['stack', 'Queue', 'graph', 'data', 'structure', 'is', 'a', 'an', 'the', 'refers', 'to',
+         'means', 'Definition:', 'Note:', 'algorithm', 'memory', 'x', 'of', 'and', 'IS', 'The']
+SEPARATORS = [' ', ' ', ' ', ' ', '  ', '\t', '\n', '. ', ', ', ': ', ' (', ') ', '-', '.']
+
+
+def generate_text(rng, words):
+    parts = []
+    for _ in range(words):
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice(SEPARATORS))
+    return ''.join(parts)
+
+
+def fuzz_text(rng):
+    alphabet = ['is', 'a', 'an', 'the', 'refers', 'to', 'means', ':', ' ', ' ', ' ', '  ', '\t', '.',
+                'x', 'Ab', '_', '1', 'é', 'ſ', '(', '-', 'İs', 'word', 'refers  to', 'A']
+    return ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+
+
+def adversarial_inputs(size):
+    yield 'long word runs without periods', ' '.join(['word'] * (size // 5))
+    # Quadratic for the legacy regexes, so kept shorter to finish in seconds
+    yield 'single very long token', 'a' * (size // 40)
+    yield 'anchors without descriptions', ' '.join(['x is a y.'] * (size // 9))
+    yield 'dense definitions', ' '.join(['Stack is a structure of items in order'] * (size // 40))
+
+
+def best_time(function, text, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fuzz', type=int, default=20000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 40000, 160000])
+    args = parser.parse_args()
+
+    extractor = ConceptExtractor()
+    rng = random.Random(7)
+
+    mismatches = 0
+    for i in range(args.fuzz):
+        text = fuzz_text(rng) if i % 2 else generate_text(rng, rng.randint(1, 200))
+        if extractor.find_definitions(text) != legacy_find_definitions(text):
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"mismatch: {text!r}")
+    print(f"fuzzed inputs: {args.fuzz}, mismatches: {mismatches}")
+
+    print(f"{'input':32} {'chars':>8} {'legacy':>10} {'linear':>10} {'match':>6}")
+    for size in args.sizes:
+        cases = [('generated prose', generate_text(random.Random(size), size // 6))]
+        cases.extend(adversarial_inputs(size))
+        for name, text in cases:
+            same = extractor.find_definitions(text) == legacy_find_definitions(text)
+            legacy = best_time(legacy_find_definitions, text)
+            linear = best_time(extractor.find_definitions, text)
+            print(f"{name:32} {len(text):>8} {legacy * 1000:>8.2f}ms {linear * 1000:>8.2f}ms {str(same):>6}")
+
+
+if __name__ == '__main__':
+    main()
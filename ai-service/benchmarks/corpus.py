@@ -0,0 +1,186 @@
+"""
+Deterministic synthetic syllabus corpus for benchmarks.
+
+Every document is generated from a seeded RNG, so the same case name
+always produces byte-identical text and PDFs across runs and machines.
+"""
+import random
+from typing import Dict, List
+
+SUBJECTS = [
+    'Data Structures', 'Operating Systems', 'Computer Networks', 'Database Systems',
+    'Machine Learning', 'Compiler Design', 'Discrete Mathematics', 'Software Engineering'
+]
+TERMS = [
+    'arrays', 'linked lists', 'stacks', 'queues', 'binary trees', 'hash tables', 'graphs',
+    'scheduling', 'paging', 'deadlocks', 'routing', 'transactions', 'normalization',
+    'regression', 'classification', 'parsing', 'lexical analysis', 'recursion', 'sorting'
+]
+FILLER = [
+    'students', 'will', 'learn', 'the', 'core', 'ideas', 'behind', 'practical', 'systems',
+    'with', 'emphasis', 'on', 'analysis', 'design', 'and', 'implementation', 'of', 'common',
+    'techniques', 'used', 'in', 'industry', 'research', 'lab', 'sessions', 'weekly'
+]
+BOILERPLATE = [
+    'Attendance: Students must attend at least 75 percent of lectures.',
+    'Grading policy: Midterm 30 percent, final 50 percent, assignments 20 percent.',
+    'Lab safety rules apply to every practical session.'
+]
+
+HEADING_STYLES = ('unit', 'chapter', 'numbered', 'title')
+BULLET_STYLES = ('-', '•', '*', '1.1', 'a)', '(a)')
+
+# Named corpus cases used by the benchmark suite
+CASES = {
+    'small': dict(pages=5),
+    'medium': dict(pages=40),
+    'large': dict(pages=200),
+    'dense-headings': dict(pages=40, heading_density=0.5),
+    'sparse-headings': dict(pages=40, heading_density=0.02),
+    'numbered-bullets': dict(pages=40, bullet_style='1.1', heading_style='numbered'),
+    'letter-bullets': dict(pages=40, bullet_style='a)', heading_style='chapter'),
+    'no-periods': dict(pages=20, pathological='no-periods'),
+    'long-tokens': dict(pages=20, pathological='long-tokens'),
+    'no-structure': dict(pages=20, pathological='no-structure'),
+    'all-caps': dict(pages=20, pathological='all-caps'),
+}
+
+
+def _heading(rng, style: str, number: int) -> str:
+    title = f"{rng.choice(['Introduction to', 'Fundamentals of', 'Advanced', 'Applications of'])} {rng.choice(TERMS).title()}"
+    if style == 'unit':
+        return f"Unit {number} {title}"
+    if style == 'chapter':
+        return f"Chapter {number}: {title}"
+    if style == 'numbered':
+        return f"{number}. {title}"
+    return title.upper() if rng.random() < 0.3 else title
+
+
+def _bullet(rng, style: str, index: int) -> str:
+    text = f"{rng.choice(['Definition of', 'Types of', 'Examples of', 'Properties of', 'Implementing'])} {rng.choice(TERMS)}"
+    if style == '1.1':
+        return f"{rng.randint(1, 9)}.{index + 1} {text}"
+    if style == 'a)':
+        return f"{'abcdefgh'[index % 8]}) {text}"
+    if style == '(a)':
+        return f"({'abcdefgh'[index % 8]}) {text}"
+    return f"{style} {text}"
+
+
+def _sentence(rng) -> str:
+    words = [rng.choice(FILLER) for _ in range(rng.randint(8, 20))]
+    if rng.random() < 0.25:
+        term = rng.choice(TERMS).title()
+        return f"{term} is a {' '.join(words)}."
+    if rng.random() < 0.1:
+        return f"{rng.choice(TERMS).title()} refers to {' '.join(words)}."
+    return ' '.join(words).capitalize() + '.'
+
+
+def generate_pages(pages: int = 10, lines_per_page: int = 40, heading_density: float = 0.1,
+                   bullet_density: float = 0.4, heading_style: str = 'unit', bullet_style: str = '-',
+                   pathological: str = None, seed: int = 0) -> List[List[str]]:
+    """Generate a syllabus as a list of pages, each a list of lines"""
+    rng = random.Random(f"{seed}-{pages}-{heading_style}-{bullet_style}-{pathological}-{heading_density}")
+    result = []
+    unit = 0
+    bullets = 0
+
+    for page_number in range(pages):
+        lines = []
+        if page_number == 0:
+            lines.append(f"Course: {rng.choice(SUBJECTS)}")
+
+        for _ in range(lines_per_page):
+            if pathological == 'no-periods':
+                lines.append(' '.join(rng.choice(FILLER) for _ in range(14)))
+            elif pathological == 'long-tokens':
+                lines.append(''.join(rng.choice(FILLER) for _ in range(12)))
+            elif pathological == 'no-structure':
+                lines.append(_sentence(rng).lower())
+            else:
+                roll = rng.random()
+                if roll < heading_density:
+                    unit += 1
+                    bullets = 0
+                    lines.append(_heading(rng, heading_style, unit))
+                elif roll < heading_density + bullet_density:
+                    lines.append(_bullet(rng, bullet_style, bullets))
+                    bullets += 1
+                else:
+                    lines.append(_sentence(rng))
+
+        if pathological == 'all-caps':
+            lines = [line.upper() for line in lines]
+
+        # Repeated boilerplate and a page number footer, like real course packs
+        lines.append(BOILERPLATE[page_number % len(BOILERPLATE)])
+        lines.append(str(page_number + 1))
+        result.append(lines)
+
+    return result
+
+
+def pages_to_text(pages: List[List[str]]) -> str:
+    return '\n'.join('\n'.join(lines) for lines in pages)
+
+
+def pages_to_pdf(pages: List[List[str]], form_xobjects: bool = False) -> bytes:
+    """
+    Write a minimal valid PDF with one text line per line, using a standard
+    font. With form_xobjects, each page's text sits in a form XObject the
+    page content only draws (q /Fm0 Do Q).
+    """
+    stride = 3 if form_xobjects else 2
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = ' '.join(f"{3 + stride * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    font_id = 3 + stride * len(pages)
+    fonts = f"/Font << /F1 {font_id} 0 R >>"
+
+    for i, lines in enumerate(pages):
+        page_id = 3 + stride * i
+        resources = f"<< /XObject << /Fm0 {page_id + 2} 0 R >> >>" if form_xobjects else f"<< {fonts} >>"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {page_id + 1} 0 R "
+            f"/Resources {resources} >>".encode()
+        )
+        ops = [b"BT /F1 10 Tf 12 TL 40 760 Td"]
+        for line in lines:
+            escaped = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            ops.append(b"(" + escaped.encode('cp1252', errors='replace') + b") Tj T*")
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        if form_xobjects:
+            draw = b"q /Fm0 Do Q"
+            objects.append(b"<< /Length %d >>\nstream\n" % len(draw) + draw + b"\nendstream")
+            form = f"<< /Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources << {fonts} >> /Length {len(stream)} >>"
+            objects.append(form.encode() + b"\nstream\n" + stream + b"\nendstream")
+        else:
+            objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(output)
+
+
+def build_case(name: str) -> Dict:
+    """Return {'pages', 'text', 'pdf'} for a named corpus case"""
+    pages = generate_pages(**CASES[name])
+    return {
+        'pages': pages,
+        'text': pages_to_text(pages),
+        'pdf': pages_to_pdf(pages)
+    }
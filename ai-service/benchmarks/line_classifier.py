@@ -0,0 +1,131 @@
+"""
+Per-line cost of the compiled LineClassifier against the original
+per-rule implementation it replaced, on a large synthetic syllabus.
+
+Run from the ai-service directory:
+    python -m benchmarks.line_classifier [--lines 50000] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import time
+
+from services.line_classifier import LineClassifier, MAIN_TOPIC, SUBTOPIC
+
+
+def legacy_is_main_topic(line):
+    if len(line) < 5 or len(line) > 150:
+        return False
+    if re.match(r'^(\d+\.?\d*\s+|Unit\s+\d+|Chapter\s+\d+|Module\s+\d+|Lesson\s+\d+|Topic\s+\d+)', line, re.IGNORECASE):
+        return True
+    words = line.split()
+    if len(words) >= 2 and len(words) <= 15:
+        if all(word[0].isupper() for word in words if len(word) > 2):
+            return True
+        if line.isupper() and 10 < len(line) < 80:
+            return True
+    topic_keywords = [
+        'Introduction to', 'Overview of', 'Fundamentals of', 'Basics of',
+        'Advanced', 'Understanding', 'Exploring', 'Concepts of'
+    ]
+    if any(line.startswith(keyword) for keyword in topic_keywords):
+        return True
+    return False
+
+
+def legacy_is_subtopic(line):
+    if len(line) < 5 or len(line) > 120:
+        return False
+    if re.match(r'^(\s*[-•*○●▪▫]|\s*\d+\.\d+|\s*[a-z]\)|\s*[ivx]+\.|\s*\([a-z]\))', line, re.IGNORECASE):
+        return True
+    subtopic_indicators = [
+        'Definition', 'Types', 'Examples', 'Applications', 'Properties',
+        'Characteristics', 'Features', 'Methods', 'Techniques', 'Principles',
+        'Components', 'Elements', 'Factors', 'Advantages', 'Disadvantages'
+    ]
+    if any(line.startswith(indicator) for indicator in subtopic_indicators):
+        return True
+    if line.startswith('    ') or line.startswith('\t'):
+        return True
+    return False
+
+
+def legacy_clean_topic_name(text):
+    text = re.sub(r'^(\d+\.?\d*\s*|Unit\s+\d+\s*|Chapter\s+\d+\s*|Module\s+\d+\s*|Lesson\s+\d+\s*|Topic\s+\d+\s*)', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'^(\s*[-•*○●▪▫]|\s*[a-z]\)|\s*[ivx]+\.|\s*\([a-z]\))\s*', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'^[:\-–—]+\s*', '', text)
+    text = re.sub(r'\s*[:\-–—]+$', '', text)
+    text = ' '.join(text.split())
+    if text.isupper() and len(text) > 10:
+        text = text.title()
+    text = re.sub(r'[,;:]+$', '', text)
+    return text.strip()
+
+
+def legacy_classify(line, allow_subtopic=True):
+    if legacy_is_main_topic(line):
+        return MAIN_TOPIC, legacy_clean_topic_name(line)
+    if allow_subtopic and legacy_is_subtopic(line):
+        return SUBTOPIC, legacy_clean_topic_name(line)
+    return None, None
+
+
+PREFIXES = [
+    '', '', '', '1. ', '2.3 ', 'Unit 4 ', 'CHAPTER 2: ', 'module 7 - ', '- ', '• ', '* ', 'a) ',
+    'iv. ', '(b) ', '    ', '\t', 'Introduction to ', 'Advanced ', 'Definition of ', 'Types of ',
+    ': ', '— ', '3.1.2 '
+]
+WORDS = [
+    'data', 'Structures', 'ALGORITHMS', 'graph', 'Theory', 'and', 'of', 'the', 'Sorting', 'networks',
+    'Binary', 'search', 'trees', 'OPERATING', 'systems', 'memory', 'Paging', 'is', 'a', 'process'
+]
+SUFFIXES = ['', '', '', ':', ' -', ';', ',', ' —', '.']
+
+
+def generate_lines(count, seed=42):
+    """Deterministic mix of headings, bullets, prose and edge cases"""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(1, 18))]
+        if rng.random() < 0.1:
+            words = [word.upper() for word in words]
+        lines.append(rng.choice(PREFIXES) + ' '.join(words) + rng.choice(SUFFIXES))
+    return lines
+
+
+def time_per_line(classify, lines, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            classify(line)
+        best = min(best, time.perf_counter() - start)
+    return best / len(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    lines = generate_lines(args.lines)
+    classifier = LineClassifier()
+
+    mismatches = [line for line in lines if classifier.classify(line) != legacy_classify(line)]
+    legacy = time_per_line(legacy_classify, lines, args.repeat)
+    compiled = time_per_line(classifier.classify, lines, args.repeat)
+
+    print(f"lines:       {len(lines)}")
+    print(f"mismatches:  {len(mismatches)}")
+    print(f"legacy:      {legacy * 1e6:.2f} us/line")
+    print(f"compiled:    {compiled * 1e6:.2f} us/line")
+    print(f"speedup:     {legacy / compiled:.2f}x")
+
+    for line in mismatches[:5]:
+        print(f"  {line!r}: {classifier.classify(line)} != {legacy_classify(line)}")
+
+
+if __name__ == '__main__':
+    main()
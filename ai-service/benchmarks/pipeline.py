@@ -0,0 +1,241 @@
+"""
+Stage-by-stage benchmark of the PDFProcessor -> MindMapService pipeline.
+
+Times extract_text, clean_text, preprocess_text, extract_topics,
+extract_key_concepts and link_resources separately on the synthetic
+corpus, reports throughput and peak memory, and writes a JSON baseline
+that later runs can be compared against.
+
+With --engine spacy the two extraction stages are replaced by one
+spacy_analyze stage (topics and concepts share a parse), and each case
+also reports how far the spaCy output agrees with the regex engine.
+
+Run from the ai-service directory:
+    python -m benchmarks.pipeline run [--cases small large] [--output baseline.json]
+    python -m benchmarks.pipeline compare baseline.json current.json [--threshold 0.15]
+    python -m benchmarks.pipeline run --compare baseline.json
+    python -m benchmarks.pipeline run --engine spacy --compare baseline.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+from benchmarks.corpus import CASES, build_case
+from services.mindmap_nodes import topics_to_dicts
+from services.mindmap_service import MindMapService
+from services.nlp_engine import ENGINE_NAMES, REGEX_ENGINE, SPACY_ENGINE, EngineUnavailableError, get_engine
+from services.pdf_processor import PDFProcessor
+
+def measure(function: Callable, repeat: int) -> Dict:
+    """Best wall time over repeat runs, plus peak traced memory of one extra run"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': best, 'peak_kb': round(peak / 1024, 1), 'result': result}
+
+
+def agreement(first, second) -> float:
+    """Jaccard similarity of two lists of names, compared case-insensitively"""
+    first = {name.lower() for name in first}
+    second = {name.lower() for name in second}
+    return round(len(first & second) / len(first | second), 3) if first | second else 1.0
+
+
+def benchmark_case(name: str, repeat: int, engine: str = REGEX_ENGINE) -> Dict:
+    case = build_case(name)
+    pdf = case['pdf']
+    page_count = len(case['pages'])
+
+    # Single-process extraction so timings do not depend on pool start-up
+    pdf_processor = PDFProcessor(max_workers=1)
+    mindmap_service = MindMapService(spacy_engine=get_engine())
+    raw_text = '\n'.join(
+        page_text for page_text in pdf_processor.backends['pypdf2'].iter_pages(io.BytesIO(pdf), parallel=False)
+        if page_text
+    )
+
+    stages = {}
+    text = None
+    preprocessed = None
+    topics = None
+
+    def run(stage, function, size, unit='chars'):
+        measured = measure(function, repeat)
+        stages[stage] = {
+            'seconds': round(measured['seconds'], 6),
+            'unit': unit,
+            'per_second': round(size / measured['seconds'], 1) if measured['seconds'] else None,
+            'peak_kb': measured['peak_kb']
+        }
+        return measured['result']
+
+    text = run('extract_text', lambda: pdf_processor.extract_text(pdf, backend='pypdf2', parallel=False), len(raw_text))
+    stages['extract_text']['pages_per_second'] = round(page_count / stages['extract_text']['seconds'], 1)
+    run('clean_text', lambda: pdf_processor.clean_text(raw_text), len(raw_text))
+    preprocessed = run('preprocess_text', lambda: mindmap_service.preprocess_text(text), len(text))
+    flat_text = preprocessed.replace('\n', ' ')
+    comparison = None
+    if engine == SPACY_ENGINE:
+        sections = mindmap_service.split_sections(preprocessed.split('\n'))
+        analysis = run('spacy_analyze', lambda: mindmap_service.spacy_engine.analyze(
+            sections, mindmap_service, mindmap_service.topic_limit, mindmap_service.subtopic_limit,
+            mindmap_service.concept_limit
+        ), len(preprocessed))
+        topics = analysis['topics']
+        concepts = analysis['key_concepts']
+        regex_topics = mindmap_service.extract_topics(preprocessed)
+        regex_concepts = mindmap_service.extract_key_concepts(flat_text)[:10]
+        comparison = {
+            'topics': agreement([t.name for t in topics], [t.name for t in regex_topics]),
+            'subtopics': agreement([s for t in topics for s in t.subtopics],
+                                   [s for t in regex_topics for s in t.subtopics]),
+            'key_concepts': agreement([c.name for c in concepts], [c.name for c in regex_concepts])
+        }
+    else:
+        topics = run('extract_topics', lambda: mindmap_service.extract_topics(preprocessed), len(preprocessed))
+        concepts = run('extract_key_concepts', lambda: mindmap_service.extract_key_concepts(flat_text), len(flat_text))
+    topic_dicts = topics_to_dicts(topics)
+    run('link_resources', lambda: mindmap_service.link_resources(topic_dicts), len(topics), unit='topics')
+
+    return {
+        'engine': engine,
+        'agreement_with_regex': comparison,
+        'pages': page_count,
+        'pdf_bytes': len(pdf),
+        'chars': len(text),
+        'topics': len(topics),
+        'key_concepts': len(concepts),
+        'stages': stages,
+        'total_seconds': round(sum(stage['seconds'] for stage in stages.values()), 6)
+    }
+
+
+def run_benchmarks(cases, repeat: int, engine: str = REGEX_ENGINE) -> Dict:
+    results = {}
+    for name in cases:
+        # Silence pipeline progress output so the report stays readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = benchmark_case(name, repeat, engine)
+        print_case(name, results[name])
+
+    return {
+        'meta': {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'engine': engine
+        },
+        'results': results
+    }
+
+
+def print_case(name: str, result: Dict) -> None:
+    print(f"\n{name}: {result['pages']} pages, {result['chars']} chars, "
+          f"{result['topics']} topics, {result['key_concepts']} concepts")
+    for stage, data in result['stages'].items():
+        if data['unit'] == 'chars':
+            throughput = f"{data['per_second'] / 1e6:10.2f} Mchar/s"
+        else:
+            throughput = f"{data['per_second']:10.0f} {data['unit']}/s"
+        print(f"  {stage:22} {data['seconds'] * 1000:10.3f} ms {throughput} {data['peak_kb']:10.1f} KB peak")
+    if result.get('agreement_with_regex'):
+        shares = ', '.join(f"{key} {value:.0%}" for key, value in result['agreement_with_regex'].items())
+        print(f"  agreement with regex engine: {shares}")
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> int:
+    """Print per-stage ratios and return the number of regressions beyond threshold"""
+    regressions = 0
+    print(f"{'case':18} {'stage':22} {'baseline':>11} {'current':>11} {'ratio':>7}  memory")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            print(f"{name:18} (not in baseline)")
+            continue
+        # Runs with different engines only share the stages around extraction
+        for stage in result['stages']:
+            if stage not in base['stages']:
+                continue
+            old = base['stages'][stage]
+            new = result['stages'][stage]
+            ratio = new['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+            memory_ratio = new['peak_kb'] / old['peak_kb'] if old['peak_kb'] else 1.0
+
+            flag = ''
+            if ratio > 1 + threshold or memory_ratio > 1 + threshold:
+                flag = 'REGRESSION'
+                regressions += 1
+            elif ratio < 1 - threshold:
+                flag = 'faster'
+
+            print(f"{name:18} {stage:22} {old['seconds'] * 1000:9.3f}ms {new['seconds'] * 1000:9.3f}ms "
+                  f"{ratio:6.2f}x  {memory_ratio:5.2f}x {flag}")
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def load(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='benchmark the corpus and optionally save a baseline')
+    run_parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--engine', choices=ENGINE_NAMES, default=REGEX_ENGINE,
+                            help='topic and concept engine to benchmark')
+    run_parser.add_argument('--output', help='write results to this JSON file')
+    run_parser.add_argument('--compare', metavar='BASELINE', help='compare results against a baseline JSON file')
+    run_parser.add_argument('--threshold', type=float, default=0.15)
+
+    compare_parser = subparsers.add_parser('compare', help='diff two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.15)
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        sys.exit(1 if compare(load(args.baseline), load(args.current), args.threshold) else 0)
+
+    if args.engine == SPACY_ENGINE:
+        try:
+            get_engine().nlp
+        except EngineUnavailableError as e:
+            sys.exit(f"Cannot benchmark the spaCy engine: {e}")
+
+    results = run_benchmarks(args.cases, args.repeat, args.engine)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        print()
+        sys.exit(1 if compare(load(args.compare), results, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+# Gunicorn configuration for the AI service
+#   gunicorn -c gunicorn.conf.py app:app
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+
+# Threaded workers: a slow upload holds one thread, not the whole worker.
+# CPU-heavy pipelines can go to each worker's process pool (PIPELINE_PROCESSES)
+# and per-route-class limits (HEAVY_CONCURRENCY etc.) keep enough threads
+# free for light endpoints. Set GUNICORN_WORKER_CLASS=sync for the old mode.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('TIMEOUT_SECONDS', 60))
+
+# Import the app once in the master so workers fork with modules already
+# loaded. The app creates no threads or process pools at import time.
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Build and warm the pipeline services in each worker, before it accepts
+    # requests, so the first request after a deploy runs at steady-state speed
+    from app import batch_processor, pipeline_pool, registry
+    registry.warm_up()
+    if pipeline_pool is not None:
+        # Fork the pool processes now, while the worker has no request threads
+        batch_processor.start()
+    server.log.info(f"Worker {worker.pid} warmed up in {registry.status()['warmupSeconds']}s")
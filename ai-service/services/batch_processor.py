@@ -0,0 +1,235 @@
+import io
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from services.budget import WorkBudget, stage
+from services.extraction_backends import CORRUPT, EMPTY, ENCRYPTED, IMAGE_ONLY, TEXT_DOCUMENT, UNREADABLE, preflight_scan
+from services.metrics import metrics
+from services.registry import ServiceRegistry
+from services.result_cache import pipeline_variant
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.md')
+
+# Why a document cannot become a mind map, shared by the single-file routes and batches
+INSUFFICIENT_TEXT_ERROR = 'Could not extract sufficient text from PDF. Please ensure the PDF contains readable text.'
+NO_TOPICS_ERROR = 'Could not extract topics from PDF. Please ensure the PDF has a clear structure with headings.'
+PREFLIGHT_ERRORS = {
+    IMAGE_ONLY: 'PDF appears to contain only scanned images. Please upload a PDF with selectable text.',
+    EMPTY: 'PDF does not contain any text. Please upload a PDF with selectable text.',
+    ENCRYPTED: 'PDF is password protected. Please upload an unprotected copy.',
+    CORRUPT: 'File could not be read. Please upload a valid PDF, TXT or MD file.'
+}
+MIN_TEXT_CHARS = 50
+
+
+def document_error(entry: Dict, kind: str = TEXT_DOCUMENT) -> Optional[str]:
+    """
+    Why a pipeline result is not a usable mind map (too little text, no
+    topics), or None. kind is the document's pre-flight kind: when its
+    sampled pages had no text (IMAGE_ONLY, EMPTY), that explains too little
+    text better.
+    """
+    if len(entry['text'].strip()) < MIN_TEXT_CHARS:
+        return PREFLIGHT_ERRORS.get(kind, INSUFFICIENT_TEXT_ERROR)
+    if not entry['mindmap']['topics']:
+        return NO_TOPICS_ERROR
+    return None
+
+# Services for the current pool process, built and warmed on its first task
+# and reused. Built lazily so they read the environment as the app left it
+# (after .env is loaded), not as it was when this module was imported.
+# Pages are not split across a nested pool; the pool already fans out per file.
+_process_registry = None
+
+
+def _get_process_registry() -> ServiceRegistry:
+    global _process_registry
+    if _process_registry is None:
+        _process_registry = ServiceRegistry.from_env(pdf_workers=1)
+    return _process_registry
+
+
+def process_document(data: bytes, backend: Optional[str] = None, engine: Optional[str] = None,
+                     budget: Optional[WorkBudget] = None) -> Dict:
+    """
+    Run the PDFProcessor -> MindMapService pipeline for one document (runs in
+    a pool process). With a budget the entry also carries its report under
+    'budget'. The entry's 'metrics' are the pipeline events recorded on the
+    way, for the worker to pop and replay (see take_metrics).
+    """
+    with metrics.collect() as events:
+        registry = _get_process_registry()
+        extraction = registry.pdf_processor.extract(data, backend=backend, budget=budget)
+        text = extraction.pop('text')
+        lines = extraction.pop('lines')
+        boilerplate_lines = extraction.pop('boilerplate_lines', None)
+
+        mindmap_service = registry.mindmap_service
+        mindmap_data = mindmap_service.generate_mindmap(text, lines, engine=engine, boilerplate_lines=boilerplate_lines,
+                                                        budget=budget)
+        with stage('link_resources', budget):
+            resources = mindmap_service.link_resources(mindmap_data['topics'])
+
+    entry = {
+        'text': text,
+        'mindmap': mindmap_data,
+        'resources': resources,
+        'extraction': extraction,
+        'metrics': events
+    }
+    if budget is not None:
+        entry['budget'] = budget.report()
+    return entry
+
+
+def warm_up_process() -> None:
+    """Build and warm the pool process's services (see BatchProcessor.start)"""
+    _get_process_registry().warm_up()
+
+
+def take_metrics(entry: Dict) -> Dict:
+    """Replay the pipeline events of a pool result into this process's metrics; returns entry without them"""
+    metrics.replay(entry.pop('metrics', None))
+    return entry
+
+
+def read_zip_documents(stream, max_total_bytes: int) -> List[Tuple[str, bytes]]:
+    """Read supported syllabus files from a zip archive, refusing archives that expand too far"""
+    documents = []
+    total = 0
+    with zipfile.ZipFile(stream) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+            total += info.file_size
+            if total > max_total_bytes:
+                raise ValueError(f'Archive contents exceed {max_total_bytes // (1024 * 1024)} MB')
+            documents.append((name, archive.read(info)))
+    return documents
+
+
+class BatchProcessor:
+    """
+    Fans many syllabi out across a process pool and yields one result per
+    document as soon as it finishes. Results already in the result cache
+    are returned without touching the pool.
+    """
+
+    def __init__(self, max_workers: int = 4, cache=None):
+        self.max_workers = max_workers
+        self.cache = cache
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool (a process was killed, e.g. by the OOM killer) so the next call starts a new one"""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def start(self) -> None:
+        """
+        Start the pool processes now and warm their services, e.g. in
+        gunicorn's post_fork while the worker has no other threads yet,
+        instead of forking them from a request thread on first use.
+        """
+        # Each warm-up keeps its process busy, so every task starts another process
+        for future in [self.submit(warm_up_process) for _ in range(self.max_workers)]:
+            future.result()
+
+    def submit(self, fn, *args) -> Future:
+        """Run fn(*args) on the batch pool, which single-document pipelines share (see PipelinePool)"""
+        pool = self._get_pool()
+        try:
+            return pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            return self._get_pool().submit(fn, *args)
+
+    def iter_results(self, documents: List[Tuple[str, bytes]], backend: Optional[str] = None,
+                     engine: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Yield {'file', 'success', 'data' | 'error', 'seconds'} per document in
+        completion order. A failing document never aborts the rest of the batch.
+        Encrypted and broken files fail the pre-flight check without being
+        parsed, and results with too little text (e.g. scanned files) or no
+        topics fail like they do on the single-file routes.
+        """
+        pending = {}
+        for name, data in documents:
+            start = time.perf_counter()
+            cache_key = self.cache.make_key(data, variant=pipeline_variant(backend, engine)) if self.cache else None
+            cached = self.cache.get(cache_key) if self.cache else None
+
+            if cached is not None:
+                yield self._result(name, cached, start, cached=True)
+                continue
+
+            kind = preflight_scan(io.BytesIO(data))['kind']
+            metrics.document_preflighted(kind)
+            if kind in UNREADABLE:
+                yield self._failure(name, PREFLIGHT_ERRORS[kind], start)
+                continue
+
+            try:
+                future = self.submit(process_document, data, backend, engine)
+            except Exception as e:
+                yield self._failure(name, e, start)
+                continue
+            pending[future] = (name, kind, cache_key, start)
+
+        try:
+            for future in as_completed(pending):
+                name, kind, cache_key, start = pending[future]
+                try:
+                    entry = take_metrics(future.result())
+                except Exception as e:
+                    yield self._failure(name, e, start)
+                    continue
+
+                if self.cache:
+                    self.cache.set(cache_key, entry)
+                yield self._result(name, entry, start, cached=False, kind=kind)
+        finally:
+            # Client went away mid-stream - drop work that has not started yet
+            for future in pending:
+                future.cancel()
+
+    @classmethod
+    def _result(cls, name: str, entry: Dict, start: float, cached: bool, kind: str = TEXT_DOCUMENT) -> Dict:
+        error = document_error(entry, kind)
+        if error:
+            return cls._failure(name, error, start)
+        return {
+            'file': name,
+            'success': True,
+            'cached': cached,
+            'seconds': round(time.perf_counter() - start, 4),
+            'data': {
+                'mindmap': entry['mindmap'],
+                'resources': entry['resources'],
+                'extraction': entry.get('extraction')
+            }
+        }
+
+    @staticmethod
+    def _failure(name: str, error, start: float) -> Dict:
+        """Failed result for an exception or an error message"""
+        return {
+            'file': name,
+            'success': False,
+            'seconds': round(time.perf_counter() - start, 4),
+            'error': str(error)
+        }
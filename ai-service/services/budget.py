@@ -0,0 +1,127 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from services.metrics import metrics
+
+
+class WorkBudget:
+    """
+    Deadline and work allowance for one request, passed to
+    PDFProcessor.extract and MindMapService.generate_mindmap.
+
+    Extraction stops at the deadline, or at max_pages / max_chars, the same
+    way it stops at the processor's own limits (truncated). Mind map stages
+    check the clock before they start: optional work (the topic ranker, the
+    fallback topic patterns, the spaCy engine) is skipped once less than
+    reserve of the time is left, and the regex stages read at most
+    max_regex_chars characters (degraded). Every stage's time and every cut
+    are recorded for the response.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, max_pages: Optional[int] = None,
+                 max_chars: Optional[int] = None, max_regex_chars: Optional[int] = None,
+                 reserve: float = 0.25):
+        self.seconds = seconds
+        # CLOCK_MONOTONIC is system-wide, so the deadline holds in pool processes too
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.max_regex_chars = max_regex_chars
+        self.reserve = reserve
+        self.truncated = False
+        self.cuts: List[Dict] = []
+        self.stage_seconds: Dict[str, float] = {}
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.cuts)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None without one)"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def cut(self, stage: str, reason: str) -> None:
+        cut = {'stage': stage, 'reason': reason}
+        if cut not in self.cuts:
+            self.cuts.append(cut)
+
+    def truncate(self, reason: str) -> None:
+        """Record that extraction stopped early for reason"""
+        self.truncated = True
+        self.cut('extract_pages', reason)
+
+    def allows(self, stage: str) -> bool:
+        """Whether optional stage may still run; records the cut when it may not"""
+        remaining = self.remaining()
+        if remaining is not None and remaining < self.seconds * self.reserve:
+            self.cut(stage, 'deadline')
+            return False
+        return True
+
+    def stops_extraction(self, pages: int, characters: int) -> bool:
+        """
+        True (and truncated) once another page would exceed the page or
+        character allowance. The deadline is enforced by the extraction
+        backends, which keep every page already parsed and always read the
+        first one, so a late start still has something to show.
+        """
+        if self.max_pages and pages >= self.max_pages:
+            reason = 'pages'
+        elif self.max_chars and characters - 1 >= self.max_chars:
+            reason = 'characters'
+        else:
+            return False
+        self.truncate(reason)
+        return True
+
+    def limit_text(self, stage: str, text: str) -> str:
+        """text cut to the regex allowance"""
+        if self.max_regex_chars and len(text) > self.max_regex_chars:
+            self.cut(stage, 'regex_chars')
+            return text[:self.max_regex_chars]
+        return text
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage into the report (and the stage metrics)"""
+        start = time.perf_counter()
+        try:
+            with metrics.stage(name):
+                yield
+        finally:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self) -> Dict:
+        return {
+            'deadlineSeconds': self.seconds,
+            'truncated': self.truncated,
+            'degraded': self.degraded,
+            'cuts': self.cuts,
+            'stageSeconds': {name: round(seconds, 4) for name, seconds in self.stage_seconds.items()}
+        }
+
+    @classmethod
+    def from_env(cls, seconds: Optional[float] = None, max_pages: Optional[int] = None,
+                 max_chars: Optional[int] = None) -> Optional['WorkBudget']:
+        """
+        Budget for one request: explicit values, else MINDMAP_DEADLINE_SECONDS
+        and MINDMAP_MAX_REGEX_CHARS. None when nothing limits the request.
+        """
+        seconds = seconds or float(os.getenv('MINDMAP_DEADLINE_SECONDS', 0)) or None
+        max_regex_chars = int(os.getenv('MINDMAP_MAX_REGEX_CHARS', 0)) or None
+        if not (seconds or max_pages or max_chars or max_regex_chars):
+            return None
+        return cls(seconds, max_pages=max_pages, max_chars=max_chars, max_regex_chars=max_regex_chars)
+
+
+def stage(name: str, budget: Optional[WorkBudget] = None):
+    """Context manager timing a stage, into the budget's report when there is one"""
+    return budget.stage(name) if budget is not None else metrics.stage(name)
@@ -0,0 +1,182 @@
+import re
+from array import array
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+# Anchor words are matched with the same case-insensitive semantics the
+# original definition regexes used
+_TOKEN = re.compile(r'\S+')
+_WORD = re.compile(r'\w+')
+_IS = re.compile(r'is', re.IGNORECASE)
+_ARTICLE = re.compile(r'a|an|the', re.IGNORECASE)
+_REFERS = re.compile(r'refers', re.IGNORECASE)
+_TO = re.compile(r'to', re.IGNORECASE)
+_MEANS = re.compile(r'means', re.IGNORECASE)
+_LETTER = re.compile(r'[A-Z]', re.IGNORECASE)
+
+MAX_NAME_WORDS = 4
+MIN_DESCRIPTION = 10
+MAX_DESCRIPTION = 150
+
+# Definition forms, in the order their matches are reported
+IS_A = 'is_a'
+REFERS_TO = 'refers_to'
+MEANS = 'means'
+COLON = 'colon'
+DEFINITION_FORMS = (IS_A, REFERS_TO, MEANS, COLON)
+
+
+class ConceptExtractor:
+    """
+    Linear-time finder for "X is a ...", "X refers to ...", "X means ..."
+    and "X: ..." definitions.
+
+    The text is tokenized on whitespace once (token bounds are kept in one
+    packed integer array, not a tuple per token) and every anchor is found
+    in that single scan. Each anchor then looks back at most MAX_NAME_WORDS
+    tokens for the concept name and forward at most MAX_DESCRIPTION
+    characters for its description. Matches are chosen with the same
+    leftmost, non-overlapping, longest-name-first rules as the four
+    regexes this replaces, so results are identical, but no position is
+    ever rescanned.
+    """
+
+    def find_definitions(self, text: str) -> Dict[str, List[Tuple[str, str]]]:
+        """Return (name, description) pairs per definition form, in text order"""
+        # Token j spans bounds[2j]:bounds[2j + 1]
+        bounds = array('q', chain.from_iterable(match.span() for match in _TOKEN.finditer(text)))
+        pairs = iter(bounds)
+        count = len(bounds) // 2
+        anchors = {form: {} for form in DEFINITION_FORMS}
+
+        # Single scan: index each anchor by the token holding the last name word
+        for j, (start, end) in enumerate(zip(pairs, pairs)):
+            length = end - start
+            if length == 2 and _IS.fullmatch(text, start, end):
+                if j > 0 and j + 1 < count and _ARTICLE.fullmatch(text, bounds[2 * j + 2], bounds[2 * j + 3]):
+                    description = self._description(text, bounds[2 * j + 3])
+                    if description:
+                        anchors[IS_A][j - 1] = description
+            elif length == 6 and _REFERS.fullmatch(text, start, end):
+                if (j > 0 and j + 1 < count and bounds[2 * j + 2] == end + 1
+                        and text[end] == ' ' and _TO.fullmatch(text, bounds[2 * j + 2], bounds[2 * j + 3])):
+                    description = self._description(text, bounds[2 * j + 3])
+                    if description:
+                        anchors[REFERS_TO][j - 1] = description
+            elif length == 5 and _MEANS.fullmatch(text, start, end):
+                if j > 0:
+                    description = self._description(text, end)
+                    if description:
+                        anchors[MEANS][j - 1] = description
+
+            if length >= 2 and text[end - 1] == ':' and _WORD.fullmatch(text, end - 2, end - 1):
+                description = self._colon_description(text, end)
+                if description:
+                    anchors[COLON][j] = description
+
+        return {
+            form: self._select_matches(text, bounds, anchors[form], form == COLON)
+            for form in DEFINITION_FORMS
+        }
+
+    def _description(self, text: str, position: int) -> Optional[Tuple[int, int]]:
+        """
+        Span of the description after an anchor ending at position, following
+        the regex tail \\s+([^.]{10,150}): all the whitespace is consumed
+        greedily, and only given back to the description if it is too short.
+        """
+        desc_start = self._skip_space(text, position)
+        spaces = desc_start - position
+        if spaces == 0:
+            return None
+
+        run = self._non_period_run(text, desc_start)
+        if run >= MIN_DESCRIPTION:
+            return desc_start, desc_start + run
+
+        borrow = MIN_DESCRIPTION - run
+        if spaces - 1 < borrow:
+            return None
+        return desc_start - borrow, desc_start + run
+
+    def _colon_description(self, text: str, position: int) -> Optional[Tuple[int, int]]:
+        """Span of the description after 'Name:' - \\s+([A-Z][^.]{10,150})"""
+        desc_start = self._skip_space(text, position)
+        if desc_start == position or desc_start >= len(text) or not _LETTER.match(text, desc_start):
+            return None
+
+        run = self._non_period_run(text, desc_start + 1)
+        if run < MIN_DESCRIPTION:
+            return None
+        return desc_start, desc_start + 1 + run
+
+    @staticmethod
+    def _skip_space(text: str, position: int) -> int:
+        end = len(text)
+        while position < end and text[position].isspace():
+            position += 1
+        return position
+
+    @staticmethod
+    def _non_period_run(text: str, position: int) -> int:
+        """Length of the run of non-period characters at position, capped at MAX_DESCRIPTION"""
+        limit = min(len(text), position + MAX_DESCRIPTION)
+        period = text.find('.', position, limit)
+        return (limit if period == -1 else period) - position
+
+    def _select_matches(self, text, bounds, anchors, colon) -> List[Tuple[str, str]]:
+        """
+        Choose non-overlapping matches left to right. Candidate name starts
+        are only the MAX_NAME_WORDS tokens before each anchor; for each start
+        the longest valid name wins, as with the greedy {0,3} repetition.
+        """
+        matches = []
+        cursor = 0
+        next_start = 0
+        words = {}
+
+        def is_word(i, strip_colon=False):
+            key = (i, strip_colon)
+            if key not in words:
+                start, end = bounds[2 * i], bounds[2 * i + 1]
+                words[key] = _WORD.fullmatch(text, start, end - 1 if strip_colon else end) is not None
+            return words[key]
+
+        for last in anchors:
+            for i in range(max(next_start, last - MAX_NAME_WORDS + 1, 0), last + 1):
+                next_start = i + 1
+                if bounds[2 * i + 1] <= cursor:
+                    continue
+
+                for count in range(MAX_NAME_WORDS, 0, -1):
+                    name_last = i + count - 1
+                    description = anchors.get(name_last)
+                    if description is None:
+                        continue
+
+                    # Every word after the first must be a whole \w+ token
+                    if not all(is_word(k, colon and k == name_last) for k in range(i + 1, name_last + 1)):
+                        continue
+
+                    word_end = bounds[2 * i + 1] - 1 if colon and count == 1 else bounds[2 * i + 1]
+                    name_start = self._word_run_start(text, bounds[2 * i], word_end)
+                    if name_start is None or word_end <= cursor:
+                        continue
+                    name_start = max(name_start, cursor)
+
+                    name_end = bounds[2 * name_last + 1] - 1 if colon else bounds[2 * name_last + 1]
+                    matches.append((text[name_start:name_end], text[description[0]:description[1]]))
+                    cursor = description[1]
+                    break
+
+        return matches
+
+    @staticmethod
+    def _word_run_start(text: str, start: int, end: int) -> Optional[int]:
+        """Start of the run of word characters ending at end (None if empty)"""
+        if _WORD.fullmatch(text, start, end):
+            return start
+        position = end
+        while position > start and _WORD.match(text, position - 1, position):
+            position -= 1
+        return position if position < end else None
@@ -0,0 +1,461 @@
+import PyPDF2
+import codecs
+import hashlib
+import io
+import logging
+import math
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+logger = logging.getLogger(__name__)
+
+# Process pool shared by every PyPDF2Backend in this worker, created on first use
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+def _get_page_pool(max_workers):
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = ProcessPoolExecutor(max_workers=max_workers)
+        return _page_pool
+
+def _submit_page_range(max_workers, pdf_bytes, start, end):
+    global _page_pool
+    pool = _get_page_pool(max_workers)
+    try:
+        return pool.submit(_extract_page_range, pdf_bytes, start, end)
+    except BrokenProcessPool:
+        # A pool process died (e.g. OOM-killed); start a new pool for this and later documents
+        with _page_pool_lock:
+            if _page_pool is pool:
+                _page_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        return _get_page_pool(max_workers).submit(_extract_page_range, pdf_bytes, start, end)
+
+def _extract_page_range(pdf_bytes, start, end):
+    """Extract raw text for pages [start, end) - runs inside a pool process"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return [pdf_reader.pages[i].extract_text() or '' for i in range(start, end)]
+
+
+def _time_left(budget) -> Optional[float]:
+    """Seconds to wait for parsed pages under a request budget (None: no deadline)"""
+    remaining = budget.remaining() if budget is not None else None
+    return max(0.0, remaining) if remaining is not None else None
+
+
+def _past_deadline(budget) -> bool:
+    """True (and the budget records the truncation) once the budget's deadline has passed"""
+    if budget is not None and budget.expired():
+        budget.truncate('deadline')
+        return True
+    return False
+
+
+class ExtractionBackend:
+    """Base class for text extraction backends used by PDFProcessor"""
+    name = 'base'
+
+    def iter_pages(self, file, parallel: Optional[bool] = None, budget=None) -> Iterator[str]:
+        """
+        Yield raw text for every page of the open binary stream, in page
+        order. With a request budget (see WorkBudget), pages stop at its
+        deadline (after the first page) and the budget records the truncation.
+        """
+        raise NotImplementedError
+
+    def extract_pages(self, file, indices: List[int], budget=None) -> Dict[int, str]:
+        """
+        Raw text for the given page indices only (the default walks every
+        page). At budget's deadline only the pages parsed so far are returned.
+        """
+        wanted = set(indices)
+        return {i: page_text for i, page_text in enumerate(self.iter_pages(file, parallel=False, budget=budget)) if i in wanted}
+
+
+class PyPDF2Backend(ExtractionBackend):
+    """Fast default backend, with optional process-pool extraction for long documents"""
+    name = 'pypdf2'
+
+    def __init__(self, max_workers: int = 1, parallel_min_pages: int = 32, window_pages: Optional[int] = None):
+        # Documents with at least parallel_min_pages pages are split across
+        # a process pool; smaller ones are not worth the IPC overhead
+        self.max_workers = max_workers
+        self.parallel_min_pages = parallel_min_pages
+        # Bounded-memory mode: parse serially and drop the reader's object
+        # cache every window_pages pages, so memory follows a sliding window
+        # of pages instead of growing with the document
+        self.window_pages = window_pages
+
+    def iter_pages(self, file, parallel=None, budget=None):
+        pdf_reader = PyPDF2.PdfReader(file)
+        page_count = len(pdf_reader.pages)
+
+        logger.debug("Processing PDF with %d pages", page_count)
+
+        if self.window_pages:
+            # The pool path needs the whole file in memory for every task
+            parallel = False
+        elif parallel is None:
+            parallel = self.max_workers > 1 and page_count >= self.parallel_min_pages
+
+        if not parallel or page_count < 2:
+            for i, page in enumerate(pdf_reader.pages):
+                if i and _past_deadline(budget):
+                    return
+                yield page.extract_text()
+                if self.window_pages and (i + 1) % self.window_pages == 0:
+                    pdf_reader.resolved_objects.clear()
+            return
+
+        file.seek(0)
+        pdf_bytes = file.read()
+
+        # Split pages into contiguous ranges (a few per worker so early pages
+        # come back quickly) and yield the results back in page order
+        chunk_size = max(1, math.ceil(page_count / (self.max_workers * 2)))
+        futures = [
+            _submit_page_range(self.max_workers, pdf_bytes, start, min(start + chunk_size, page_count))
+            for start in range(0, page_count, chunk_size)
+        ]
+        try:
+            for i, future in enumerate(futures):
+                try:
+                    pages = future.result(timeout=_time_left(budget))
+                except FutureTimeoutError:
+                    # Deadline: pages already yielded are kept, and there is always a first one
+                    if i == 0:
+                        yield pdf_reader.pages[0].extract_text()
+                    budget.truncate('deadline')
+                    return
+                for page_text in pages:
+                    yield page_text
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def extract_pages(self, file, indices, budget=None):
+        pdf_reader = PyPDF2.PdfReader(file)
+        result = {}
+        for i in indices:
+            if result and _past_deadline(budget):
+                break
+            result[i] = pdf_reader.pages[i].extract_text()
+        return result
+
+
+class PdfPlumberBackend(ExtractionBackend):
+    """Slower layout-aware backend for multi-column and table-heavy syllabi"""
+    name = 'pdfplumber'
+
+    def iter_pages(self, file, parallel=None, budget=None):
+        import pdfplumber
+
+        with pdfplumber.open(file) as pdf:
+            logger.debug("Processing PDF with %d pages", len(pdf.pages))
+            for i, page in enumerate(pdf.pages):
+                if i and _past_deadline(budget):
+                    return
+                yield page.extract_text()
+                # Release per-page layout objects as we go
+                page.flush_cache()
+
+    def extract_pages(self, file, indices, budget=None):
+        import pdfplumber
+
+        result = {}
+        with pdfplumber.open(file) as pdf:
+            for i in indices:
+                if result and _past_deadline(budget):
+                    break
+                page = pdf.pages[i]
+                result[i] = page.extract_text()
+                page.flush_cache()
+        return result
+
+
+# UTF-32 first: its little-endian BOM starts with the UTF-16 one
+_TEXT_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def _text_encoding(header: bytes) -> Optional[str]:
+    """UTF-16/32 codec named by a byte order mark at the start of header, else None"""
+    return next((encoding for bom, encoding in _TEXT_BOMS if header.startswith(bom)), None)
+
+
+def _decode_text(data) -> str:
+    """Plain-text upload as str: UTF-16/32 when it starts with a BOM, else UTF-8"""
+    if not isinstance(data, bytes):
+        return data
+    return data.decode(_text_encoding(data) or 'utf-8', errors='replace')
+
+
+class TextBackend(ExtractionBackend):
+    """Passthrough for plain-text and markdown syllabi"""
+    name = 'text'
+
+    def iter_pages(self, file, parallel=None, budget=None):
+        data = file.read()
+        text = _decode_text(data)
+        # Treat form feeds as page breaks
+        for page_text in text.split('\f'):
+            yield page_text
+
+
+BACKEND_NAMES = (PyPDF2Backend.name, PdfPlumberBackend.name, TextBackend.name)
+
+
+def _object_digest(obj, memo: Dict) -> bytes:
+    """
+    Digest of a PDF object with every indirect reference resolved, so a
+    page's resource tree (fonts and their ToUnicode maps, form XObjects
+    and their own resources) is covered. Image data never reaches the
+    text, so only image dictionaries are hashed. memo holds the digests of
+    indirect objects already seen in the document, which also ends cycles.
+    """
+    if isinstance(obj, IndirectObject):
+        key = (obj.idnum, obj.generation)
+        if key not in memo:
+            # Stands in for the object while it is being hashed (cycles)
+            memo[key] = f"ref {obj.idnum} {obj.generation}".encode()
+            memo[key] = _object_digest(obj.get_object(), memo)
+        return memo[key]
+
+    hasher = hashlib.sha256()
+    if isinstance(obj, DictionaryObject):
+        for name, value in sorted(obj.items()):
+            if name == '/Parent':
+                continue
+            hasher.update(name.encode('utf-8', 'replace'))
+            hasher.update(_object_digest(value, memo))
+        if isinstance(obj, StreamObject) and obj.get('/Subtype') != '/Image':
+            try:
+                hasher.update(obj.get_data())
+            except Exception:
+                # Unsupported filter: the encoded bytes identify the stream just as well
+                hasher.update(obj._data or b'')
+    elif isinstance(obj, ArrayObject):
+        for item in obj:
+            hasher.update(_object_digest(item, memo))
+    else:
+        hasher.update(type(obj).__name__.encode())
+        hasher.update(repr(obj).encode('utf-8', 'replace'))
+    return hasher.digest()
+
+
+def page_fingerprints(file) -> List[str]:
+    """
+    Digest of each page's raw content, in page order. For PDFs this hashes
+    the decoded content stream and the whole resource tree it draws from
+    (fonts, form XObjects and their resources), which is far cheaper than
+    text extraction, so unchanged pages can be recognised before parsing them.
+    """
+    file.seek(0)
+    header = file.read(1024)
+    file.seek(0)
+
+    try:
+        if b'%PDF-' not in header:
+            data = file.read()
+            text = _decode_text(data)
+            return [hashlib.sha256(page_text.encode('utf-8')).hexdigest() for page_text in text.split('\f')]
+
+        fingerprints = []
+        # Resources shared between pages (fonts, forms) are hashed once per document
+        memo = {}
+        for page in PyPDF2.PdfReader(file).pages:
+            hasher = hashlib.sha256()
+            contents = page.get_contents()
+            if contents is not None:
+                hasher.update(contents.get_data())
+            hasher.update(_object_digest(page.raw_get('/Resources') if '/Resources' in page else None, memo))
+            fingerprints.append(hasher.hexdigest())
+        return fingerprints
+    finally:
+        file.seek(0)
+
+
+def probe_backend(file, probe_pages: int = 2) -> str:
+    """
+    Pick a backend name from a quick look at the document.
+
+    Non-PDF content goes to the text backend. For PDFs, the text start
+    positions on the first few pages are sampled: when a large share of
+    text runs start right of the page middle the layout is treated as
+    multi-column and sent to pdfplumber, otherwise to PyPDF2.
+    """
+    file.seek(0)
+    header = file.read(1024)
+    file.seek(0)
+
+    if b'%PDF-' not in header:
+        return TextBackend.name
+
+    try:
+        pdf_reader = PyPDF2.PdfReader(file)
+        positions = []
+        widths = []
+
+        def visitor(text, cm, tm, font_dict, font_size):
+            if text and text.strip():
+                positions.append(tm[4] * cm[0] + cm[4])
+
+        for page in pdf_reader.pages[:probe_pages]:
+            widths.append(float(page.mediabox.width))
+            page.extract_text(visitor_text=visitor)
+    except Exception:
+        return PyPDF2Backend.name
+    finally:
+        file.seek(0)
+
+    if len(positions) < 10 or not widths:
+        return PyPDF2Backend.name
+
+    middle = max(widths) * 0.45
+    right_share = sum(1 for x in positions if x > middle) / len(positions)
+    return PdfPlumberBackend.name if right_share > 0.25 else PyPDF2Backend.name
+
+
+# Document kinds reported by preflight_scan. IMAGE_ONLY and EMPTY describe
+# only the sampled pages (a scanned cover page, say), so such documents are
+# still extracted; UNREADABLE ones cannot be
+TEXT_DOCUMENT = 'text'
+IMAGE_ONLY = 'image-only'
+EMPTY = 'empty'
+ENCRYPTED = 'encrypted'
+CORRUPT = 'corrupt'
+UNREADABLE = (ENCRYPTED, CORRUPT)
+
+# Content stream operators that show text (Tj, TJ, ' and ") or start an inline image
+_TEXT_OPERATOR = re.compile(rb"\bT[jJ]\b|[)>\]]\s*['\"]")
+_INLINE_IMAGE = re.compile(rb"\bBI\s")
+
+
+def _content_data(contents) -> bytes:
+    """Decoded bytes of a page's /Contents (one stream or an array of them)"""
+    if contents is None:
+        return b''
+    contents = contents.get_object()
+    if isinstance(contents, ArrayObject):
+        return b'\n'.join(_content_data(part) for part in contents)
+    return contents.get_data()
+
+
+def _first_pages(pages_node, count: int, max_nodes: int = 1000):
+    """
+    Yield (page dictionary, inherited /Resources) for the first count pages,
+    walking only as much of the page tree as needed (PdfReader.pages loads
+    every page object)
+    """
+    stack = [(pages_node, None)]
+    visited = 0
+    while stack and count:
+        visited += 1
+        if visited > max_nodes:
+            raise ValueError('Page tree is too deep or cyclic')
+        node, resources = stack.pop()
+        node = node.get_object()
+        resources = node.get('/Resources', resources)
+        kids = node.get('/Kids')
+        if kids is None:
+            yield node, resources
+            count -= 1
+        else:
+            stack.extend((kid, resources) for kid in reversed(kids.get_object()))
+
+
+def preflight_scan(file, sample_pages: int = 3) -> Dict:
+    """
+    Classify a document from its trailer, page count and the content streams
+    of its first sample_pages pages, without extracting any text.
+
+    Returns format ('pdf' or 'text'), kind (TEXT_DOCUMENT, IMAGE_ONLY, EMPTY,
+    ENCRYPTED or CORRUPT), reason (why it is not a text document, else None),
+    pages, sampled_pages, text_pages and image_pages (sampled pages that
+    draw text / images), and content_bytes (decoded size of the sampled
+    content streams, or of the whole plain-text document).
+    """
+    file.seek(0)
+    header = file.read(1024)
+    file.seek(0)
+
+    report = {
+        'format': 'pdf',
+        'kind': TEXT_DOCUMENT,
+        'reason': None,
+        'pages': 0,
+        'sampled_pages': 0,
+        'text_pages': 0,
+        'image_pages': 0,
+        'content_bytes': 0
+    }
+    try:
+        if b'%PDF-' not in header:
+            report['format'] = 'text'
+            # NUL bytes mean binary data, unless the text is UTF-16/32
+            if b'\x00' in header and _text_encoding(header) is None:
+                report.update(kind=CORRUPT, reason='Not a PDF or text document')
+                return report
+            data = file.read()
+            # A form feed byte is only unambiguous in UTF-8
+            form_feeds = _decode_text(data).count('\f') if _text_encoding(header) else data.count(b'\f')
+            report.update(pages=form_feeds + 1, sampled_pages=1, text_pages=1, content_bytes=len(data))
+            return report
+
+        try:
+            reader = PyPDF2.PdfReader(file, strict=False)
+            if reader.is_encrypted:
+                # Owner-password-only files open with an empty user password
+                try:
+                    decrypted = reader.decrypt('')
+                except Exception:
+                    decrypted = False
+                if not decrypted:
+                    report.update(kind=ENCRYPTED, reason='Document is password protected')
+                    return report
+
+            pages_node = reader.trailer['/Root'].get_object()['/Pages'].get_object()
+            report['pages'] = int(pages_node.get('/Count', 0))
+            if report['pages'] <= 0:
+                report.update(kind=CORRUPT, reason='Document has no pages')
+                return report
+
+            for page, resources in _first_pages(pages_node, sample_pages):
+                data = _content_data(page.get('/Contents'))
+                report['sampled_pages'] += 1
+                report['content_bytes'] += len(data)
+                has_text = bool(_TEXT_OPERATOR.search(data))
+                has_image = bool(_INLINE_IMAGE.search(data))
+                xobjects = resources.get_object().get('/XObject') if resources is not None else None
+                for xobject in (xobjects.get_object().values() if xobjects is not None else ()):
+                    xobject = xobject.get_object()
+                    subtype = xobject.get('/Subtype')
+                    if subtype == '/Image':
+                        has_image = True
+                    elif subtype == '/Form' and not has_text:
+                        # Text drawn through a form XObject still extracts
+                        has_text = bool(_TEXT_OPERATOR.search(xobject.get_data()))
+                report['text_pages'] += has_text
+                report['image_pages'] += has_image
+        except Exception as e:
+            report.update(kind=CORRUPT, reason=f'Could not read the PDF: {e}')
+            return report
+
+        if not report['text_pages']:
+            if report['image_pages']:
+                report.update(kind=IMAGE_ONLY, reason=f"No text layer on the first {report['sampled_pages']} pages (scanned images?)")
+            else:
+                report.update(kind=EMPTY, reason=f"No text on the first {report['sampled_pages']} pages")
+        return report
+    finally:
+        file.seek(0)
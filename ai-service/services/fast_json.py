@@ -0,0 +1,69 @@
+"""
+JSON encoding for responses and NDJSON/SSE streams.
+
+Uses orjson when it is installed (several times faster than the json
+module on the large mind map, batch and topic graph payloads) and the json
+module otherwise. Both produce the same compact documents (keys, values
+and key order); orjson writes non-ASCII text as UTF-8 instead of escapes.
+"""
+import json
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+if orjson is not None:
+    # Dates and dataclasses go through Flask's encoder, as with jsonify
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    _SORTED_OPTIONS = _OPTIONS | orjson.OPT_SORT_KEYS
+
+
+def _default(value: Any) -> Any:
+    return DefaultJSONProvider.default(value)
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """obj as compact UTF-8 JSON"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default, option=_SORTED_OPTIONS if sort_keys else _OPTIONS)
+        except TypeError:
+            # Non-string keys, integers beyond 64 bits and the like
+            pass
+    return json.dumps(obj, default=_default, sort_keys=sort_keys, separators=(',', ':')).encode('utf-8')
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    return dumps_bytes(obj, sort_keys).decode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider (app.json) backed by dumps_bytes, so jsonify and
+    request.get_json use orjson when it is available. Keys stay sorted as
+    with the default provider; debug mode still pretty-prints.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=self.sort_keys)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                # NaN/Infinity and other input the json module accepts
+                pass
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj, self.sort_keys) + b'\n', mimetype=self.mimetype)
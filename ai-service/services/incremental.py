@@ -0,0 +1,151 @@
+import hashlib
+import time
+from typing import Dict, List, Optional
+
+from services.concept_extractor import DEFINITION_FORMS
+from services.mindmap_nodes import Topic, concepts_to_dicts, topics_to_dicts
+
+
+def section_fingerprint(name: Optional[str], lines: List[str]) -> str:
+    hasher = hashlib.sha256((name or '').encode('utf-8') + b'\0')
+    hasher.update('\n'.join(lines).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def diff_topics(previous: List[Dict], current: List[Dict]) -> Dict:
+    """Added, removed and changed topics (matched by name) between two mind map versions"""
+    old = {topic['name']: topic for topic in previous}
+    new = {topic['name']: topic for topic in current}
+
+    changed = []
+    unchanged = 0
+    for name, topic in new.items():
+        before = old.get(name)
+        if before is None:
+            continue
+        if before == topic:
+            unchanged += 1
+            continue
+        old_subtopics = set(before.get('subtopics', []))
+        new_subtopics = set(topic.get('subtopics', []))
+        changed.append({
+            'name': name,
+            'subtopicsAdded': [s for s in topic.get('subtopics', []) if s not in old_subtopics],
+            'subtopicsRemoved': [s for s in before.get('subtopics', []) if s not in new_subtopics],
+            'topic': topic
+        })
+
+    return {
+        'added': [topic for name, topic in new.items() if name not in old],
+        'removed': [name for name in old if name not in new],
+        'changed': changed,
+        'unchanged': unchanged
+    }
+
+
+class IncrementalGenerator:
+    """
+    Regenerates the mind map for a revised upload of a known document.
+
+    The previous revision of each document (page fingerprints and raw page
+    text, per-section topics and definitions, and the final topics) is kept
+    in a ResultCache under the document id. On re-upload only pages whose
+    content stream changed are parsed, only sections (heading plus the
+    lines under it) whose text changed are re-derived, and the response
+    carries a topic diff against the previous revision.
+
+    Key concepts are found per section, so a definition no longer runs on
+    across a unit heading; otherwise the output matches generate_mindmap.
+    """
+
+    def __init__(self, pdf_processor, mindmap_service, store):
+        self.pdf_processor = pdf_processor
+        self.mindmap_service = mindmap_service
+        self.store = store
+
+    def revision_key(self, document_id: str, backend: Optional[str] = None) -> str:
+        return self.store.make_key(f"{document_id}\0{backend or 'auto'}".encode('utf-8'), variant='revision')
+
+    def regenerate(self, source, document_id: str, backend: Optional[str] = None) -> Dict:
+        """Return {'mindmap', 'resources', 'extraction', 'diff', 'reuse'} for the new revision"""
+        key = self.revision_key(document_id, backend)
+        previous = self.store.get(key) or {}
+        previous_pages = previous.get('pages', {}) if previous.get('backend_requested') == backend else {}
+
+        extraction = self.pdf_processor.extract_incremental(source, previous_pages, backend=backend)
+        lines = extraction.pop('lines')
+        text = extraction.pop('text')
+        page_texts = extraction.pop('page_texts')
+        pages_reused = extraction.pop('pages_reused')
+        extraction.pop('page_fingerprints')
+
+        start = time.perf_counter()
+        service = self.mindmap_service
+        lines = service.preprocess_lines(text, lines)
+        text = '\n'.join(lines)
+
+        previous_sections = previous.get('sections', {})
+        sections = {}
+        reused_sections = 0
+        derived_sections = 0
+        topics = []
+        definitions = {form: [] for form in DEFINITION_FORMS}
+
+        for name, section_lines in service.split_sections(lines):
+            fingerprint = section_fingerprint(name, section_lines)
+            section = sections.get(fingerprint) or previous_sections.get(fingerprint)
+            if section is not None:
+                reused_sections += 1
+            else:
+                derived_sections += 1
+                found = service.concept_extractor.find_definitions(' '.join(section_lines))
+                topic = service.build_topic(name, section_lines[1:], service.subtopic_limit) if name else None
+                # Sections are stored (and may be written to disk) as plain JSON
+                section = {
+                    'topic': topic.to_dict() if topic else None,
+                    'definitions': {form: [list(pair) for pair in found[form]] for form in DEFINITION_FORMS}
+                }
+            sections[fingerprint] = section
+
+            if section['topic'] and len(topics) < service.topic_limit:
+                topics.append(Topic.from_dict(section['topic']))
+            for form in DEFINITION_FORMS:
+                definitions[form].extend(section['definitions'][form])
+
+        if not topics:
+            topics = service.intelligent_topic_extraction(text)
+        topics, key_concepts = service.rank_content(
+            text,
+            service.filter_important_topics(topics[:service.topic_limit]),
+            service.select_key_concepts(definitions, service.concept_limit)
+        )
+
+        topics = topics_to_dicts(topics)
+        mindmap_data = {
+            'course_info': service.extract_course_info(text),
+            'topics': topics,
+            'key_concepts': concepts_to_dicts(key_concepts)
+        }
+        resources = service.link_resources(topics)
+
+        self.store.set(key, {
+            'backend_requested': backend,
+            'pages': page_texts,
+            'sections': sections,
+            'topics': topics
+        })
+
+        return {
+            'mindmap': mindmap_data,
+            'resources': resources,
+            'extraction': extraction,
+            'diff': diff_topics(previous.get('topics', []), topics) if previous else None,
+            'reuse': {
+                'previousRevision': bool(previous),
+                'pagesReused': pages_reused,
+                'pagesExtracted': extraction['pages'] - pages_reused,
+                'sectionsReused': reused_sections,
+                'sectionsDerived': derived_sections,
+                'mindmapSeconds': round(time.perf_counter() - start, 4)
+            }
+        }
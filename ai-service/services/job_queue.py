@@ -0,0 +1,286 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from services.batch_processor import document_error, process_document, take_metrics
+from services.result_cache import pipeline_variant
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity; callers should retry later"""
+    pass
+
+
+def run_job(data: bytes, backend: Optional[str] = None, engine: Optional[str] = None,
+            job_id: Optional[str] = None, store=None) -> Dict:
+    """
+    Run the pipeline for a job and record when it actually started (runs in
+    a pool process). A store shared between processes is told the job is
+    running as soon as it starts.
+    """
+    started_at = time.time()
+    if store is not None:
+        store.mark_running(job_id, started_at)
+    entry = process_document(data, backend, engine)
+    return {
+        'entry': entry,
+        'started_at': started_at,
+        'run_seconds': round(time.time() - started_at, 4)
+    }
+
+
+def _mark_running(job: Dict, started_at: float) -> Dict:
+    job['status'] = RUNNING
+    job['started_at'] = started_at
+    job['queue_seconds'] = round(max(0.0, started_at - job['submitted_at']), 4)
+    return job
+
+
+class MemoryJobStore:
+    """Job records kept in this worker process only"""
+    # Pool processes cannot update these records (see JobQueue.get)
+    shared = False
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Dict) -> None:
+        with self._lock:
+            self._jobs[job['id']] = dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def mark_running(self, job_id: str, started_at: float) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job and job['status'] == QUEUED:
+                _mark_running(job, started_at)
+
+    def purge_expired(self, now: float) -> int:
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job['expires_at'] is not None and job['expires_at'] <= now]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+
+class SQLiteJobStore:
+    """
+    Job records in a SQLite file, so a job submitted to one gunicorn worker
+    can be polled through any other worker on the same host.
+    """
+    # Pool processes mark their jobs running here themselves
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        # Connections are opened on first use, so none is shared across the gunicorn fork
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # Sent to pool processes by path; each opens its own connection
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, opened after any fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS jobs ('
+                    'id TEXT PRIMARY KEY, expires_at REAL, record TEXT NOT NULL)'
+                )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def save(self, job: Dict) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO jobs (id, expires_at, record) VALUES (?, ?, ?)',
+                (job['id'], job['expires_at'], json.dumps(job))
+            )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._connect().execute('SELECT record FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def mark_running(self, job_id: str, started_at: float) -> None:
+        with self._connect() as conn:
+            row = conn.execute('SELECT record FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            job = json.loads(row[0]) if row else None
+            if job and job['status'] == QUEUED:
+                conn.execute('UPDATE jobs SET record = ? WHERE id = ?',
+                             (json.dumps(_mark_running(job, started_at)), job_id))
+
+    def purge_expired(self, now: float) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                'DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,)
+            ).rowcount
+
+
+class JobQueue:
+    """
+    Submit/poll/result queue for long-running mind-map generation.
+
+    Jobs run the PDFProcessor -> MindMapService pipeline on a local process
+    pool. At most max_pending jobs may be queued or running per worker;
+    beyond that submit() raises QueueFullError so the route can answer 429.
+    Finished jobs (and their results) are kept for ttl_seconds.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, ttl_seconds: int = 3600,
+                 store=None, cache=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.store = store or MemoryJobStore()
+        self.cache = cache
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        # Futures of this worker's unfinished jobs, by job id
+        self._futures = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Caller must hold self._lock
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def _submit(self, *args) -> Future:
+        # Caller must hold self._lock
+        pool = self._get_pool()
+        try:
+            return pool.submit(run_job, *args)
+        except BrokenProcessPool:
+            # A pool process died (e.g. OOM-killed); start a new pool for this and later jobs
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            return self._get_pool().submit(run_job, *args)
+
+    def submit(self, data: bytes, filename: str = '', backend: Optional[str] = None,
+               engine: Optional[str] = None) -> Dict:
+        """Queue a document and return its job record without waiting for the result"""
+        now = time.time()
+        self.store.purge_expired(now)
+
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': QUEUED,
+            'filename': filename,
+            'submitted_at': now,
+            'started_at': None,
+            'finished_at': None,
+            'queue_seconds': None,
+            'run_seconds': None,
+            'expires_at': None,
+            'error': None,
+            'result': None
+        }
+
+        cache_key = self.cache.make_key(data, variant=pipeline_variant(backend, engine)) if self.cache else None
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            error = document_error(cached)
+            self._finish(job, result=None if error else cached, error=error, started_at=now, run_seconds=0.0)
+            return job
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f'Job queue is full ({self.max_pending} pending jobs)')
+            self._pending += 1
+            self.store.save(job)
+            try:
+                if self.store.shared:
+                    future = self._submit(data, backend, engine, job['id'], self.store)
+                else:
+                    future = self._submit(data, backend, engine)
+            except Exception:
+                self._pending -= 1
+                raise
+            self._futures[job['id']] = future
+
+        future.add_done_callback(lambda f: self._on_done(job, cache_key, f))
+        return job
+
+    def _on_done(self, job: Dict, cache_key: Optional[str], future) -> None:
+        try:
+            outcome = future.result()
+        except Exception as e:
+            self._finish(job, error=str(e))
+            return
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._futures.pop(job['id'], None)
+
+        entry = take_metrics(outcome['entry'])
+        if self.cache:
+            self.cache.set(cache_key, entry)
+        # Too little text or no topics fails the job, as on the other routes
+        error = document_error(entry)
+        self._finish(job, result=None if error else entry, error=error,
+                     started_at=outcome['started_at'], run_seconds=outcome['run_seconds'])
+
+    def _finish(self, job: Dict, result: Optional[Dict] = None, error: Optional[str] = None,
+                started_at: Optional[float] = None, run_seconds: Optional[float] = None) -> None:
+        now = time.time()
+        job['status'] = FAILED if error else COMPLETED
+        job['finished_at'] = now
+        job['started_at'] = started_at
+        if started_at is not None:
+            job['queue_seconds'] = round(max(0.0, started_at - job['submitted_at']), 4)
+        job['run_seconds'] = run_seconds
+        job['expires_at'] = now + self.ttl_seconds
+        job['error'] = error
+        if result is not None:
+            job['result'] = {
+                'mindmap': result['mindmap'],
+                'resources': result['resources'],
+                'extraction': result.get('extraction')
+            }
+        self.store.save(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return the job record (including its result once completed), or None if unknown or expired"""
+        job = self.store.get(job_id)
+        if job and job['expires_at'] is not None and job['expires_at'] <= time.time():
+            return None
+        if job and job['status'] == QUEUED and not self.store.shared:
+            # The pool takes a job (and its future starts running) as a process is about to free up
+            with self._lock:
+                future = self._futures.get(job_id)
+            if future is not None and future.running():
+                job['status'] = RUNNING
+        return job
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'workers': self.max_workers
+            }
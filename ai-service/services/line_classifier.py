@@ -0,0 +1,113 @@
+import re
+from typing import Optional, Tuple
+
+MAIN_TOPIC = 'main'
+SUBTOPIC = 'subtopic'
+
+# Lines starting with these (case-sensitive) are main topics
+TOPIC_KEYWORDS = [
+    'Introduction to', 'Overview of', 'Fundamentals of', 'Basics of',
+    'Advanced', 'Understanding', 'Exploring', 'Concepts of'
+]
+
+# Lines starting with these (case-sensitive) are subtopics
+SUBTOPIC_INDICATORS = [
+    'Definition', 'Types', 'Examples', 'Applications', 'Properties',
+    'Characteristics', 'Features', 'Methods', 'Techniques', 'Principles',
+    'Components', 'Elements', 'Factors', 'Advantages', 'Disadvantages'
+]
+
+BULLETS = '-•*○●▪▫'
+DASHES = ':-–—'
+
+
+class LineClassifier:
+    """
+    Single-pass classifier for syllabus lines.
+
+    All heading, bullet and keyword rules used by MindMapService are folded
+    into a few precompiled alternations, built once per instance, so each
+    line is matched at most once per rule group and its cleaned name is
+    derived in the same call.
+    """
+
+    def __init__(self):
+        keywords = '|'.join(re.escape(keyword) for keyword in TOPIC_KEYWORDS)
+        indicators = '|'.join(re.escape(indicator) for indicator in SUBTOPIC_INDICATORS)
+
+        # Numbered headings (case-insensitive) or topic keywords (case-sensitive)
+        self.main_prefix = re.compile(
+            r'(?i:\d+\.?\d*\s+|(?:Unit|Chapter|Module|Lesson|Topic)\s+\d+)|(?:' + keywords + ')'
+        )
+
+        # Bullets and sub-numbering (case-insensitive), subtopic indicators
+        # (case-sensitive) or indentation
+        self.sub_prefix = re.compile(
+            r'(?i:\s*[' + BULLETS + r']|\s*\d+\.\d+|\s*[a-z]\)|\s*[ivx]+\.|\s*\([a-z]\))'
+            r'|(?:' + indicators + r')|    |\t'
+        )
+
+        # Numbering, then a bullet, then leading dashes/colons - each optional,
+        # stripped together in one match
+        self.name_prefix = re.compile(
+            r'(?i:\d+\.?\d*\s*|(?:Unit|Chapter|Module|Lesson|Topic)\s+\d+\s*)?'
+            r'(?i:(?:\s*[' + BULLETS + r']|\s*[a-z]\)|\s*[ivx]+\.|\s*\([a-z]\))\s*)?'
+            r'(?:[' + re.escape(DASHES) + r']+\s*)?'
+        )
+
+    def classify(self, line: str, allow_subtopic: bool = True) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Return (kind, cleaned name) for a line, where kind is MAIN_TOPIC,
+        SUBTOPIC or None. Subtopic rules are skipped when allow_subtopic is
+        False (i.e. there is no current topic to attach it to).
+        """
+        if self.is_main_topic(line):
+            return MAIN_TOPIC, self.clean_name(line)
+        if allow_subtopic and self.is_subtopic(line):
+            return SUBTOPIC, self.clean_name(line)
+        return None, None
+
+    def is_main_topic(self, line: str) -> bool:
+        length = len(line)
+        if length < 5 or length > 150:
+            return False
+
+        if self.main_prefix.match(line):
+            return True
+
+        # Title case or all caps (but not too long)
+        words = line.split()
+        if 2 <= len(words) <= 15:
+            if all(word[0].isupper() for word in words if len(word) > 2):
+                return True
+            if 10 < length < 80 and line.isupper():
+                return True
+
+        return False
+
+    def is_subtopic(self, line: str) -> bool:
+        length = len(line)
+        if length < 5 or length > 120:
+            return False
+        return self.sub_prefix.match(line) is not None
+
+    def clean_name(self, text: str) -> str:
+        text = text[self.name_prefix.match(text).end():]
+
+        # Drop trailing dashes/colons and the whitespace before them. Suffix
+        # regexes rescan the whole line, rstrip only touches the tail.
+        # A single trailing newline is kept, as a '$'-anchored match would.
+        body = text[:-1] if text.endswith('\n') else text
+        stripped = body.rstrip(DASHES)
+        if len(stripped) < len(body):
+            text = stripped.rstrip() + text[len(body):]
+
+        # Clean up whitespace
+        text = ' '.join(text.split())
+
+        # Capitalize properly if all caps
+        if len(text) > 10 and text.isupper():
+            text = text.title()
+
+        # Remove trailing punctuation except period
+        return text.rstrip(',;:').strip()
@@ -0,0 +1,53 @@
+import os
+import sys
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process right now (Linux), or None where unavailable"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss_bytes() -> Optional[int]:
+    """High-water mark of this process's resident set size since it started, or None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class PeakRSS:
+    """
+    Tracks the peak resident set size seen while one request is processed.
+
+    The process-wide high-water mark cannot be reset between requests, so
+    the current RSS is sampled at natural checkpoints (e.g. after every
+    page) instead. Each sample is a single small read from /proc.
+    """
+
+    def __init__(self):
+        self.start = current_rss_bytes()
+        self.peak = self.start
+
+    def sample(self) -> None:
+        rss = current_rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def as_megabytes(self) -> Optional[float]:
+        return round(self.peak / (1024 * 1024), 1) if self.peak is not None else None
@@ -0,0 +1,269 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# Latency buckets in seconds, from a cached hit to a long scanned course pack
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+MEMORY_BUCKETS = tuple(mb * 1024 * 1024 for mb in (64, 128, 256, 384, 512, 768, 1024, 2048))
+
+
+def _label_key(labels: Dict) -> Tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: Tuple, extra: Tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, one series per label set"""
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down (e.g. in-flight requests)"""
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        self._values[_label_key(labels)] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus text format"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # Per-bucket counts (plus +Inf), sum, count
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterator[str]:
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(key)} {count}"
+
+
+class _NullTimer:
+    """Stand-in for stage() when metrics are disabled: no clock reads, no locking"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    In-process request and pipeline metrics, rendered in the Prometheus text
+    exposition format by the /metrics route.
+
+    Every recording method returns immediately when the registry is disabled,
+    so the instrumentation left in the pipeline costs one attribute check.
+    Values are per worker process; scrape each gunicorn worker (or run one
+    worker per container) to see the whole service.
+    """
+
+    def __init__(self, enabled: bool = True, prefix: str = 'campusflow_ai'):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._metrics: List = []
+        # Pipeline events collected for another process to replay (see collect)
+        self._collected = threading.local()
+
+        self.request_seconds = self._add(Histogram('request_duration_seconds', 'Request latency by route'))
+        self.requests = self._add(Counter('requests_total', 'Requests by route and status code'))
+        self.request_errors = self._add(Counter('request_errors_total', 'Requests answered with a 4xx or 5xx status, by route'))
+        self.bytes_in = self._add(Counter('request_bytes_total', 'Request body bytes received by route'))
+        self.bytes_out = self._add(Counter('response_bytes_total', 'Response body bytes sent by route'))
+        self.in_flight = self._add(Gauge('requests_in_flight', 'Requests currently being handled by route'))
+        self.stage_seconds = self._add(Histogram('stage_duration_seconds', 'Pipeline stage latency'))
+        self.stage_errors = self._add(Counter('stage_errors_total', 'Pipeline stages that raised'))
+        self.pages = self._add(Histogram('document_pages', 'Pages per extracted document by backend', PAGE_BUCKETS))
+        self.characters = self._add(Counter('extracted_characters_total', 'Characters of cleaned text extracted by backend'))
+        self.peak_rss = self._add(Histogram('extraction_peak_rss_bytes', 'Peak resident memory seen while extracting a document', MEMORY_BUCKETS))
+        self.route_in_flight = self._add(Gauge('route_class_in_flight', 'Requests running per route class (heavy, batch, light)'))
+        self.route_queued = self._add(Gauge('route_class_queue_depth', 'Requests waiting for a slot per route class'))
+        self.route_rejected = self._add(Counter('route_class_rejected_total', 'Requests turned away because their route class was full'))
+        self.stored_pages = self._add(Counter('page_store_pages_total', 'Pages read from (hit) or extracted and added to (miss) the page text store'))
+        self.preflights = self._add(Counter('preflight_documents_total', 'Documents classified by the pre-flight check, by kind'))
+
+    def _add(self, metric):
+        metric.name = f"{self.prefix}_{metric.name}"
+        self._metrics.append(metric)
+        return metric
+
+    # Request instrumentation (called from Flask hooks)
+
+    def request_started(self, route: str, content_length) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.in_flight.inc(1, route=route)
+            if content_length:
+                self.bytes_in.inc(content_length, route=route)
+
+    def request_finished(self, route: str, method: str, status: int, seconds: float, response_bytes) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.in_flight.inc(-1, route=route)
+            self.request_seconds.observe(seconds, route=route, method=method)
+            self.requests.inc(route=route, method=method, status=status)
+            if status >= 400:
+                self.request_errors.inc(route=route, status_class=f"{status // 100}xx")
+            if response_bytes:
+                self.bytes_out.inc(response_bytes, route=route)
+
+    def route_class_changed(self, route_class: str, running: int, queued: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.route_in_flight.set(running, route_class=route_class)
+            self.route_queued.set(queued, route_class=route_class)
+
+    def route_class_rejected(self, route_class: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.route_rejected.inc(route_class=route_class)
+
+    # Pipeline instrumentation
+
+    @contextmanager
+    def _timed_stage(self, name: str):
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.stage_finished(name, time.perf_counter() - start, failed)
+
+    def stage_finished(self, name: str, seconds: float, failed: bool = False) -> None:
+        if not self.enabled:
+            return
+        self._collect('stage_finished', name, seconds, failed)
+        with self._lock:
+            if failed:
+                self.stage_errors.inc(stage=name)
+            self.stage_seconds.observe(seconds, stage=name)
+
+    def stage(self, name: str):
+        """Context manager timing one pipeline stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timed_stage(name)
+
+    def document_extracted(self, backend: str, pages: int, characters: int, peak_rss=None) -> None:
+        if not self.enabled:
+            return
+        self._collect('document_extracted', backend, pages, characters, peak_rss)
+        with self._lock:
+            self.pages.observe(pages, backend=backend)
+            self.characters.inc(characters, backend=backend)
+            if peak_rss is not None:
+                self.peak_rss.observe(peak_rss, backend=backend)
+
+    def page_store_lookup(self, backend: str, hits: int, misses: int) -> None:
+        if not self.enabled:
+            return
+        self._collect('page_store_lookup', backend, hits, misses)
+        with self._lock:
+            self.stored_pages.inc(hits, backend=backend, result='hit')
+            self.stored_pages.inc(misses, backend=backend, result='miss')
+
+    def document_preflighted(self, kind: str) -> None:
+        if not self.enabled:
+            return
+        self._collect('document_preflighted', kind)
+        with self._lock:
+            self.preflights.inc(kind=kind)
+
+    # Pipelines run in pool processes report back to the worker that serves /metrics
+
+    @contextmanager
+    def collect(self):
+        """
+        Collect the pipeline events recorded in this thread into a list of
+        plain tuples, which a pool process returns with its result so the
+        worker can replay them.
+        """
+        events = []
+        self._collected.events = events
+        try:
+            yield events
+        finally:
+            self._collected.events = None
+
+    def _collect(self, method: str, *args) -> None:
+        events = getattr(self._collected, 'events', None)
+        if events is not None:
+            events.append((method, args))
+
+    def replay(self, events) -> None:
+        """Record pipeline events collected in another process"""
+        for method, args in events or ():
+            getattr(self, method)(*args)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for metric in self._metrics:
+                lines.append(f"# HELP {metric.name} {metric.help_text}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Shared by the Flask app and the pipeline services in this process
+metrics = Metrics(enabled=os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes'))
@@ -0,0 +1,83 @@
+"""
+Topic and key concept nodes of a mind map.
+
+The pipeline builds and ranks these slotted objects; they become plain
+dicts (to_dict) only where a mind map leaves MindMapService, so cached,
+streamed and returned JSON keeps the same shape.
+"""
+import sys
+from typing import Dict, List, Optional
+
+
+class Topic:
+    # Declared by hand rather than with @dataclass(slots=True), which needs Python 3.10
+    __slots__ = ('name', 'subtopics', 'description', 'seen')
+
+    def __init__(self, name: str, subtopics: Optional[List[str]] = None, description: str = ''):
+        # The same unit and topic names recur across syllabi, revisions and cache entries
+        self.name = sys.intern(name)
+        self.subtopics = subtopics if subtopics is not None else []
+        self.description = description
+        # Mirrors subtopics, so duplicate checks do not scan the list
+        self.seen = set(self.subtopics)
+
+    def __repr__(self) -> str:
+        return f"Topic(name={self.name!r}, subtopics={self.subtopics!r}, description={self.description!r})"
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.name, self.subtopics, self.description) == (other.name, other.subtopics, other.description)
+
+    __hash__ = None
+
+    def add_subtopic(self, subtopic: str) -> bool:
+        """Append subtopic unless it is already there; True if it was added"""
+        if subtopic in self.seen:
+            return False
+        self.subtopics.append(subtopic)
+        self.seen.add(subtopic)
+        return True
+
+    def with_subtopics(self, subtopics: List[str]) -> 'Topic':
+        return Topic(self.name, list(subtopics), self.description)
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'subtopics': list(self.subtopics),
+            'description': self.description
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Topic':
+        return cls(data['name'], list(data.get('subtopics', [])), data.get('description', ''))
+
+
+class KeyConcept:
+    __slots__ = ('name', 'description')
+
+    def __init__(self, name: str, description: str):
+        self.name = sys.intern(name)
+        self.description = description
+
+    def __repr__(self) -> str:
+        return f"KeyConcept(name={self.name!r}, description={self.description!r})"
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.name, self.description) == (other.name, other.description)
+
+    __hash__ = None
+
+    def to_dict(self) -> Dict:
+        return {'name': self.name, 'description': self.description}
+
+
+def topics_to_dicts(topics: List[Topic]) -> List[Dict]:
+    return [topic.to_dict() for topic in topics]
+
+
+def concepts_to_dicts(concepts: List[KeyConcept]) -> List[Dict]:
+    return [concept.to_dict() for concept in concepts]
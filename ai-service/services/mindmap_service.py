@@ -1,44 +1,225 @@
+import logging
 import re
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from services.budget import WorkBudget, stage
+from services.concept_extractor import ConceptExtractor, DEFINITION_FORMS
+from services.line_classifier import LineClassifier, SUBTOPIC
+from services.mindmap_nodes import KeyConcept, Topic, concepts_to_dicts, topics_to_dicts
+from services.nlp_engine import ENGINE_NAMES, REGEX_ENGINE, SPACY_ENGINE, SpacyEngine
+from services.resource_linker import ResourceLinker
+from services.text_normalizer import normalize_lines, strip_boilerplate
+from services.topic_ranker import TopicRanker
+
+logger = logging.getLogger(__name__)
+
+# Size of the finished mind map
+MAX_TOPICS = 15
+MAX_SUBTOPICS = 8
+MAX_KEY_CONCEPTS = 10
+
+# Candidates extracted for the topic ranker to choose from
+CANDIDATE_TOPICS = 100
+CANDIDATE_SUBTOPICS = 40
+CANDIDATE_KEY_CONCEPTS = 40
 
 class MindMapService:
-    def __init__(self):
-        print("MindMapService initialized")
+    def __init__(self, resource_linker: Optional[ResourceLinker] = None,
+                 spacy_engine: Optional[SpacyEngine] = None, default_engine: str = REGEX_ENGINE,
+                 topic_ranker: Optional[TopicRanker] = None):
+        # Precompiled heading/bullet/keyword rules shared by every extraction
+        self.line_classifier = LineClassifier()
+        self.concept_extractor = ConceptExtractor()
+        self.resource_linker = resource_linker or ResourceLinker()
+        # Optional spaCy engine; its model is loaded on first use and shared
+        self.spacy_engine = spacy_engine
+        self.default_engine = default_engine
+        # Optional TF-IDF ranker; without it the first topics and concepts are kept
+        self.topic_ranker = topic_ranker
+        logger.debug("MindMapService initialized")
+    
+    @property
+    def topic_limit(self) -> int:
+        return CANDIDATE_TOPICS if self.topic_ranker else MAX_TOPICS
+    
+    @property
+    def subtopic_limit(self) -> int:
+        return CANDIDATE_SUBTOPICS if self.topic_ranker else MAX_SUBTOPICS
     
-    def generate_mindmap(self, text: str) -> Dict:
+    @property
+    def concept_limit(self) -> int:
+        return CANDIDATE_KEY_CONCEPTS if self.topic_ranker else MAX_KEY_CONCEPTS
+    
+    def resolve_engine(self, engine: Optional[str] = None) -> str:
         """
-        Generate mind map structure from text content with intelligent extraction
+        Validate a requested engine name (None means the default). Raises
+        ValueError for unknown names and EngineUnavailableError when the
+        spaCy engine is requested but its model cannot be loaded.
         """
-        # Clean and preprocess text
-        text = self.preprocess_text(text)
-        
-        # Extract course information
-        course_info = self.extract_course_info(text)
+        engine = (engine or self.default_engine).lower()
+        if engine not in ENGINE_NAMES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINE_NAMES)}")
+        if engine == SPACY_ENGINE:
+            if self.spacy_engine is None:
+                self.spacy_engine = SpacyEngine()
+            # Loads the model on first use, raises if it is missing
+            self.spacy_engine.nlp
+        return engine
+    
+    def generate_mindmap(self, text: str, lines: Optional[List[str]] = None, engine: Optional[str] = None,
+                         boilerplate_lines: Optional[List[str]] = None,
+                         budget: Optional[WorkBudget] = None) -> Dict:
+        """
+        Generate mind map structure from text content with intelligent extraction.
+        lines may carry the already normalized line array from PDFProcessor.extract
+        so the text is not cleaned a second time. engine selects the topic and
+        concept extractor: 'regex' (rules only) or 'spacy' (noun chunks and
+        dependency patterns, see SpacyEngine). Topics headed on the pages in
+        boilerplate_lines (see PDFProcessor.extract) are left out.
+        
+        With a budget, optional stages (spaCy, the fallback topic patterns,
+        the ranker) are skipped when time runs low, the regex stages read at
+        most budget.max_regex_chars and stage times go to budget.report().
+        """
+        engine = self.resolve_engine(engine)
         
-        # Extract topics and subtopics with better intelligence
-        topics = self.extract_topics(text)
+        # Clean and preprocess text, keeping line boundaries
+        with stage('preprocess_text', budget):
+            lines = self.preprocess_lines(text, lines)
+            text = '\n'.join(lines)
         
-        # Extract key concepts
-        key_concepts = self.extract_key_concepts(text)
+        # Extract course information
+        with stage('extract_course_info', budget):
+            course_info = self.extract_course_info(text)
+        
+        # Falls back to the regex engine when the budget is running low
+        if engine == SPACY_ENGINE and (budget is None or budget.allows('spacy_analyze')):
+            # One parse of every section serves both topics and concepts
+            with stage('spacy_analyze', budget):
+                analysis = self.spacy_engine.analyze(
+                    self.split_sections(lines), self, self.topic_limit, self.subtopic_limit, self.concept_limit
+                )
+            topics = analysis['topics']
+            key_concepts = analysis['key_concepts']
+        else:
+            # Extract topics and subtopics with better intelligence
+            with stage('extract_topics', budget):
+                topics = self.extract_topics(text, lines, budget)
+            
+            # Extract key concepts (definitions may wrap across lines)
+            with stage('extract_key_concepts', budget):
+                concept_text = ' '.join(lines)
+                if budget is not None:
+                    concept_text = budget.limit_text('extract_key_concepts', concept_text)
+                key_concepts = self.extract_key_concepts(concept_text)
         
         # Filter and limit to most important content
-        topics = self.filter_important_topics(topics)
+        topics = self.filter_important_topics(topics, self.boilerplate_topics(boilerplate_lines))
+        with stage('rank_content', budget):
+            topics, key_concepts = self.rank_content(text, topics, key_concepts, budget)
+        logger.debug("Generated mind map with %d topics and %d key concepts", len(topics), len(key_concepts))
         
         return {
             'course_info': course_info,
-            'topics': topics,
-            'key_concepts': key_concepts[:10]  # Limit to top 10 concepts
+            'topics': topics_to_dicts(topics),
+            'key_concepts': concepts_to_dicts(key_concepts)
+        }
+    
+    def iter_mindmap(self, pages: Iterable[List[str]],
+                     boilerplate_lines: Optional[List[str]] = None) -> Iterator[Tuple[str, object]]:
+        """
+        Build the mind map progressively from normalized lines delivered page
+        by page (see PDFProcessor.iter_page_lines). Yields ('course_info', dict)
+        once the title area has been read, ('topic', dict) as each topic is
+        finalized (when the next heading arrives), then ('key_concepts', list)
+        and ('mindmap', dict) - the same result generate_mindmap returns.
+        
+        boilerplate_lines may grow as pages arrive (see iter_page_lines). With
+        a topic ranker or boilerplate_lines, topics can only be chosen once
+        every page has been read (a later page may rank them out or mark
+        their name as boilerplate), so they are all sent at the end.
+        """
+        lines = []
+        text_length = -1
+        course_info = None
+        topics = []
+        sent = 0
+        headings = 0
+        name = None
+        section_lines = []
+        # Topics are sent as they finish unless they are picked at the end
+        progressive = self.topic_ranker is None and boilerplate_lines is None
+        
+        def finish_section():
+            # Same limits as extract_topics (topic_limit headings); sent topics
+            # are filtered now, the others once every page has been read
+            nonlocal headings
+            if not name or headings >= self.topic_limit:
+                return []
+            headings += 1
+            topic = self.build_topic(name, section_lines[1:], self.subtopic_limit)
+            return self.filter_important_topics([topic]) if progressive else [topic]
+        
+        for page_lines in pages:
+            for line in self.preprocess_lines('', page_lines):
+                lines.append(line)
+                text_length += len(line) + 1
+                stripped = line.strip()
+                if len(stripped) >= 5 and self.line_classifier.is_main_topic(stripped):
+                    topics.extend(finish_section())
+                    name = self.line_classifier.clean_name(stripped)
+                    section_lines = [line]
+                else:
+                    section_lines.append(line)
+                
+                # The title is read from the first 500 characters, which are final now
+                if course_info is None and text_length >= 500:
+                    course_info = self.extract_course_info('\n'.join(lines))
+                    yield 'course_info', course_info
+            
+            # Course info always goes first; topics are held back until it is known
+            if course_info is not None and progressive:
+                while sent < len(topics):
+                    yield 'topic', topics[sent].to_dict()
+                    sent += 1
+        
+        text = '\n'.join(lines)
+        if course_info is None:
+            course_info = self.extract_course_info(text)
+            yield 'course_info', course_info
+        
+        topics.extend(finish_section())
+        
+        # If no topics found, use intelligent extraction
+        boilerplate = self.boilerplate_topics(boilerplate_lines)
+        if headings == 0:
+            topics = self.filter_important_topics(self.intelligent_topic_extraction(text)[:self.topic_limit], boilerplate)
+        elif not progressive:
+            topics = self.filter_important_topics(topics, boilerplate)
+        
+        # Without a ranker this only cuts the lists to the mind map's size
+        topics, key_concepts = self.rank_content(text, topics, self.extract_key_concepts(' '.join(lines)))
+        
+        for topic in topics[sent:]:
+            yield 'topic', topic.to_dict()
+        
+        key_concepts = concepts_to_dicts(key_concepts)
+        yield 'key_concepts', key_concepts
+        
+        yield 'mindmap', {
+            'course_info': course_info,
+            'topics': topics_to_dicts(topics),
+            'key_concepts': key_concepts
         }
     
     def preprocess_text(self, text: str) -> str:
         """Clean and normalize text"""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        # Remove page numbers
-        text = re.sub(r'\bPage\s+\d+\b', '', text, flags=re.IGNORECASE)
-        # Remove common headers/footers
-        text = re.sub(r'\b(Syllabus|Course Outline|Table of Contents)\b', '', text, flags=re.IGNORECASE)
-        return text.strip()
+        return '\n'.join(self.preprocess_lines(text))
+    
+    def preprocess_lines(self, text: str, lines: Optional[List[str]] = None) -> List[str]:
+        """Normalize text into lines (unless already normalized) and drop page labels and headers"""
+        if lines is None:
+            lines = normalize_lines(text)
+        return strip_boilerplate(lines)
     
     def extract_course_info(self, text: str) -> Dict:
         """Extract course title and description"""
@@ -51,9 +232,12 @@ class MindMapService:
             r'([A-Z][A-Za-z\s]+(?:Fundamentals|Basics|Introduction|Advanced))'
         ]
         
+        # Patterns expect a title that may wrap across the first lines
+        head = text[:500].replace('\n', ' ')
+        
         title = "Course Overview"
         for pattern in course_patterns:
-            match = re.search(pattern, text[:500])
+            match = re.search(pattern, head)
             if match:
                 title = match.group(1).strip()
                 break
@@ -63,61 +247,84 @@ class MindMapService:
             'description': 'Click on the root node to explore topics and subtopics'
         }
     
-    def extract_topics(self, text: str) -> List[Dict]:
+    def extract_topics(self, text: str, lines: Optional[List[str]] = None,
+                       budget: Optional[WorkBudget] = None) -> List[Topic]:
         """
-        Intelligently extract main topics and subtopics
+        Intelligently extract main topics and subtopics. Past budget's
+        deadline, sections stop once there are enough for the mind map.
         """
+        if lines is None:
+            lines = text.split('\n')
+        
+        # 15 topics, or the ranker's larger candidate pool
+        limit = self.topic_limit
         topics = []
-        lines = text.split('\n')
+        for name, section_lines in self.split_sections(lines):
+            if budget is not None and len(topics) >= MAX_TOPICS and budget.expired():
+                budget.cut('extract_topics', 'deadline')
+                break
+            if name and len(topics) < limit:
+                topics.append(self.build_topic(name, section_lines[1:], self.subtopic_limit))
         
-        current_topic = None
-        current_subtopics = []
-        topic_count = 0
+        # If no topics found, use intelligent extraction
+        if not topics:
+            if budget is None:
+                topics = self.intelligent_topic_extraction(text)
+            elif budget.allows('intelligent_topic_extraction'):
+                topics = self.intelligent_topic_extraction(budget.limit_text('intelligent_topic_extraction', text))
         
-        for i, line in enumerate(lines):
+        return topics[:limit]
+    
+    def split_sections(self, lines: List[str]) -> List[tuple]:
+        """
+        Split lines into (topic name, lines) sections, one per main topic
+        line (Unit, Chapter, Module, etc.). Each section's lines start with
+        its heading; lines before the first heading form a section named None.
+        """
+        sections = []
+        name = None
+        section_lines = []
+        
+        for line in lines:
+            stripped = line.strip()
+            if len(stripped) >= 5 and self.line_classifier.is_main_topic(stripped):
+                if section_lines:
+                    sections.append((name, section_lines))
+                name = self.line_classifier.clean_name(stripped)
+                section_lines = [line]
+            else:
+                section_lines.append(line)
+        
+        if section_lines:
+            sections.append((name, section_lines))
+        return sections
+    
+    def build_topic(self, name: str, lines: List[str], max_subtopics: int = MAX_SUBTOPICS) -> Topic:
+        """Topic node for a section heading and the lines under it"""
+        topic = Topic(name, description=self.generate_topic_description(name))
+        for line in lines:
             line = line.strip()
             if not line or len(line) < 5:
                 continue
             
-            # Check if line is a main topic (Unit, Chapter, Module, etc.)
-            if self.is_main_topic(line):
-                # Save previous topic
-                if current_topic and topic_count < 15:  # Limit to 15 topics
-                    topics.append({
-                        'name': current_topic,
-                        'subtopics': current_subtopics[:8],  # Limit to 8 subtopics
-                        'description': self.generate_topic_description(current_topic)
-                    })
-                    topic_count += 1
-                
-                # Start new topic
-                current_topic = self.clean_topic_name(line)
-                current_subtopics = []
-            
-            # Check if line is a subtopic
-            elif current_topic and self.is_subtopic(line):
-                subtopic = self.clean_topic_name(line)
-                if subtopic and 5 < len(subtopic) < 100 and len(current_subtopics) < 8:
-                    # Avoid duplicates
-                    if subtopic not in current_subtopics:
-                        current_subtopics.append(subtopic)
-        
-        # Add last topic
-        if current_topic and topic_count < 15:
-            topics.append({
-                'name': current_topic,
-                'subtopics': current_subtopics[:8],
-                'description': self.generate_topic_description(current_topic)
-            })
+            kind, subtopic = self.line_classifier.classify(line)
+            # Limited to max_subtopics; duplicates are skipped
+            if kind == SUBTOPIC and subtopic and 5 < len(subtopic) < 100 and len(topic.subtopics) < max_subtopics:
+                topic.add_subtopic(subtopic)
         
-        # If no topics found, use intelligent extraction
-        if not topics:
-            topics = self.intelligent_topic_extraction(text)
-        
-        return topics[:15]  # Maximum 15 topics
+        return topic
+    
+    def boilerplate_topics(self, lines: Optional[List[str]]) -> Set[str]:
+        """Names of the topics headed on boilerplate pages, given those pages' lines"""
+        names = set()
+        for line in lines or ():
+            stripped = line.strip()
+            if len(stripped) >= 5 and self.line_classifier.is_main_topic(stripped):
+                names.add(self.line_classifier.clean_name(stripped))
+        return names
     
-    def filter_important_topics(self, topics: List[Dict]) -> List[Dict]:
-        """Filter out noise and keep only meaningful topics"""
+    def filter_important_topics(self, topics: List[Topic], boilerplate: Optional[Set[str]] = None) -> List[Topic]:
+        """Filter out noise and keep only meaningful topics (and none of the boilerplate ones)"""
         filtered = []
         
         # Keywords to avoid
@@ -125,25 +332,29 @@ class MindMapService:
                          'table of contents', 'preface', 'acknowledgment']
         
         for topic in topics:
-            topic_lower = topic['name'].lower()
+            # Grading policy, attendance rules and the like shared by many syllabi
+            if boilerplate and topic.name in boilerplate:
+                continue
+            
+            topic_lower = topic.name.lower()
             
             # Skip if contains noise keywords
             if any(keyword in topic_lower for keyword in noise_keywords):
                 continue
             
             # Skip if too short or too long
-            if len(topic['name']) < 5 or len(topic['name']) > 150:
+            if len(topic.name) < 5 or len(topic.name) > 150:
                 continue
             
             # Skip if no subtopics and description is generic
-            if not topic.get('subtopics') and 'Study materials' in topic.get('description', ''):
+            if not topic.subtopics and 'Study materials' in topic.description:
                 continue
             
             filtered.append(topic)
         
         return filtered
     
-    def intelligent_topic_extraction(self, text: str) -> List[Dict]:
+    def intelligent_topic_extraction(self, text: str) -> List[Topic]:
         """
         Use intelligent patterns to extract topics when standard methods fail
         """
@@ -155,11 +366,10 @@ class MindMapService:
         
         for i, (num, topic_name) in enumerate(matches[:15]):
             if i < 15:
-                topics.append({
-                    'name': topic_name.strip(),
-                    'subtopics': [],
-                    'description': f'Key concepts and learning objectives for {topic_name.strip()}'
-                })
+                topics.append(Topic(
+                    topic_name.strip(),
+                    description=f'Key concepts and learning objectives for {topic_name.strip()}'
+                ))
         
         # If still no topics, extract from headings
         if not topics:
@@ -168,11 +378,10 @@ class MindMapService:
             
             for heading in headings[:10]:
                 if len(heading.strip()) > 10:
-                    topics.append({
-                        'name': heading.strip(),
-                        'subtopics': [],
-                        'description': f'Important topic covering {heading.strip()}'
-                    })
+                    topics.append(Topic(
+                        heading.strip(),
+                        description=f'Important topic covering {heading.strip()}'
+                    ))
         
         return topics
     
@@ -196,165 +405,77 @@ class MindMapService:
     
     def is_main_topic(self, line: str) -> bool:
         """Check if line is a main topic with better detection"""
-        # Skip if too short or too long
-        if len(line) < 5 or len(line) > 150:
-            return False
-        
-        # Check for numbered sections (1., 1.0, Unit 1, Chapter 1, etc.)
-        if re.match(r'^(\d+\.?\d*\s+|Unit\s+\d+|Chapter\s+\d+|Module\s+\d+|Lesson\s+\d+|Topic\s+\d+)', line, re.IGNORECASE):
-            return True
-        
-        # Check if line is title case or all caps (but not too long)
-        words = line.split()
-        if len(words) >= 2 and len(words) <= 15:
-            # Title case check
-            if all(word[0].isupper() for word in words if len(word) > 2):
-                return True
-            
-            # All caps check (but reasonable length)
-            if line.isupper() and 10 < len(line) < 80:
-                return True
-        
-        # Check for topic keywords at start
-        topic_keywords = [
-            'Introduction to', 'Overview of', 'Fundamentals of', 'Basics of',
-            'Advanced', 'Understanding', 'Exploring', 'Concepts of'
-        ]
-        if any(line.startswith(keyword) for keyword in topic_keywords):
-            return True
-        
-        return False
+        return self.line_classifier.is_main_topic(line)
     
     def is_subtopic(self, line: str) -> bool:
         """Check if line is a subtopic with better detection"""
-        # Skip if too short or too long
-        if len(line) < 5 or len(line) > 120:
-            return False
-        
-        # Check for bullet points or sub-numbering
-        if re.match(r'^(\s*[-•*○●▪▫]|\s*\d+\.\d+|\s*[a-z]\)|\s*[ivx]+\.|\s*\([a-z]\))', line, re.IGNORECASE):
-            return True
-        
-        # Check if line starts with common subtopic indicators
-        subtopic_indicators = [
-            'Definition', 'Types', 'Examples', 'Applications', 'Properties',
-            'Characteristics', 'Features', 'Methods', 'Techniques', 'Principles',
-            'Components', 'Elements', 'Factors', 'Advantages', 'Disadvantages'
-        ]
-        if any(line.startswith(indicator) for indicator in subtopic_indicators):
-            return True
-        
-        # Check for indented text (starts with spaces)
-        if line.startswith('    ') or line.startswith('\t'):
-            return True
-        
-        return False
+        return self.line_classifier.is_subtopic(line)
     
     def clean_topic_name(self, text: str) -> str:
         """Clean and format topic name"""
-        # Remove numbering
-        text = re.sub(r'^(\d+\.?\d*\s*|Unit\s+\d+\s*|Chapter\s+\d+\s*|Module\s+\d+\s*|Lesson\s+\d+\s*|Topic\s+\d+\s*)', '', text, flags=re.IGNORECASE)
-        
-        # Remove bullet points
-        text = re.sub(r'^(\s*[-•*○●▪▫]|\s*[a-z]\)|\s*[ivx]+\.|\s*\([a-z]\))\s*', '', text, flags=re.IGNORECASE)
-        
-        # Remove special characters at start/end
-        text = re.sub(r'^[:\-–—]+\s*', '', text)
-        text = re.sub(r'\s*[:\-–—]+$', '', text)
-        
-        # Clean up whitespace
-        text = ' '.join(text.split())
-        
-        # Capitalize properly if all caps
-        if text.isupper() and len(text) > 10:
-            text = text.title()
-        
-        # Remove trailing punctuation except period
-        text = re.sub(r'[,;:]+$', '', text)
-        
-        return text.strip()
+        return self.line_classifier.clean_name(text)
     
-    def create_generic_topics(self, text: str) -> List[Dict]:
+    def create_generic_topics(self, text: str) -> List[Topic]:
         """Create generic topic structure when no clear structure found"""
         # This should rarely be used now
         return []
     
-    def extract_key_concepts(self, text: str) -> List[Dict]:
+    def extract_key_concepts(self, text: str) -> List[KeyConcept]:
         """Extract key concepts and definitions from text"""
+        # Find "is a", "refers to", "means" and "Name:" definitions in one linear scan
+        return self.select_key_concepts(self.concept_extractor.find_definitions(text), self.concept_limit)
+    
+    def select_key_concepts(self, definitions: Dict[str, List], limit: int = MAX_KEY_CONCEPTS) -> List[KeyConcept]:
+        """Pick the key concepts from (name, description) pairs grouped by definition form"""
         concepts = []
-        
-        # Look for definition patterns
-        definition_patterns = [
-            r'(\w+(?:\s+\w+){0,3})\s+is\s+(?:a|an|the)\s+([^.]{10,150})',
-            r'(\w+(?:\s+\w+){0,3})\s+refers to\s+([^.]{10,150})',
-            r'(\w+(?:\s+\w+){0,3})\s+means\s+([^.]{10,150})',
-            r'(\w+(?:\s+\w+){0,3}):\s+([A-Z][^.]{10,150})'
-        ]
-        
+        collect = max(limit, 15)
         seen_concepts = set()
         
-        for pattern in definition_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                concept_name = match.group(1).strip().title()
-                description = match.group(2).strip()
+        # Skip common words
+        common_words = {'this', 'that', 'these', 'those', 'it', 'the', 'a', 'an'}
+        
+        for form in DEFINITION_FORMS:
+            for name, description in definitions[form]:
+                concept_name = name.strip().title()
+                description = description.strip()
                 
                 # Skip if too generic or already seen
                 if len(concept_name) < 3 or concept_name.lower() in seen_concepts:
                     continue
                 
-                # Skip common words
-                common_words = ['this', 'that', 'these', 'those', 'it', 'the', 'a', 'an']
                 if concept_name.lower() in common_words:
                     continue
                 
                 if 10 < len(description) < 200:
-                    concepts.append({
-                        'name': concept_name,
-                        'description': description[:150]
-                    })
+                    concepts.append(KeyConcept(concept_name, description[:150]))
                     seen_concepts.add(concept_name.lower())
                 
-                if len(concepts) >= 15:
+                if len(concepts) >= collect:
                     break
             
-            if len(concepts) >= 15:
+            if len(concepts) >= collect:
                 break
         
-        return concepts[:10]  # Return top 10
+        return concepts[:limit]
+    
+    def rank_content(self, text: str, topics: List[Topic], key_concepts: List[KeyConcept],
+                     budget: Optional[WorkBudget] = None) -> Tuple[List[Topic], List[KeyConcept]]:
+        """
+        Cut topics, subtopics and key concepts down to the mind map's size:
+        the highest TF-IDF scores for this text when a topic ranker is
+        loaded (kept in document order), otherwise the first ones. The
+        ranker is skipped when budget is running low.
+        """
+        if self.topic_ranker is None:
+            return topics[:MAX_TOPICS], key_concepts[:MAX_KEY_CONCEPTS]
+        if budget is not None and not budget.allows('rank_content'):
+            topics = [topic.with_subtopics(topic.subtopics[:MAX_SUBTOPICS]) for topic in topics[:MAX_TOPICS]]
+            return topics, key_concepts[:MAX_KEY_CONCEPTS]
+        ranked = self.topic_ranker.rank(text, topics, key_concepts, MAX_TOPICS, MAX_SUBTOPICS, MAX_KEY_CONCEPTS)
+        return ranked['topics'], ranked['key_concepts']
     
     def link_resources(self, topics: List[Dict]) -> List[Dict]:
         """Generate study resource links for topics"""
-        resources = []
-        
-        for topic in topics[:10]:  # Limit to first 10 topics
-            topic_name = topic.get('name', '')
-            if not topic_name or len(topic_name) < 3:
-                continue
-            
-            # Create search-friendly topic name
-            search_term = topic_name.replace(' ', '+')
-            
-            topic_resources = {
-                'topic': topic_name,
-                'links': [
-                    {
-                        'type': 'video',
-                        'title': f'Video Tutorial: {topic_name}',
-                        'url': f"https://www.youtube.com/results?search_query={search_term}+tutorial"
-                    },
-                    {
-                        'type': 'article',
-                        'title': f'{topic_name} - Wikipedia',
-                        'url': f"https://en.wikipedia.org/wiki/{topic_name.replace(' ', '_')}"
-                    },
-                    {
-                        'type': 'tutorial',
-                        'title': f'Learn {topic_name}',
-                        'url': f"https://www.geeksforgeeks.org/{topic_name.lower().replace(' ', '-')}/"
-                    }
-                ]
-            }
-            resources.append(topic_resources)
-        
-        return resources
+        names = [topic.get('name', '') for topic in topics[:10]]  # Limit to first 10 topics
+        links = self.resource_linker.bulk(name for name in names if len(name) >= 3)
+        return [{'topic': name, 'links': topic_links} for name, topic_links in links.items()]
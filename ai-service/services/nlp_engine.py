@@ -0,0 +1,233 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from services.mindmap_nodes import KeyConcept, Topic
+
+logger = logging.getLogger(__name__)
+
+REGEX_ENGINE = 'regex'
+SPACY_ENGINE = 'spacy'
+ENGINE_NAMES = (REGEX_ENGINE, SPACY_ENGINE)
+
+# Only tagging and parsing are needed (noun chunks and dependency patterns);
+# everything else is excluded at load time so it costs neither memory nor time
+EXCLUDED_PIPES = ['ner', 'lemmatizer', 'textcat', 'textcat_multilabel', 'senter', 'entity_ruler']
+
+# Verbs that introduce a definition of their subject
+DEFINING_VERBS = {'is', 'are', 'means', 'mean', 'refers', 'refer', 'denotes', 'represents', 'describes'}
+
+# spaCy refuses documents longer than nlp.max_length; sections are split well below it
+MAX_CHUNK_CHARS = 100_000
+
+
+class EngineUnavailableError(Exception):
+    """Raised when an NLP engine is requested but its model cannot be loaded"""
+    pass
+
+
+def _chunk_text(lines: List[str], limit: int = MAX_CHUNK_CHARS) -> List[str]:
+    """Join lines into texts of at most limit characters, breaking only between lines"""
+    chunks = []
+    current = []
+    length = 0
+    for line in lines:
+        if current and length + len(line) + 1 > limit:
+            chunks.append(' '.join(current))
+            current = []
+            length = 0
+        current.append(line[:limit])
+        length += len(line) + 1
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+class SpacyEngine:
+    """
+    Topic and key-concept extraction on a spaCy pipeline.
+
+    Headings still come from the line classifier (they are layout, not
+    language). Within each section, noun chunks fill in subtopics after the
+    explicit bullet points, and definitions are found from the dependency
+    parse (a subject governed by "is", "refers to", "means", ...) rather
+    than from surface patterns. All section texts of a document go through
+    one nlp.pipe call, and the parsed docs serve both topics and concepts.
+
+    The model is loaded once per process on first use (see get_engine) and
+    shared by every request; a missing model raises EngineUnavailableError.
+    """
+
+    def __init__(self, model_name: str = 'en_core_web_sm', batch_size: int = 64):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._nlp = None
+        self._error = None
+        self._load_lock = threading.Lock()
+        # Pipelines are not guaranteed to be safe across threads
+        self._pipe_lock = threading.Lock()
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            with self._load_lock:
+                if self._nlp is None and self._error is None:
+                    self._load()
+        if self._nlp is None:
+            raise EngineUnavailableError(f"spaCy model '{self.model_name}' is not available: {self._error}")
+        return self._nlp
+
+    def _load(self) -> None:
+        # Caller must hold self._load_lock
+        try:
+            import spacy
+            self._nlp = spacy.load(self.model_name, exclude=EXCLUDED_PIPES)
+            logger.info("Loaded spaCy model %s with pipes %s", self.model_name, self._nlp.pipe_names)
+        except Exception as e:
+            self._error = str(e)
+            logger.warning("spaCy engine unavailable: %s", e)
+
+    @property
+    def available(self) -> bool:
+        try:
+            self.nlp
+            return True
+        except EngineUnavailableError:
+            return False
+
+    def analyze(self, sections: List[Tuple[Optional[str], List[str]]], service,
+                topic_limit: int, subtopic_limit: int, concept_limit: int) -> Dict:
+        """
+        Return {'topics', 'key_concepts'} for a document split into sections
+        by service.split_sections, at most topic_limit topics (of at most
+        subtopic_limit subtopics) and concept_limit concepts, like the regex
+        engine. service.build_topic builds the bullet-based topic node that
+        noun chunks are merged into.
+        """
+        texts = []
+        owners = []
+        for index, (_, lines) in enumerate(sections):
+            for chunk in _chunk_text(lines):
+                texts.append(chunk)
+                owners.append(index)
+
+        with self._pipe_lock:
+            docs = list(self.nlp.pipe(texts, batch_size=self.batch_size))
+
+        chunks_by_section = [[] for _ in sections]
+        for owner, doc in zip(owners, docs):
+            chunks_by_section[owner].extend(self._noun_chunks(doc))
+
+        topics = []
+        for (name, lines), chunks in zip(sections, chunks_by_section):
+            if not name or len(topics) >= topic_limit:
+                continue
+            topic = service.build_topic(name, lines[1:], subtopic_limit)
+            self._add_subtopics(topic, chunks, subtopic_limit)
+            topics.append(topic)
+
+        if not topics:
+            chunks = [chunk for section_chunks in chunks_by_section for chunk in section_chunks]
+            topics = [
+                Topic(name, description=service.generate_topic_description(name))
+                for name in self._repeated(chunks)[:topic_limit]
+            ]
+
+        return {
+            'topics': topics,
+            'key_concepts': self._definitions(docs, concept_limit)
+        }
+
+    @staticmethod
+    def _noun_chunks(doc) -> List[str]:
+        chunks = []
+        for chunk in doc.noun_chunks:
+            # Drop leading determiners/pronouns ("the", "these", "our")
+            start = chunk.start
+            while start < chunk.end and doc[start].pos_ in ('DET', 'PRON'):
+                start += 1
+            if start == chunk.end or all(token.is_stop or token.is_punct for token in doc[start:chunk.end]):
+                continue
+            text = doc[start:chunk.end].text.strip()
+            if 5 < len(text) < 100:
+                chunks.append(text)
+        return chunks
+
+    @staticmethod
+    def _ranked(chunks: List[str]) -> List[str]:
+        """Distinct chunks (case-insensitive) by frequency, then first appearance"""
+        counts = {}
+        first = {}
+        for position, chunk in enumerate(chunks):
+            key = chunk.lower()
+            counts[key] = counts.get(key, 0) + 1
+            first.setdefault(key, (position, chunk))
+        order = sorted(counts, key=lambda key: (-counts[key], first[key][0]))
+        return [first[key][1] for key in order]
+
+    def _add_subtopics(self, topic: Topic, chunks: List[str], limit: int) -> None:
+        seen = {subtopic.lower() for subtopic in topic.subtopics}
+        seen.add(topic.name.lower())
+        for chunk in self._ranked(chunks):
+            if len(topic.subtopics) >= limit:
+                break
+            if chunk.lower() not in seen:
+                topic.add_subtopic(chunk)
+                seen.add(chunk.lower())
+
+    def _repeated(self, chunks: List[str]) -> List[str]:
+        """Title-cased chunks seen more than once, most frequent first (for documents without headings)"""
+        counts = {}
+        for chunk in chunks:
+            counts[chunk.lower()] = counts.get(chunk.lower(), 0) + 1
+        return [chunk.title() for chunk in self._ranked(chunks) if counts[chunk.lower()] > 1]
+
+    def _definitions(self, docs, limit: int) -> List[KeyConcept]:
+        concepts = []
+        seen = set()
+        common_words = {'this', 'that', 'these', 'those', 'it', 'the', 'a', 'an'}
+
+        for doc in docs:
+            for sentence in doc.sents:
+                root = sentence.root
+                if root.lower_ not in DEFINING_VERBS:
+                    continue
+                subject = next((child for child in root.children if child.dep_ in ('nsubj', 'nsubjpass')), None)
+                if subject is None or subject.pos_ == 'PRON':
+                    continue
+
+                start = subject.left_edge.i
+                while start < subject.i and doc[start].pos_ == 'DET':
+                    start += 1
+                name_tokens = doc[start:subject.i + 1]
+                if not 1 <= len(name_tokens) <= 4:
+                    continue
+
+                # Description starts after the verb ("refers to": after "to")
+                tail = root.i + 1
+                if root.lower_ in ('refers', 'refer') and tail < sentence.end and doc[tail].lower_ == 'to':
+                    tail += 1
+                description = doc[tail:sentence.end].text.strip().rstrip('.').strip()
+
+                name = name_tokens.text.strip().title()
+                if len(name) < 3 or name.lower() in seen or name.lower() in common_words:
+                    continue
+                if 10 < len(description) < 200:
+                    concepts.append(KeyConcept(name, description[:150]))
+                    seen.add(name.lower())
+                    if len(concepts) >= limit:
+                        return concepts
+        return concepts
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(model_name: str = 'en_core_web_sm', batch_size: int = 64) -> SpacyEngine:
+    """The SpacyEngine for model_name in this process, created once and shared"""
+    with _engines_lock:
+        engine = _engines.get(model_name)
+        if engine is None:
+            engine = _engines[model_name] = SpacyEngine(model_name, batch_size=batch_size)
+        return engine
@@ -0,0 +1,347 @@
+"""
+Content-addressed store of extracted page text, shared by every worker.
+
+Pages are keyed by the digest of their raw content (see page_fingerprints)
+and the backend that extracted them, so a page that recurs across syllabi
+(grading policy, attendance rules, lab safety) is parsed once. The store
+also counts how many different documents each page appeared in; pages seen
+in enough of them are reported as boilerplate.
+
+Evicted pages leave dead bytes in the segment file until it is compacted,
+which happens automatically once the file reaches twice PAGE_STORE_MAX_MB,
+or on demand:
+
+    python -m services.page_store compact /var/lib/campusflow/pages
+    python -m services.page_store stats /var/lib/campusflow/pages
+"""
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows: only writers in this process are serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Fingerprints per SQL statement (SQLite limits bound parameters)
+_QUERY_CHUNK = 500
+
+# Evict down to this share of max_bytes, so the next few inserts do not evict again
+_EVICT_TO = 0.9
+
+
+def _chunks(items: List, size: int = _QUERY_CHUNK) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class PageStore:
+    """
+    Page text in append-only segment files under directory, indexed by a
+    SQLite table of (fingerprint, backend) -> (segment, offset, length).
+    Reads go through a read-only mmap of the segment, so a hit costs one
+    index lookup and a copy of the page's bytes. Writes and compaction take
+    an exclusive lock on the directory; reads never block on them.
+
+    When the live text exceeds max_bytes the least recently used pages are
+    dropped from the index. A page counts as boilerplate once it has been
+    seen in boilerplate_documents documents (0 disables the check).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, boilerplate_documents: int = 5):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.boilerplate_documents = boilerplate_documents
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._maps = {}
+        self._maps_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, opened after any fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'), timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS pages ('
+                'fingerprint TEXT NOT NULL, backend TEXT NOT NULL, segment INTEGER NOT NULL, '
+                '"offset" INTEGER NOT NULL, length INTEGER NOT NULL, last_used REAL NOT NULL, '
+                'PRIMARY KEY (fingerprint, backend)) WITHOUT ROWID'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS sightings ('
+                'fingerprint TEXT NOT NULL, document TEXT NOT NULL, '
+                'PRIMARY KEY (fingerprint, document)) WITHOUT ROWID'
+            )
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('segment', 0), ('live_bytes', 0)")
+            conn.commit()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f'pages-{segment:06d}.dat')
+
+    @staticmethod
+    def _meta(conn: sqlite3.Connection, name: str) -> int:
+        return conn.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()[0]
+
+    @contextmanager
+    def _exclusive(self):
+        """Serialize writers across threads and worker processes"""
+        with self._write_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, 'store.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self, segment: int, offset: int, length: int) -> Optional[bytes]:
+        """Bytes of one page, or None if its segment has been compacted away"""
+        with self._maps_lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or len(mapped) < offset + length:
+                # Segments only grow while current, so remap to see new pages
+                try:
+                    with open(self._segment_path(segment), 'rb') as f:
+                        if os.fstat(f.fileno()).st_size < offset + length:
+                            return None
+                        new_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except OSError:
+                    return None
+                if mapped is not None:
+                    mapped.close()
+                mapped = self._maps[segment] = new_map
+                # Older segments are gone after a compaction; release their maps
+                for old in [old for old in self._maps if old < segment]:
+                    self._maps.pop(old).close()
+            return mapped[offset:offset + length]
+
+    def get_many(self, backend: str, fingerprints: Iterable[str]) -> Dict[str, str]:
+        """fingerprint -> page text for the requested pages already in the store"""
+        wanted = list(dict.fromkeys(fingerprints))
+        if not wanted:
+            return {}
+
+        conn = self._connect()
+        rows = []
+        for chunk in _chunks(wanted):
+            rows.extend(conn.execute(
+                f'SELECT fingerprint, segment, "offset", length FROM pages '
+                f'WHERE backend = ? AND fingerprint IN ({",".join("?" * len(chunk))})',
+                [backend] + chunk
+            ))
+
+        found = {}
+        for fingerprint, segment, offset, length in rows:
+            data = self._read(segment, offset, length)
+            if data is not None:
+                found[fingerprint] = data.decode('utf-8')
+
+        if found:
+            now = time.time()
+            with conn:
+                conn.executemany(
+                    'UPDATE pages SET last_used = ? WHERE fingerprint = ? AND backend = ?',
+                    [(now, fingerprint, backend) for fingerprint in found]
+                )
+        return found
+
+    def put_many(self, backend: str, pages: Dict[str, str]) -> int:
+        """Add page texts (fingerprint -> text) not stored yet; returns how many were added"""
+        if not pages:
+            return 0
+
+        with self._exclusive():
+            conn = self._connect()
+            fingerprints = list(pages)
+            existing = set()
+            for chunk in _chunks(fingerprints):
+                existing.update(row[0] for row in conn.execute(
+                    f'SELECT fingerprint FROM pages '
+                    f'WHERE backend = ? AND fingerprint IN ({",".join("?" * len(chunk))})',
+                    [backend] + chunk
+                ))
+
+            segment = self._meta(conn, 'segment')
+            now = time.time()
+            rows = []
+            added_bytes = 0
+            with open(self._segment_path(segment), 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                for fingerprint, text in pages.items():
+                    if fingerprint in existing:
+                        continue
+                    data = (text or '').encode('utf-8')
+                    f.write(data)
+                    rows.append((fingerprint, backend, segment, offset, len(data), now))
+                    offset += len(data)
+                    added_bytes += len(data)
+                segment_bytes = offset
+
+            if rows:
+                with conn:
+                    conn.executemany('INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?)', rows)
+                    conn.execute("UPDATE meta SET value = value + ? WHERE name = 'live_bytes'", (added_bytes,))
+
+                if self.max_bytes and self._meta(conn, 'live_bytes') > self.max_bytes:
+                    self._evict(conn)
+                if self.max_bytes and segment_bytes > 2 * self.max_bytes:
+                    self._compact(conn)
+            return len(rows)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """Drop least recently used pages until the live text fits again (caller holds the lock)"""
+        excess = self._meta(conn, 'live_bytes') - int(self.max_bytes * _EVICT_TO)
+        victims = []
+        freed = 0
+        for fingerprint, backend, length in conn.execute(
+                'SELECT fingerprint, backend, length FROM pages ORDER BY last_used'):
+            if freed >= excess:
+                break
+            victims.append((fingerprint, backend))
+            freed += length
+
+        with conn:
+            conn.executemany('DELETE FROM pages WHERE fingerprint = ? AND backend = ?', victims)
+            conn.execute("UPDATE meta SET value = value - ? WHERE name = 'live_bytes'", (freed,))
+            # Sightings only matter for pages that may come back through the store
+            conn.execute('DELETE FROM sightings WHERE fingerprint NOT IN (SELECT fingerprint FROM pages)')
+        logger.info("Page store evicted %d pages (%d bytes)", len(victims), freed)
+        return len(victims)
+
+    def compact(self) -> Dict:
+        """Rewrite the live pages into a new segment and delete the old ones"""
+        with self._exclusive():
+            return self._compact(self._connect())
+
+    def _compact(self, conn: sqlite3.Connection) -> Dict:
+        before = self._disk_bytes()
+        segment = self._meta(conn, 'segment') + 1
+        rows = conn.execute(
+            'SELECT fingerprint, backend, segment, "offset", length FROM pages ORDER BY segment, "offset"'
+        ).fetchall()
+
+        moved = []
+        offset = 0
+        with open(self._segment_path(segment), 'wb') as f:
+            for fingerprint, backend, old_segment, old_offset, length in rows:
+                data = self._read(old_segment, old_offset, length)
+                if data is None:
+                    continue
+                f.write(data)
+                moved.append((segment, offset, fingerprint, backend))
+                offset += length
+
+        with conn:
+            conn.executemany(
+                'UPDATE pages SET segment = ?, "offset" = ? WHERE fingerprint = ? AND backend = ?', moved
+            )
+            conn.execute('DELETE FROM pages WHERE segment != ?', (segment,))
+            conn.execute("UPDATE meta SET value = ? WHERE name = 'segment'", (segment,))
+            conn.execute("UPDATE meta SET value = ? WHERE name = 'live_bytes'", (offset,))
+
+        # Readers holding a map of an old segment keep it until they remap
+        for name in os.listdir(self.directory):
+            if name.startswith('pages-') and name != os.path.basename(self._segment_path(segment)):
+                os.remove(os.path.join(self.directory, name))
+
+        after = self._disk_bytes()
+        logger.info("Page store compacted %d pages: %d -> %d bytes", len(moved), before, after)
+        return {'pages': len(moved), 'bytesBefore': before, 'bytesAfter': after}
+
+    def observe(self, fingerprints: List[str]) -> Set[str]:
+        """
+        Record the pages of one document and return those seen in at least
+        boilerplate_documents different documents. A document is identified
+        by its first page, so re-uploads and revisions that keep their cover
+        page are not counted again.
+        """
+        if not self.boilerplate_documents or len(fingerprints) < 2:
+            return set()
+
+        document = hashlib.sha256(fingerprints[0].encode('utf-8')).hexdigest()[:16]
+        distinct = list(dict.fromkeys(fingerprints[1:]))
+        conn = self._connect()
+        with conn:
+            conn.executemany('INSERT OR IGNORE INTO sightings VALUES (?, ?)',
+                             [(fingerprint, document) for fingerprint in distinct])
+
+        boilerplate = set()
+        for chunk in _chunks(distinct):
+            boilerplate.update(row[0] for row in conn.execute(
+                f'SELECT fingerprint FROM sightings WHERE fingerprint IN ({",".join("?" * len(chunk))}) '
+                f'GROUP BY fingerprint HAVING COUNT(*) >= ?',
+                chunk + [self.boilerplate_documents]
+            ))
+        return boilerplate
+
+    def _disk_bytes(self) -> int:
+        return sum(
+            os.path.getsize(os.path.join(self.directory, name))
+            for name in os.listdir(self.directory) if name.startswith('pages-')
+        )
+
+    def stats(self) -> Dict:
+        conn = self._connect()
+        boilerplate = 0
+        if self.boilerplate_documents:
+            boilerplate = conn.execute(
+                'SELECT COUNT(*) FROM (SELECT fingerprint FROM sightings GROUP BY fingerprint HAVING COUNT(*) >= ?)',
+                (self.boilerplate_documents,)
+            ).fetchone()[0]
+        return {
+            'pages': conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0],
+            'liveBytes': self._meta(conn, 'live_bytes'),
+            'diskBytes': self._disk_bytes(),
+            'maxBytes': self.max_bytes,
+            'boilerplatePages': boilerplate
+        }
+
+    @classmethod
+    def from_env(cls) -> Optional['PageStore']:
+        """Store configured by PAGE_STORE_DIR etc. (see .env.example), or None when disabled"""
+        directory = os.getenv('PAGE_STORE_DIR')
+        if not directory:
+            return None
+        return cls(
+            directory,
+            max_bytes=int(os.getenv('PAGE_STORE_MAX_MB', 512)) * 1024 * 1024,
+            boilerplate_documents=int(os.getenv('BOILERPLATE_MIN_DOCUMENTS', 5))
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=('compact', 'stats'))
+    parser.add_argument('directory', nargs='?', default=os.getenv('PAGE_STORE_DIR'))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    if not args.directory:
+        parser.error('no store directory given (or set PAGE_STORE_DIR)')
+    store = PageStore(args.directory, max_bytes=int(os.getenv('PAGE_STORE_MAX_MB', 512)) * 1024 * 1024)
+    result = store.compact() if args.command == 'compact' else store.stats()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,53 +1,466 @@
-import PyPDF2
+import io
+import logging
+import os
 import re
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from services.budget import WorkBudget, stage
+from services.extraction_backends import (
+    UNREADABLE, PdfPlumberBackend, PyPDF2Backend, TextBackend, page_fingerprints, preflight_scan, probe_backend
+)
+from services.memory import PeakRSS
+from services.metrics import metrics
+from services.page_store import PageStore
+from services.text_normalizer import LineNormalizer, normalize_lines
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a backend's pages
+_END = object()
+
+# Newly extracted pages are written to the page store in batches of this size
+STORE_BATCH_PAGES = 32
+
+# Decoded content-stream bytes each backend turns into text per second, for
+# pre-flight cost estimates (measured on the benchmark corpus, one core)
+EXTRACT_BYTES_PER_SECOND = {
+    PyPDF2Backend.name: 900_000,
+    PdfPlumberBackend.name: 25_000,
+    TextBackend.name: 50_000_000
+}
 
 class PDFProcessor:
-    def extract_text(self, pdf_path):
-        """Extract text from PDF file with better structure preservation"""
+    def __init__(self, max_workers=None, parallel_min_pages=32, max_pages=None, max_chars=None,
+                 bounded_memory=False, window_pages=8, page_store: Optional[PageStore] = None,
+                 preflight_pages=3):
+        # Budgets cut extraction off early; results then carry truncated=True
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.bounded_memory = bounded_memory
+        # Optional shared store of page text; pages already in it are not parsed again
+        self.page_store = page_store
+        # Pages whose content streams the pre-flight check samples
+        self.preflight_pages = preflight_pages
+        self.backends = {
+            PyPDF2Backend.name: PyPDF2Backend(
+                max_workers=max_workers or os.cpu_count() or 1,
+                parallel_min_pages=parallel_min_pages,
+                window_pages=window_pages if bounded_memory else None
+            ),
+            PdfPlumberBackend.name: PdfPlumberBackend(),
+            TextBackend.name: TextBackend()
+        }
+    
+    def extract_text(self, source, parallel=None, backend=None):
+        """
+        Extract text from PDF with better structure preservation.
+
+        source may be a file path, a bytes buffer or a readable binary stream
+        (e.g. an uploaded file), so uploads can be parsed without saving them.
+        parallel forces (True) or disables (False) process-pool extraction;
+        by default it is used for long documents. backend selects an
+        extraction backend by name, or probes the document when omitted.
+        """
+        return self.extract(source, parallel=parallel, backend=backend)['text']
+    
+    def extract(self, source, parallel=None, backend=None, budget: Optional[WorkBudget] = None) -> Dict:
+        """
+        Extract text and report which backend ran, how long it took and how
+        much it produced. Also returns the cleaned text split into lines.
+
+        Pages are normalized as they arrive and their raw text is dropped,
+        so only the cleaned lines grow with the document. Extraction stops
+        at the page or character budget (truncated=True), and peak_rss_mb
+        reports the highest resident memory seen between pages. A request's
+        budget adds its deadline and page/character allowance to the limits.
+        
+        With a page store, the result also reports 'stored_pages' (read from
+        the store), 'boilerplate_pages' and 'boilerplate_lines' (the lines of
+        pages the store has seen in many documents, for generate_mindmap).
+        """
         try:
-            text = ""
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                print(f"Processing PDF with {len(pdf_reader.pages)} pages")
-                
-                for page_num, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                
-                print(f"Extracted {len(text)} characters")
+            start = time.perf_counter()
+            rss = PeakRSS()
+            normalizer = LineNormalizer()
+            lines = []
+            boilerplate_lines = []
+            characters = 0
+            page_count = 0
+            truncated = False
+            store_report = {}
             
-            # Clean text while preserving structure
-            text = self.clean_text(text)
-            return text
+            with stage('extract_pages', budget), self.open_source(source) as file:
+                backend_name = self.select_backend(file, backend)
+                pages = self.iter_raw_pages(file, backend_name, parallel, store_report, budget)
+                try:
+                    for page_text, boilerplate in pages:
+                        # Another page exists; stop if the budget is already spent
+                        if self.over_budget(page_count, characters, budget):
+                            truncated = True
+                            break
+                        page_count += 1
+                        if page_text:
+                            page_lines = normalizer.feed(page_text + "\n")
+                            lines.extend(page_lines)
+                            characters += sum(len(line) + 1 for line in page_lines)
+                            if boilerplate:
+                                boilerplate_lines.extend(page_lines)
+                        rss.sample()
+                finally:
+                    pages.close()
+            # The backend stopped at the budget's deadline
+            if budget is not None and budget.truncated:
+                truncated = True
+            
+            max_chars = min(filter(None, (self.max_chars, budget and budget.max_chars)), default=None)
+            if max_chars and characters - 1 > max_chars:
+                lines = self.trim_lines(lines, max_chars)
+                truncated = True
+                if budget is not None and max_chars == budget.max_chars:
+                    budget.truncate('characters')
+            
+            # The line array is handed to MindMapService so it does not need
+            # to re-split or re-clean
+            text = '\n'.join(lines)
+            rss.sample()
+            
+            logger.debug("Extracted %d characters from %d pages with %s", len(text), page_count, backend_name)
+            metrics.document_extracted(backend_name, page_count, len(text), rss.peak)
+            result = {
+                'text': text,
+                'lines': lines,
+                'backend': backend_name,
+                'pages': page_count,
+                'characters': len(text),
+                'truncated': truncated,
+                'peak_rss_mb': rss.as_megabytes(),
+                'seconds': round(time.perf_counter() - start, 4)
+            }
+            if store_report:
+                result.update(store_report, boilerplate_lines=boilerplate_lines)
+            return result
         
         except Exception as e:
             raise Exception(f"Error extracting PDF text: {str(e)}")
     
-    def clean_text(self, text):
-        """Clean extracted text while preserving important structure"""
-        # Normalize line breaks
-        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    def preflight(self, source, backend=None) -> Dict:
+        """
+        Classify a document in a few milliseconds, before extract() parses
+        it: reads only the trailer, the page count and the first pages'
+        content streams (see preflight_scan). Adds 'usable' (not encrypted or
+        corrupt; sampled pages without text may still be followed by text
+        pages) and 'estimated_seconds', the expected extraction time with backend
+        (PyPDF2 when probing) scaled from the sampled pages to the whole
+        document, so callers can reject unusable files and send expensive
+        ones to the background queue.
+        """
+        start = time.perf_counter()
+        with self.open_source(source) as file:
+            report = preflight_scan(file, self.preflight_pages)
         
-        # Remove excessive blank lines (more than 2)
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        if report['format'] == 'text':
+            backend = TextBackend.name
+        elif backend not in (PyPDF2Backend.name, PdfPlumberBackend.name):
+            backend = PyPDF2Backend.name
+        pages = min(report['pages'], self.max_pages) if self.max_pages else report['pages']
+        page_bytes = report['content_bytes'] / max(report['sampled_pages'], 1)
+        report.update(
+            usable=report['kind'] not in UNREADABLE,
+            estimated_seconds=round(page_bytes * pages / EXTRACT_BYTES_PER_SECOND[backend], 3),
+            seconds=round(time.perf_counter() - start, 4)
+        )
+        metrics.document_preflighted(report['kind'])
+        return report
+    
+    def iter_raw_pages(self, file, backend_name: str, parallel=None, report: Optional[Dict] = None,
+                       budget: Optional[WorkBudget] = None) -> Iterator[Tuple[str, bool]]:
+        """
+        Yield (raw page text, is boilerplate) in page order. Without a page
+        store (or for plain text) this is the backend's iter_pages. With one,
+        pages already stored are read from it and only the others are parsed
+        and then added; report, if given, gets 'stored_pages' and
+        'boilerplate_pages'. Parsing stops at budget's deadline.
+        """
+        backend_impl = self.backends[backend_name]
+        store = self.page_store
+        plan = None
+        if store is not None and backend_name != TextBackend.name:
+            try:
+                plan = self._plan_stored_pages(file, backend_name)
+            except Exception as e:
+                # The store only saves work; never fail extraction because of it
+                logger.warning("Page store unavailable, parsing every page: %s", e)
         
-        # Remove page numbers (standalone numbers)
-        text = re.sub(r'\n\s*\d+\s*\n', '\n', text)
+        if plan is None:
+            pages = backend_impl.iter_pages(file, parallel, budget)
+            try:
+                for page_text in pages:
+                    yield page_text, False
+            finally:
+                pages.close()
+            return
         
-        # Remove common PDF artifacts
-        text = re.sub(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+        fingerprints, wanted, stored, boilerplate = plan
+        missing = [i for i, fingerprint in enumerate(wanted) if fingerprint not in stored]
+        metrics.page_store_lookup(backend_name, len(wanted) - len(missing), len(missing))
+        if report is not None:
+            report['stored_pages'] = len(wanted) - len(missing)
+            report['boilerplate_pages'] = sum(1 for fingerprint in wanted if fingerprint in boilerplate)
         
-        # Fix spacing around punctuation
-        text = re.sub(r'\s+([.,;:!?])', r'\1', text)
+        if len(missing) == len(wanted):
+            # Nothing stored - parse normally (in parallel for long documents)
+            parsed = backend_impl.iter_pages(file, parallel, budget)
+        else:
+            parsed = iter([page_text for _, page_text in sorted(backend_impl.extract_pages(file, missing, budget).items())])
         
-        # Normalize multiple spaces to single space (but preserve line breaks)
-        lines = text.split('\n')
-        cleaned_lines = [' '.join(line.split()) for line in lines]
-        text = '\n'.join(cleaned_lines)
+        new_pages = {}
+        try:
+            for fingerprint in wanted:
+                if fingerprint in stored:
+                    page_text = stored[fingerprint]
+                else:
+                    page_text = next(parsed, _END)
+                    if page_text is _END:
+                        # Parsing stopped at the deadline; nothing to store for the rest
+                        break
+                    page_text = page_text or ''
+                    new_pages[fingerprint] = page_text
+                    if len(new_pages) >= STORE_BATCH_PAGES:
+                        self._store_pages(backend_name, new_pages)
+                        new_pages = {}
+                yield page_text, fingerprint in boilerplate
+            if len(fingerprints) > len(wanted):
+                # Past the page budget: only tells the caller another page exists
+                yield '', False
+        finally:
+            if hasattr(parsed, 'close'):
+                parsed.close()
+            self._store_pages(backend_name, new_pages)
+    
+    def _plan_stored_pages(self, file, backend_name: str) -> Tuple[List[str], List[str], Dict[str, str], set]:
+        fingerprints = page_fingerprints(file)
+        boilerplate = self.page_store.observe(fingerprints)
+        # Pages past the page budget are never read
+        wanted = fingerprints[:self.max_pages] if self.max_pages else fingerprints
+        stored = self.page_store.get_many(backend_name, wanted)
+        return fingerprints, wanted, stored, boilerplate
+    
+    def _lookup_pages(self, backend_name: str, fingerprints: List[str]) -> Dict[str, str]:
+        try:
+            return self.page_store.get_many(backend_name, fingerprints)
+        except Exception as e:
+            logger.warning("Page store unavailable, parsing every page: %s", e)
+            return {}
+    
+    def _store_pages(self, backend_name: str, pages: Dict[str, str]) -> None:
+        try:
+            self.page_store.put_many(backend_name, pages)
+        except Exception as e:
+            logger.warning("Could not add %d pages to the page store: %s", len(pages), e)
+    
+    def over_budget(self, pages: int, characters: int, budget: Optional[WorkBudget] = None) -> bool:
+        """True once the page or character budget (or the request's budget) has been used up"""
+        return bool(
+            (self.max_pages and pages >= self.max_pages) or
+            (self.max_chars and characters - 1 >= self.max_chars) or
+            (budget is not None and budget.stops_extraction(pages, characters))
+        )
+    
+    @staticmethod
+    def trim_lines(lines, max_chars):
+        """Keep whole lines while their newline-joined length fits in max_chars"""
+        kept = []
+        length = -1
+        for line in lines:
+            length += len(line) + 1
+            if length > max_chars:
+                break
+            kept.append(line)
+        while kept and not kept[-1]:
+            kept.pop()
+        return kept
+    
+    def extract_incremental(self, source, previous_pages: Optional[Dict[str, str]] = None,
+                            parallel=None, backend=None, budget: Optional[WorkBudget] = None) -> Dict:
+        """
+        Like extract(), but pages whose fingerprint appears in previous_pages
+        (fingerprint -> raw page text from an earlier version of the document)
+        are reused instead of parsed, as are pages found in the page store.
+        The same page, character and budget limits apply (truncated=True).
+        Also returns 'page_fingerprints', 'page_texts' (to pass in next time)
+        and 'pages_reused'.
+        """
+        previous_pages = previous_pages or {}
+        try:
+            start = time.perf_counter()
+            with stage('extract_pages', budget), self.open_source(source) as file:
+                backend_name = self.select_backend(file, backend)
+                fingerprints = page_fingerprints(file)
+                # Pages past the page budget are never read
+                max_pages = min(filter(None, (self.max_pages, budget and budget.max_pages)), default=None)
+                wanted = fingerprints[:max_pages] if max_pages else fingerprints
+                missing = [i for i, fingerprint in enumerate(wanted) if fingerprint not in previous_pages]
+                if missing and self.page_store is not None and backend_name != TextBackend.name:
+                    stored = self._lookup_pages(backend_name, [wanted[i] for i in missing])
+                    previous_pages = dict(previous_pages, **stored)
+                    missing = [i for i in missing if wanted[i] not in stored]
+                
+                backend_impl = self.backends[backend_name]
+                if len(missing) == len(wanted):
+                    # Nothing to reuse - extract normally (in parallel for long documents)
+                    pages = backend_impl.iter_pages(file, parallel, budget)
+                    try:
+                        extracted = dict(zip(range(len(wanted)), pages))
+                    finally:
+                        pages.close()
+                else:
+                    extracted = backend_impl.extract_pages(file, missing, budget) if missing else {}
+            
+            # Pages left unparsed at the deadline end the document
+            available = next((i for i in missing if i not in extracted), len(wanted))
+            raw_pages = [
+                previous_pages[fingerprint] if i not in extracted else (extracted[i] or '')
+                for i, fingerprint in enumerate(wanted[:available])
+            ]
+            if self.page_store is not None and backend_name != TextBackend.name:
+                self._store_pages(backend_name, {wanted[i]: raw_pages[i] for i in extracted if i < available})
+            
+            result = self._finish_extraction(raw_pages, backend_name, start, budget)
+            page_count = result['pages']
+            if page_count < len(fingerprints):
+                result['truncated'] = True
+                if budget is not None and page_count == budget.max_pages:
+                    budget.truncate('pages')
+            result['page_fingerprints'] = fingerprints[:page_count]
+            result['page_texts'] = dict(zip(fingerprints, raw_pages[:page_count]))
+            result['pages_reused'] = sum(1 for i in range(page_count) if i not in extracted)
+            return result
+        
+        except Exception as e:
+            raise Exception(f"Error extracting PDF text: {str(e)}")
+    
+    def _finish_extraction(self, raw_pages, backend_name, start, budget: Optional[WorkBudget] = None) -> Dict:
+        """Normalize raw page texts the way extract() does, within the page and character budgets"""
+        normalizer = LineNormalizer()
+        lines = []
+        characters = 0
+        page_count = 0
+        truncated = False
+        
+        # Clean text while preserving structure; the line array is handed
+        # to MindMapService so it does not need to re-split or re-clean
+        with metrics.stage('clean_text'):
+            for page_text in raw_pages:
+                if self.over_budget(page_count, characters, budget):
+                    truncated = True
+                    break
+                page_count += 1
+                if page_text:
+                    page_lines = normalizer.feed(page_text + "\n")
+                    lines.extend(page_lines)
+                    characters += sum(len(line) + 1 for line in page_lines)
+            
+            max_chars = min(filter(None, (self.max_chars, budget and budget.max_chars)), default=None)
+            if max_chars and characters - 1 > max_chars:
+                lines = self.trim_lines(lines, max_chars)
+                truncated = True
+                if budget is not None and max_chars == budget.max_chars:
+                    budget.truncate('characters')
+            text = '\n'.join(lines)
         
-        return text.strip()
+        logger.debug("Extracted %d characters from %d pages with %s", len(text), page_count, backend_name)
+        metrics.document_extracted(backend_name, page_count, len(text))
+        return {
+            'text': text,
+            'lines': lines,
+            'backend': backend_name,
+            'pages': page_count,
+            'characters': len(text),
+            'truncated': truncated or bool(budget is not None and budget.truncated),
+            'seconds': round(time.perf_counter() - start, 4)
+        }
+    
+    def iter_pages(self, source, parallel=None, backend=None):
+        """
+        Yield cleaned text page by page, in page order, as soon as each page
+        is ready, so topic extraction can start before the last page is parsed.
+        """
+        with self.open_source(source) as file:
+            backend_name = self.select_backend(file, backend)
+            for page_text in self.backends[backend_name].iter_pages(file, parallel):
+                if page_text:
+                    page_text = self.clean_text(page_text)
+                    if page_text:
+                        yield page_text
+    
+    def iter_page_lines(self, source, parallel=None, backend=None, stats: Optional[Dict] = None,
+                        boilerplate_lines: Optional[List[str]] = None):
+        """
+        Yield normalized lines page by page. Together they are exactly the
+        'lines' extract() returns for the document. stats, if given, is
+        filled with 'backend', 'pages', 'characters' and 'truncated' as pages
+        arrive (and the page store counts); the character limit cuts the last
+        page the way extract() cuts its lines. With a page store, the lines of boilerplate
+        pages are also appended to boilerplate_lines before they are yielded.
+        """
+        stats = stats if stats is not None else {}
+        normalizer = LineNormalizer()
+        with self.open_source(source) as file:
+            backend_name = self.select_backend(file, backend)
+            stats.update(backend=backend_name, pages=0, characters=0, truncated=False)
+            pages = self.iter_raw_pages(file, backend_name, parallel, stats)
+            try:
+                for page_text, boilerplate in pages:
+                    if self.over_budget(stats['pages'], stats['characters']):
+                        stats['truncated'] = True
+                        break
+                    stats['pages'] += 1
+                    if page_text:
+                        lines = normalizer.feed(page_text + "\n")
+                        characters = stats['characters']
+                        stats['characters'] += sum(len(line) + 1 for line in lines)
+                        if self.max_chars and stats['characters'] - 1 > self.max_chars:
+                            # Cut the last page like extract() cuts the line array
+                            lines = self.trim_lines(lines, self.max_chars - characters)
+                            stats['characters'] = characters + sum(len(line) + 1 for line in lines)
+                            stats['truncated'] = True
+                        if boilerplate and boilerplate_lines is not None:
+                            boilerplate_lines.extend(lines)
+                        yield lines
+                        if stats['truncated']:
+                            break
+            finally:
+                pages.close()
+        # Lines are newline-joined in extract(), so the last one has no separator
+        stats['characters'] = max(0, stats['characters'] - 1)
+        metrics.document_extracted(backend_name, stats['pages'], stats['characters'])
+    
+    def select_backend(self, file, backend=None):
+        """Resolve a backend name, probing the document when none (or 'auto') is requested"""
+        if not backend or backend == 'auto':
+            return probe_backend(file)
+        if backend not in self.backends:
+            raise ValueError(f"Unknown extraction backend '{backend}'. Available: {', '.join(self.backends)}")
+        return backend
+    
+    @contextmanager
+    def open_source(self, source):
+        """Yield a seekable binary stream for a path, bytes buffer or stream"""
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as file:
+                yield file
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            yield io.BytesIO(source)
+        else:
+            # Caller owns the stream; rewind it but leave it open
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            yield source
+    
+    def clean_text(self, text):
+        """Clean extracted text while preserving important structure"""
+        return '\n'.join(normalize_lines(text))
     
     def extract_topics(self, text):
         """Extract topics from text - kept for backward compatibility"""
@@ -0,0 +1,190 @@
+import itertools
+import json
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Same thresholds and wording as the per-request /api/ai/recommendations route
+PRIORITIES = np.array(['high', 'medium', 'low'], dtype=object)
+PRIORITY_BINS = [50, 75]
+MESSAGE_TEMPLATES = (
+    'Focus on {} - needs significant improvement',
+    'Review {} - moderate improvement needed',
+    'Maintain {} - good performance'
+)
+
+OUTPUT_COLUMNS = ['studentId', 'topic', 'score', 'priority', 'message', 'videoUrl', 'articleUrl']
+STUDENT_COLUMNS = ['studentId', 'topics', 'averageScore', 'high', 'medium', 'low', 'weakestTopic', 'weakestScore']
+# Input without these cannot be scored (a missing score would read as 0, i.e. 'high')
+REQUIRED_COLUMNS = ('topic', 'score')
+
+
+def check_columns(frame: pd.DataFrame) -> None:
+    missing = [name for name in REQUIRED_COLUMNS if name not in frame]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}. Expected studentId, topic and score")
+
+
+def read_columnar_json(payload: Dict) -> pd.DataFrame:
+    """
+    Build a frame from column arrays ({'topic': [...], 'score': [...],
+    'studentId': [...]}) or, for old clients, a 'performance' record list.
+    """
+    if 'performance' in payload:
+        frame = pd.DataFrame.from_records(payload['performance'])
+    else:
+        columns = {name: payload[name] for name in ('studentId', 'topic', 'score') if name in payload}
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('Column arrays must all have the same length')
+        frame = pd.DataFrame(columns)
+    check_columns(frame)
+    return frame
+
+
+def read_csv_chunks(stream, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Read a studentId,topic,score CSV upload a chunk at a time. The first
+    chunk is read at once, so a CSV without the required columns raises
+    ValueError before any output is sent.
+    """
+    chunks = pd.read_csv(
+        stream,
+        chunksize=chunk_size,
+        usecols=lambda column: column in ('studentId', 'topic', 'score'),
+        dtype={'studentId': str, 'topic': str}
+    )
+    first = next(chunks, None)
+    if first is None:
+        return iter(())
+    check_columns(first)
+    return itertools.chain([first], chunks)
+
+
+def split_frame(frame: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(frame), chunk_size):
+        yield frame.iloc[start:start + chunk_size]
+
+
+class RecommendationScorer:
+    """
+    Column-at-a-time study recommendations for whole cohorts.
+
+    Priorities come from one vectorized bucketing of the score column.
+    Messages and resource URLs are built once per distinct topic (a cohort
+    repeats the same few hundred topics across millions of rows) and then
+    gathered by integer code, so no Python object is created per row until
+    the chunk is serialized.
+    """
+
+    def __init__(self, chunk_size: int = 10000):
+        self.chunk_size = chunk_size
+
+    def score(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Add priority, message and resource URL columns to a performance frame"""
+        count = len(frame)
+        topics = frame['topic'].fillna('Unknown').astype(str) if 'topic' in frame else pd.Series(['Unknown'] * count)
+        scores = pd.to_numeric(frame['score'], errors='coerce').fillna(0) if 'score' in frame else pd.Series(np.zeros(count))
+
+        priority_codes = np.digitize(scores.to_numpy(dtype=float), PRIORITY_BINS)
+        topic_codes, unique_topics = pd.factorize(topics, sort=False)
+
+        messages = np.array(
+            [[template.format(topic) for topic in unique_topics] for template in MESSAGE_TEMPLATES],
+            dtype=object
+        ).reshape(len(MESSAGE_TEMPLATES), len(unique_topics))
+        video_urls = np.array(
+            [f"https://www.youtube.com/results?search_query={topic.replace(' ', '+')}" for topic in unique_topics],
+            dtype=object
+        )
+        article_urls = np.array(
+            [f"https://en.wikipedia.org/wiki/{topic.replace(' ', '_')}" for topic in unique_topics],
+            dtype=object
+        )
+
+        result = pd.DataFrame({
+            'studentId': frame['studentId'].to_numpy() if 'studentId' in frame else None,
+            'topic': topics.to_numpy(),
+            'score': scores.to_numpy(),
+            'priority': PRIORITIES[priority_codes],
+            'message': messages[priority_codes, topic_codes],
+            'videoUrl': video_urls[topic_codes],
+            'articleUrl': article_urls[topic_codes]
+        })
+        return result
+
+    def student_partials(self, scored: pd.DataFrame) -> pd.DataFrame:
+        """Per-student sums for one chunk, combined across chunks by aggregate_students"""
+        counts = pd.DataFrame({
+            'studentId': scored['studentId'].to_numpy(),
+            'topics': 1,
+            'scoreSum': scored['score'].to_numpy(),
+            'high': scored['priority'].to_numpy() == 'high',
+            'medium': scored['priority'].to_numpy() == 'medium',
+            'low': scored['priority'].to_numpy() == 'low'
+        })
+        partials = counts.groupby('studentId', sort=False).sum()
+
+        # Lowest-scoring topic per student (first one on ties)
+        ordered = scored.sort_values('score', kind='stable').drop_duplicates('studentId')
+        weakest = ordered.set_index('studentId')
+        partials['weakestTopic'] = weakest['topic']
+        partials['weakestScore'] = weakest['score']
+        return partials
+
+    def aggregate_students(self, partials: List[pd.DataFrame]) -> pd.DataFrame:
+        combined = pd.concat(partials)
+        grouped = combined.groupby(level=0, sort=True)
+        totals = grouped[['topics', 'scoreSum', 'high', 'medium', 'low']].sum()
+
+        # Each student's lowest-scoring topic across all chunks (first one on ties)
+        ordered = combined.reset_index().sort_values('weakestScore', kind='stable').drop_duplicates('studentId')
+        weakest = ordered.set_index('studentId')[['weakestTopic', 'weakestScore']]
+
+        students = totals.join(weakest)
+        students['averageScore'] = (students['scoreSum'] / students['topics']).round(2)
+        students.index.name = 'studentId'
+        return students.reset_index()[STUDENT_COLUMNS]
+
+    def iter_ndjson(self, frames: Iterable[pd.DataFrame], aggregate: bool = False,
+                    include_rows: bool = True) -> Iterator[str]:
+        """
+        Yield NDJSON lines: one columnar chunk of recommendations per input
+        chunk, an optional per-student summary, then a done line.
+        """
+        rows = 0
+        chunks = 0
+        partials = []
+        for frame in frames:
+            if frame.empty:
+                continue
+            scored = self.score(frame)
+            rows += len(scored)
+            if aggregate and scored['studentId'].notna().any():
+                partials.append(self.student_partials(scored.dropna(subset=['studentId'])))
+            if include_rows:
+                yield self._chunk_line('recommendations', rows - len(scored), scored[OUTPUT_COLUMNS])
+                chunks += 1
+
+        students = 0
+        if partials:
+            summary = self.aggregate_students(partials)
+            students = len(summary)
+            for offset, part in enumerate(split_frame(summary, self.chunk_size)):
+                yield self._chunk_line('students', offset * self.chunk_size, part)
+
+        yield json.dumps({'type': 'done', 'rows': rows, 'chunks': chunks, 'students': students}) + '\n'
+
+    @staticmethod
+    def _chunk_line(kind: str, offset: int, frame: pd.DataFrame) -> str:
+        # orient='split' writes column names once per chunk instead of per row
+        body = frame.to_json(orient='split', index=False)
+        return f'{{"type": "{kind}", "offset": {offset}, "rows": {len(frame)}, "table": {body}}}\n'
+
+
+def iter_input_frames(payload: Optional[Dict], csv_stream, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Input chunks from either a CSV upload or a columnar JSON body"""
+    if csv_stream is not None:
+        return read_csv_chunks(csv_stream, chunk_size)
+    return split_frame(read_columnar_json(payload), chunk_size)
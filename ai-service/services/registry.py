@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from services.mindmap_service import MindMapService
+from services.nlp_engine import REGEX_ENGINE, SPACY_ENGINE, EngineUnavailableError, get_engine
+from services.page_store import PageStore
+from services.pdf_processor import PDFProcessor
+from services.resource_linker import ResourceLinker
+from services.topic_ranker import TopicRanker
+
+# Small syllabus pushed through the pipeline during warm-up so regexes,
+# keyword tables and lazily imported backends are ready before real traffic
+WARMUP_SYLLABUS = """Course: Introduction to Data Structures
+Unit 1 Fundamentals of Arrays
+- Definition and properties of arrays
+- Dynamic arrays and resizing
+An array is a contiguous block of memory holding elements of one type.
+Unit 2 Linked Lists
+- Singly linked lists
+Traversal refers to visiting every node of a list exactly once.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """
+    Per-worker home for the long-lived pipeline services.
+
+    PDFProcessor and MindMapService are stateless between requests, so one
+    instance of each is built and warmed per worker process and shared by
+    every request. Nothing here starts threads or processes, so the registry
+    is safe to create before gunicorn forks; warm_up() is meant to run in
+    each worker after the fork (see gunicorn.conf.py).
+    """
+
+    def __init__(self, pdf_workers: Optional[int] = None, resource_index_path: Optional[str] = None,
+                 pdf_options: Optional[Dict] = None, nlp_engine: str = REGEX_ENGINE,
+                 spacy_model: str = 'en_core_web_sm', spacy_batch_size: int = 64,
+                 topic_model_path: Optional[str] = None):
+        self.pdf_workers = pdf_workers
+        self.resource_index_path = resource_index_path
+        # Extra PDFProcessor settings (page/character budgets, bounded memory)
+        self.pdf_options = pdf_options or {}
+        # Default topic/concept engine; requests may still pick the other one
+        self.nlp_engine = nlp_engine
+        self.spacy_model = spacy_model
+        self.spacy_batch_size = spacy_batch_size
+        # Fitted TF-IDF model for topic ranking (positional selection if missing)
+        self.topic_model_path = topic_model_path
+        self._pdf_processor = None
+        self._mindmap_service = None
+        self._lock = threading.Lock()
+        self._warmup_seconds = None
+        self._ready_at = None
+
+    @classmethod
+    def from_env(cls, pdf_workers: Optional[int] = None) -> 'ServiceRegistry':
+        """Registry configured from the service's environment variables (see .env.example)"""
+        return cls(
+            pdf_workers=pdf_workers,
+            resource_index_path=os.getenv('RESOURCE_INDEX_PATH') or None,
+            pdf_options={
+                'max_pages': int(os.getenv('MAX_PAGES', 0)) or None,
+                'max_chars': int(os.getenv('MAX_TEXT_CHARS', 0)) or None,
+                'bounded_memory': os.getenv('BOUNDED_MEMORY', 'false').lower() in ('1', 'true', 'yes'),
+                'preflight_pages': int(os.getenv('PREFLIGHT_SAMPLE_PAGES', 3)),
+                # Opens its index lazily, so it is safe to build before gunicorn forks
+                'page_store': PageStore.from_env()
+            },
+            nlp_engine=os.getenv('NLP_ENGINE', REGEX_ENGINE).lower(),
+            spacy_model=os.getenv('SPACY_MODEL', 'en_core_web_sm'),
+            spacy_batch_size=int(os.getenv('SPACY_BATCH_SIZE', 64)),
+            topic_model_path=os.getenv('TOPIC_RANKER_PATH') or os.path.join(
+                os.getenv('ML_MODEL_PATH', './models'), 'topic_tfidf.joblib')
+        )
+
+    @property
+    def pdf_processor(self) -> PDFProcessor:
+        if self._ready_at is None:
+            self.warm_up()
+        return self._pdf_processor
+
+    @property
+    def mindmap_service(self) -> MindMapService:
+        if self._ready_at is None:
+            self.warm_up()
+        return self._mindmap_service
+
+    def warm_up(self) -> None:
+        """Build the services and run a small document through them (idempotent)"""
+        with self._lock:
+            if self._ready_at is not None:
+                return
+
+            start = time.perf_counter()
+            pdf_processor = PDFProcessor(max_workers=self.pdf_workers, **self.pdf_options)
+            mindmap_service = MindMapService(
+                ResourceLinker(index_path=self.resource_index_path),
+                spacy_engine=get_engine(self.spacy_model, batch_size=self.spacy_batch_size),
+                topic_ranker=TopicRanker.load(self.topic_model_path)
+            )
+
+            # The spaCy model is only loaded up front when it is the default;
+            # a missing model must not take the whole service down
+            if self.nlp_engine == SPACY_ENGINE:
+                try:
+                    mindmap_service.resolve_engine(SPACY_ENGINE)
+                    mindmap_service.default_engine = SPACY_ENGINE
+                except EngineUnavailableError as e:
+                    logger.warning("NLP_ENGINE=spacy is unavailable, using the regex engine: %s", e)
+
+            # Exercise normalization, line classification and concept extraction
+            extraction = pdf_processor.extract(WARMUP_SYLLABUS.encode('utf-8'), backend='text')
+            mindmap_data = mindmap_service.generate_mindmap(extraction['text'], extraction['lines'])
+            mindmap_service.link_resources(mindmap_data['topics'])
+
+            # pdfplumber is imported lazily by its backend; pay the import cost now
+            import pdfplumber  # noqa: F401
+
+            self._pdf_processor = pdf_processor
+            self._mindmap_service = mindmap_service
+            self._warmup_seconds = round(time.perf_counter() - start, 4)
+            self._ready_at = time.time()
+
+    def status(self) -> Dict:
+        return {
+            'ready': self._ready_at is not None,
+            'readyAt': self._ready_at,
+            'warmupSeconds': self._warmup_seconds,
+            'topicRanker': bool(self._mindmap_service and self._mindmap_service.topic_ranker),
+            'pageStore': self.pdf_options.get('page_store') is not None
+        }
@@ -0,0 +1,118 @@
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote, quote_plus
+
+logger = logging.getLogger(__name__)
+
+_SLUG_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_topic(topic: str) -> str:
+    """Index key for a topic name: case- and whitespace-insensitive"""
+    return ' '.join(topic.split()).lower()
+
+
+class ResourceLinker:
+    """
+    Study resource links (video, article, tutorial) for topic names.
+
+    Link sets are built once per distinct topic and kept in a bounded LRU,
+    since the same few thousand topic names recur across every syllabus on
+    campus. An optional precomputed index (JSON mapping topic name to a
+    list of {'type', 'title', 'url'} links) is loaded at startup; curated
+    entries are served in place of the generated search URLs.
+
+    Returned link lists are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = 4096, index_path: Optional[str] = None):
+        self.max_entries = max(0, max_entries)
+        self.index = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        if index_path:
+            self.load_index(index_path)
+
+    def load_index(self, path: str) -> int:
+        """Load curated links from a JSON file and return how many topics it covers"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        index = {}
+        for topic, links in data.items():
+            if not isinstance(links, list) or not all(isinstance(link, dict) and link.get('url') for link in links):
+                raise ValueError(f"Resource index entry for '{topic}' must be a list of links with a 'url'")
+            index[normalize_topic(topic)] = [
+                {'type': link.get('type', 'article'), 'title': link.get('title', topic), 'url': link['url']}
+                for link in links
+            ]
+
+        with self._lock:
+            self.index = index
+            self._entries.clear()
+        logger.info("Loaded curated resources for %d topics from %s", len(index), path)
+        return len(index)
+
+    def links_for(self, topic: str) -> List[Dict]:
+        """Resource links for one topic name"""
+        with self._lock:
+            links = self._entries.get(topic)
+            if links is not None:
+                self._entries.move_to_end(topic)
+                self._hits += 1
+                return links
+            self._misses += 1
+
+        links = self.index.get(normalize_topic(topic)) or self.generate_links(topic)
+
+        with self._lock:
+            if self.max_entries:
+                self._entries[topic] = links
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return links
+
+    def bulk(self, topics: Iterable[str]) -> Dict[str, List[Dict]]:
+        """Resource links for many topics at once, keyed by topic name (duplicates resolved once)"""
+        return {topic: self.links_for(topic) for topic in dict.fromkeys(topics)}
+
+    @staticmethod
+    def generate_links(topic: str) -> List[Dict]:
+        """Search and reference URLs built from the topic name, with proper URL encoding"""
+        slug = _SLUG_SEPARATORS.sub('-', topic.lower()).strip('-')
+        return [
+            {
+                'type': 'video',
+                'title': f'Video Tutorial: {topic}',
+                'url': f"https://www.youtube.com/results?search_query={quote_plus(topic + ' tutorial')}"
+            },
+            {
+                'type': 'article',
+                'title': f'{topic} - Wikipedia',
+                'url': f"https://en.wikipedia.org/wiki/{quote(topic.replace(' ', '_'), safe='_(),-.')}"
+            },
+            {
+                'type': 'tutorial',
+                'title': f'Learn {topic}',
+                'url': f"https://www.geeksforgeeks.org/{slug}/"
+            }
+        ]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'curated_topics': len(self.index),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0
+            }
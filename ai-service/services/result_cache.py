@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from services.nlp_engine import REGEX_ENGINE
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever PDFProcessor or MindMapService output changes so that
+# stale cache entries (including on-disk ones) are never served
+PIPELINE_VERSION = '3'
+
+
+def pipeline_variant(backend: Optional[str] = None, engine: Optional[str] = None) -> Optional[str]:
+    """Cache key variant for a backend override and/or a non-regex topic engine"""
+    parts = [backend, engine if engine != REGEX_ENGINE else None]
+    return '-'.join(part for part in parts if part) or None
+
+
+class ResultCache:
+    """
+    Content-addressed cache for syllabus processing results.
+
+    Entries are keyed by a digest of the uploaded bytes plus the pipeline
+    version. A bounded in-process LRU tier answers repeat uploads from the
+    same worker, and an optional on-disk tier lets results survive worker
+    restarts and be shared between gunicorn workers.
+    """
+
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = None, namespace: Optional[str] = None):
+        self.max_entries = max(0, max_entries)
+        self.disk_dir = disk_dir
+        # Extra key component for results that depend on more than the code,
+        # e.g. the fitted topic ranker model
+        self.namespace = namespace
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def make_key(self, data, variant: Optional[str] = None) -> str:
+        """
+        Build the cache key for an uploaded document (bytes or binary stream).
+        variant separates results produced with non-default options, such as
+        an explicitly requested extraction backend.
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            digest = hashlib.sha256(data).hexdigest()
+        else:
+            # Hash streams in chunks so large uploads are never copied into memory
+            hasher = hashlib.sha256()
+            data.seek(0)
+            for chunk in iter(lambda: data.read(64 * 1024), b''):
+                hasher.update(chunk)
+            data.seek(0)
+            digest = hasher.hexdigest()
+        version = f"v{PIPELINE_VERSION}-{self.namespace}" if self.namespace else f"v{PIPELINE_VERSION}"
+        if variant:
+            return f"{version}-{variant}-{digest}"
+        return f"{version}-{digest}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached entry for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+
+        entry = self._read_disk(key)
+
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._store_memory(key, entry)
+            return entry
+
+    def set(self, key: str, entry: Dict) -> None:
+        """Store an entry in the memory tier and, if enabled, on disk"""
+        with self._lock:
+            self._store_memory(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self) -> None:
+        """Drop every in-memory entry (the disk tier is left untouched)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Counters exposed through the /health endpoint"""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'hit_rate': round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                'disk_enabled': bool(self.disk_dir),
+                'pipeline_version': PIPELINE_VERSION,
+                'namespace': self.namespace
+            }
+
+    def _store_memory(self, key: str, entry: Dict) -> None:
+        # Caller must hold self._lock
+        if self.max_entries == 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, entry: Dict) -> None:
+        if not self.disk_dir:
+            return
+        try:
+            # Write to a temp file and rename so concurrent workers never
+            # read a partially written entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._disk_path(key))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Result cache disk write failed: %s", e)
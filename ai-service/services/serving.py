@@ -0,0 +1,156 @@
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, Optional, Tuple
+
+from services.batch_processor import process_document, take_metrics
+from services.budget import WorkBudget
+from services.metrics import metrics
+
+# Route classes, from most to least expensive per request
+HEAVY = 'heavy'
+BATCH = 'batch'
+LIGHT = 'light'
+
+
+class _RouteClass:
+    def __init__(self, name: str, concurrency: int, queue: int):
+        self.name = name
+        # 0 means unlimited
+        self.concurrency = concurrency
+        self.queue = queue
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.condition = threading.Condition()
+
+    def has_slot(self) -> bool:
+        return not self.concurrency or self.running < self.concurrency
+
+    def report(self) -> None:
+        metrics.route_class_changed(self.name, self.running, self.waiting)
+
+
+class RouteLimiter:
+    """
+    Concurrency limit and wait queue per route class, for threaded workers.
+
+    A request runs once its class has a free slot. Otherwise it waits in
+    the class's queue (up to queue_timeout seconds), and when the queue is
+    full it is turned away at once, so a burst of uploads cannot take every
+    thread of the worker and cheap endpoints keep answering. In-flight and
+    queued counts per class are exported as gauges.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[int, int]], queue_timeout: float = 30):
+        self.queue_timeout = queue_timeout
+        self._classes = {name: _RouteClass(name, concurrency, queue) for name, (concurrency, queue) in limits.items()}
+
+    def acquire(self, name: str) -> bool:
+        """Take a slot for a request of class name; False if the request should be rejected"""
+        route_class = self._classes.get(name)
+        if route_class is None:
+            return True
+        with route_class.condition:
+            if not route_class.has_slot():
+                if route_class.waiting >= route_class.queue:
+                    route_class.rejected += 1
+                    metrics.route_class_rejected(name)
+                    return False
+                route_class.waiting += 1
+                route_class.report()
+                try:
+                    acquired = route_class.condition.wait_for(route_class.has_slot, self.queue_timeout)
+                finally:
+                    route_class.waiting -= 1
+                if not acquired:
+                    route_class.rejected += 1
+                    metrics.route_class_rejected(name)
+                    route_class.report()
+                    return False
+            route_class.running += 1
+            route_class.report()
+            return True
+
+    def release(self, name: str) -> None:
+        route_class = self._classes.get(name)
+        if route_class is None:
+            return
+        with route_class.condition:
+            route_class.running -= 1
+            route_class.report()
+            route_class.condition.notify()
+
+    def stats(self) -> Dict:
+        return {
+            name: {
+                'running': route_class.running,
+                'queued': route_class.waiting,
+                'rejected': route_class.rejected,
+                'concurrency': route_class.concurrency or None,
+                'queue': route_class.queue
+            }
+            for name, route_class in self._classes.items()
+        }
+
+    @classmethod
+    def from_env(cls) -> 'RouteLimiter':
+        """Limits from <CLASS>_CONCURRENCY and <CLASS>_QUEUE (see .env.example)"""
+        defaults = {HEAVY: (2, 4), BATCH: (1, 0), LIGHT: (0, 0)}
+        limits = {
+            name: (
+                int(os.getenv(f'{name.upper()}_CONCURRENCY', concurrency)),
+                int(os.getenv(f'{name.upper()}_QUEUE', queue))
+            )
+            for name, (concurrency, queue) in defaults.items()
+        }
+        return cls(limits, queue_timeout=float(os.getenv('QUEUE_TIMEOUT_SECONDS', 30)))
+
+
+class PipelinePool:
+    """
+    Runs single-document mind-map generation on the batch processor's
+    process pool, so the GIL-bound parse and extraction work of one upload
+    does not slow the other request threads of the worker. At most
+    max_workers uploads use the pool at once, leaving the rest of it to
+    batches; the pool starts on first use (after any fork).
+
+    A request waits at most timeout seconds for its result (less with a
+    budget: its deadline plus DEADLINE_GRACE_SECONDS), so a hung pool
+    process cannot hold the request thread forever. Stage timings recorded
+    in the pool process are replayed into this worker's metrics.
+    """
+
+    # Stages check the deadline before they start, so the last one may run past it
+    DEADLINE_GRACE_SECONDS = 1.0
+
+    def __init__(self, processor, max_workers: int = 2, timeout: Optional[float] = None):
+        self.processor = processor
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def result_timeout(self, budget: Optional[WorkBudget] = None) -> Optional[float]:
+        """Seconds to wait for one document's result (None: no limit)"""
+        remaining = budget.remaining() if budget is not None else None
+        if remaining is None:
+            return self.timeout
+        remaining = max(0.0, remaining) + self.DEADLINE_GRACE_SECONDS
+        return min(remaining, self.timeout) if self.timeout else remaining
+
+    def run(self, data: bytes, backend: Optional[str] = None, engine: Optional[str] = None,
+            budget: Optional[WorkBudget] = None) -> Dict:
+        """
+        The result cache entry ({'text', 'mindmap', 'resources', 'extraction'})
+        for one document. Raises concurrent.futures.TimeoutError when the
+        result does not arrive in time.
+        """
+        timeout = self.result_timeout(budget)
+        with self._slots:
+            future = self.processor.submit(process_document, data, backend, engine, budget)
+            try:
+                return take_metrics(future.result(timeout=timeout))
+            except FutureTimeoutError:
+                # Not started yet: do not leave it for the pool to run anyway
+                future.cancel()
+                raise FutureTimeoutError(f'Mind map generation did not finish within {timeout:.0f}s') from None
@@ -0,0 +1,80 @@
+import re
+from typing import List
+
+# Control characters and common PDF artifacts (line breaks are handled by splitlines)
+_CONTROL_CHARS = dict.fromkeys(
+    [c for c in range(0x00, 0x09)] + [0x0b, 0x0c] + list(range(0x0e, 0x20)) + list(range(0x7f, 0xa0))
+)
+
+# A space left before punctuation once whitespace has been collapsed
+_SPACE_BEFORE_PUNCT = re.compile(r' ([.,;:!?])')
+
+# Page labels and repeated document headers/footers
+_BOILERPLATE = re.compile(r'\bPage\s+\d+\b|\b(?:Syllabus|Course Outline|Table of Contents)\b', re.IGNORECASE)
+
+
+def normalize_lines(text: str) -> List[str]:
+    """
+    Clean extracted text in a single pass while keeping line structure.
+
+    Line breaks are normalized, artifacts are removed, whitespace inside
+    each line is collapsed, standalone page numbers are dropped and runs
+    of blank lines are reduced to one. Returns the cleaned lines, with no
+    leading or trailing blank lines.
+    """
+    return LineNormalizer().feed(text)
+
+
+class LineNormalizer:
+    """
+    normalize_lines for text that arrives in pieces (e.g. page by page).
+    Feeding chunks that each end on a line break produces exactly the
+    lines normalize_lines would return for the whole text; a blank line is
+    only emitted once a following non-blank line confirms it is not trailing.
+    """
+
+    def __init__(self):
+        self.previous_blank = True
+        self.pending_blank = False
+
+    def feed(self, text: str) -> List[str]:
+        lines = []
+        previous_blank = self.previous_blank
+        pending_blank = self.pending_blank
+
+        for line in text.splitlines():
+            line = ' '.join(line.translate(_CONTROL_CHARS).split())
+
+            if not line:
+                if not previous_blank:
+                    pending_blank = True
+                    previous_blank = True
+                continue
+
+            # Remove page numbers (standalone numbers)
+            if line.isdigit():
+                continue
+
+            # Fix spacing around punctuation
+            if ' ' in line:
+                line = _SPACE_BEFORE_PUNCT.sub(r'\1', line)
+
+            if pending_blank:
+                lines.append('')
+                pending_blank = False
+            lines.append(line)
+            previous_blank = False
+
+        self.previous_blank = previous_blank
+        self.pending_blank = pending_blank
+        return lines
+
+
+def strip_boilerplate(lines: List[str]) -> List[str]:
+    """Remove page labels and common headers/footers from normalized lines"""
+    stripped = []
+    for line in lines:
+        if _BOILERPLATE.search(line):
+            line = ' '.join(_BOILERPLATE.sub('', line).split())
+        stripped.append(line)
+    return stripped
@@ -0,0 +1,398 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves from several workers are not serialized
+    fcntl = None
+
+import networkx as nx
+import numpy as np
+
+from services.resource_linker import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+# MinHash over the words of a topic name: 64 permutations in 32 LSH bands of
+# 2 rows, so topic pairs with a word Jaccard of 0.3 become candidates ~95% of
+# the time and pairs at 0.1 only ~27%.
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240601)
+_PERM_A = _rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_PERM_B = _rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+# Words that say where a topic sits in a course rather than what it covers
+STOP_WORDS = {
+    'a', 'an', 'and', 'the', 'of', 'to', 'in', 'on', 'for', 'with', 'by', 'its', 'their',
+    'unit', 'chapter', 'module', 'part', 'section', 'week', 'lecture',
+    'introduction', 'intro', 'basics', 'basic', 'fundamentals', 'advanced', 'overview',
+    'applications', 'application', 'concepts', 'topics'
+}
+
+_WORDS = re.compile(r'[a-z0-9]+')
+
+SNAPSHOT_VERSION = 1
+
+
+def topic_tokens(name: str) -> List[str]:
+    """Content words of a topic name, with a plural 's' stripped ("Graphs" ~ "Graph")"""
+    words = [word for word in _WORDS.findall(name.lower()) if word not in STOP_WORDS]
+    tokens = {word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+              for word in words}
+    return sorted(tokens) or [normalize_topic(name)]
+
+
+def minhash(tokens: Iterable[str]) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of a token set"""
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'little') % _PRIME
+         for token in tokens],
+        dtype=np.uint64
+    )
+    return ((hashes[:, None] * _PERM_A + _PERM_B) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+# Per-band salt so the keys of all bands share one lookup table
+_BAND_SALT = np.arange(BANDS, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """LSH bucket key per band for each row of a signature matrix, shape (rows, BANDS)"""
+    rows = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    keys = rows[..., 0]
+    for row in range(1, ROWS):
+        keys = (keys << np.uint64(32)) | rows[..., row]
+    return keys ^ _BAND_SALT
+
+
+class MinHashLSH:
+    """
+    Banded LSH over MinHash signatures, keyed by topic.
+
+    The bucket keys of every band and topic are kept in one sorted uint64
+    array (with the owning row alongside), so a query is two vectorized
+    searchsorted calls and candidates are verified against a signature
+    matrix in one comparison. Topics added since the last rebuild sit in a
+    small dict overlay until it outgrows an eighth of the arrays; removed
+    topics stay in the arrays until then and are skipped by queries.
+    """
+
+    def __init__(self):
+        self.signatures = {}
+        self._frozen_keys = []
+        self._frozen_signatures = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self._sorted = np.zeros(0, dtype=np.uint64)
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._overlay = {}
+        self._overlay_size = 0
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def add(self, key: str, signature: np.ndarray, index: bool = True) -> None:
+        """Add a topic; with index=False the caller must rebuild() before querying"""
+        self.signatures[key] = signature
+        if not index:
+            return
+        for bucket in band_keys(signature[None, :])[0].tolist():
+            self._overlay.setdefault(bucket, []).append(key)
+        self._overlay_size += 1
+        if self._overlay_size > max(256, len(self._frozen_keys) // 8):
+            self.rebuild()
+
+    def remove(self, key: str) -> None:
+        self.signatures.pop(key, None)
+
+    def rebuild(self) -> None:
+        """Fold the overlay and removals into freshly sorted arrays"""
+        self._frozen_keys = list(self.signatures)
+        if self._frozen_keys:
+            self._frozen_signatures = np.stack([self.signatures[key] for key in self._frozen_keys])
+        else:
+            self._frozen_signatures = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        keys = band_keys(self._frozen_signatures).ravel()
+        order = np.argsort(keys)
+        self._sorted = keys[order]
+        self._rows = (order // BANDS).astype(np.int32)
+        self._overlay = {}
+        self._overlay_size = 0
+
+    def similar(self, signature: np.ndarray, threshold: float) -> List[tuple]:
+        """(estimated Jaccard, key) for indexed topics at or above threshold"""
+        buckets = band_keys(signature[None, :])[0]
+        found = {}
+
+        starts = np.searchsorted(self._sorted, buckets, side='left')
+        ends = np.searchsorted(self._sorted, buckets, side='right')
+        spans = [self._rows[start:end] for start, end in zip(starts.tolist(), ends.tolist()) if end > start]
+        if spans:
+            rows = np.unique(np.concatenate(spans))
+            similarities = (self._frozen_signatures[rows] == signature).mean(axis=1)
+            for row, similarity in zip(rows[similarities >= threshold].tolist(),
+                                       similarities[similarities >= threshold].tolist()):
+                key = self._frozen_keys[row]
+                if key in self.signatures:
+                    found[key] = similarity
+
+        for bucket in buckets.tolist():
+            for key in self._overlay.get(bucket, ()):
+                if key not in found and key in self.signatures:
+                    similarity = float((self.signatures[key] == signature).mean())
+                    if similarity >= threshold:
+                        found[key] = similarity
+
+        return [(similarity, key) for key, similarity in found.items()]
+
+
+class TopicGraph:
+    """
+    Topics of every processed syllabus, linked to the courses that teach them.
+
+    The graph (networkx) has a node per course ('c:<id>') and per normalized
+    topic ('t:<name>'), with an edge wherever a course covers a topic; each
+    new mind map for a course replaces that course's edges. A MinHash/LSH
+    index over topic names (MinHashLSH) answers "related topics in other
+    courses" from one binary search per band plus one small signature
+    comparison, without scanning the graph.
+
+    The graph lives in memory per worker process and is written to a
+    compressed snapshot (numpy .npz: signatures plus the course/topic
+    lists) at most every save_interval seconds. Saving merges the snapshot
+    on disk first (newest update per course wins), so workers sharing a
+    path do not lose each other's courses.
+    """
+
+    def __init__(self, path: Optional[str] = None, save_interval: float = 30.0):
+        self.path = path
+        self.save_interval = save_interval
+        self.graph = nx.Graph()
+        self._index = MinHashLSH()
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_save = time.time()
+        self._snapshot_mtime = None
+        self._last_refresh = time.time()
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, save_interval: float = 30.0) -> 'TopicGraph':
+        graph = cls(path, save_interval)
+        if path and os.path.exists(path):
+            try:
+                graph._merge_snapshot(path)
+                logger.info("Loaded topic graph from %s (%s)", path, graph.stats())
+            except Exception as e:
+                logger.warning("Could not load topic graph snapshot %s: %s", path, e)
+        return graph
+
+    # Updates
+
+    def add_course(self, course_id: str, title: str, topics: List[Dict], updated: Optional[float] = None) -> None:
+        """Record (or replace) the topics a course covers"""
+        course = f"c:{course_id}"
+        with self._lock:
+            if course in self.graph:
+                previous = list(self.graph.neighbors(course))
+                self.graph.remove_edges_from([(course, topic) for topic in previous])
+                self._prune(previous)
+            self.graph.add_node(course, kind='course', id=course_id, title=title, updated=updated or time.time())
+
+            for topic in topics:
+                name = topic.get('name', '').strip()
+                if not name:
+                    continue
+                self._add_topic_edge(course, name)
+            self._dirty = True
+        self.maybe_save()
+
+    def _add_topic_edge(self, course: str, name: str, signature: Optional[np.ndarray] = None,
+                        index: bool = True) -> None:
+        # Caller must hold self._lock
+        key = normalize_topic(name)
+        node = f"t:{key}"
+        if node not in self.graph:
+            self.graph.add_node(node, kind='topic', name=name)
+            self._index.add(key, signature if signature is not None else minhash(topic_tokens(name)), index)
+        self.graph.add_edge(course, node)
+
+    def _prune(self, topics: List[str]) -> None:
+        # Caller must hold self._lock; drops topic nodes no course covers any more
+        for node in topics:
+            if self.graph.degree(node) == 0:
+                self.graph.remove_node(node)
+                self._index.remove(node[2:])
+
+    # Queries
+
+    def refresh(self) -> None:
+        """Merge courses other workers have saved since the last check (at most every save_interval)"""
+        if not self.path or time.time() - self._last_refresh < self.save_interval:
+            return
+        self._last_refresh = time.time()
+        try:
+            if os.path.exists(self.path) and os.path.getmtime(self.path) != self._snapshot_mtime:
+                self._merge_snapshot(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not refresh topic graph from %s: %s", self.path, e)
+
+    def _similar(self, name: str, threshold: float) -> List[tuple]:
+        """(similarity, topic key) pairs for topics whose estimated Jaccard reaches threshold"""
+        signature = self._index.signatures.get(normalize_topic(name))
+        if signature is None:
+            signature = minhash(topic_tokens(name))
+        return self._index.similar(signature, threshold)
+
+    def _courses(self, key: str, only: Optional[set] = None) -> List[Dict]:
+        courses = []
+        for course in self.graph.neighbors(f"t:{key}"):
+            data = self.graph.nodes[course]
+            if only is None or data['id'] in only:
+                courses.append({'id': data['id'], 'title': data['title']})
+        return courses
+
+    def related_topics(self, topic: str, course_id: Optional[str] = None, limit: int = 10,
+                       threshold: float = 0.3) -> List[Dict]:
+        """
+        Topics similar to topic (including the same topic) as taught in
+        courses other than course_id, most similar first.
+        """
+        self.refresh()
+        with self._lock:
+            related = []
+            for similarity, key in sorted(self._similar(topic, threshold), key=lambda pair: (-pair[0], pair[1])):
+                courses = [course for course in self._courses(key) if course['id'] != course_id]
+                if courses:
+                    related.append({
+                        'topic': self.graph.nodes[f"t:{key}"]['name'],
+                        'similarity': round(similarity, 3),
+                        'courses': courses
+                    })
+                    if len(related) >= limit:
+                        break
+            return related
+
+    def course_overlap(self, course_ids: List[str], threshold: float = 0.5) -> List[Dict]:
+        """
+        For each pair of the given courses, the topics of one that match
+        (exactly or by similarity) topics of the other.
+        """
+        self.refresh()
+        with self._lock:
+            wanted = [course_id for course_id in dict.fromkeys(course_ids) if f"c:{course_id}" in self.graph]
+            order = {course_id: index for index, course_id in enumerate(wanted)}
+            pairs = {}
+            for course_id in wanted:
+                for node in self.graph.neighbors(f"c:{course_id}"):
+                    name = self.graph.nodes[node]['name']
+                    for similarity, key in self._similar(name, threshold):
+                        for other in self._courses(key, only=order.keys()):
+                            # Each pair is reported once, from its first course
+                            if order[other['id']] <= order[course_id]:
+                                continue
+                            pairs.setdefault((course_id, other['id']), []).append({
+                                'topic': name,
+                                'relatedTopic': self.graph.nodes[f"t:{key}"]['name'],
+                                'similarity': round(similarity, 3)
+                            })
+
+            return [
+                {
+                    'courses': [first, second],
+                    'topics': sorted(matches, key=lambda match: (-match['similarity'], match['topic']))
+                }
+                for (first, second), matches in pairs.items()
+            ]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            courses = sum(1 for _, kind in self.graph.nodes(data='kind') if kind == 'course')
+            return {
+                'courses': courses,
+                'topics': len(self._index),
+                'edges': self.graph.number_of_edges(),
+                'snapshot': self.path
+            }
+
+    # Snapshots
+
+    def _courses_snapshot(self) -> Dict:
+        # Caller must hold self._lock
+        courses = {}
+        for node, data in self.graph.nodes(data=True):
+            if data['kind'] == 'course':
+                courses[data['id']] = {
+                    'title': data['title'],
+                    'updated': data['updated'],
+                    'topics': [self.graph.nodes[topic]['name'] for topic in self.graph.neighbors(node)]
+                }
+        return courses
+
+    def _merge_snapshot(self, path: str) -> None:
+        """Add courses from a snapshot file that are newer there than here"""
+        with np.load(path) as snapshot:
+            meta = json.loads(snapshot['meta'].tobytes().decode('utf-8'))
+            signatures = snapshot['signatures']
+        if meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {meta.get('version')}")
+
+        stored = dict(zip(meta['topics'], signatures))
+        with self._lock:
+            for course_id, course in meta['courses'].items():
+                node = f"c:{course_id}"
+                if node in self.graph and self.graph.nodes[node]['updated'] >= course['updated']:
+                    continue
+                if node in self.graph:
+                    previous = list(self.graph.neighbors(node))
+                    self.graph.remove_edges_from([(node, topic) for topic in previous])
+                    self._prune(previous)
+                self.graph.add_node(node, kind='course', id=course_id, title=course['title'], updated=course['updated'])
+                for name in course['topics']:
+                    self._add_topic_edge(node, name, stored.get(normalize_topic(name)), index=False)
+            # Topics from the snapshot were added unindexed; index them in one pass
+            self._index.rebuild()
+            self._snapshot_mtime = os.path.getmtime(path)
+
+    def maybe_save(self) -> None:
+        """Save if there are unsaved changes and the save interval has passed"""
+        if self.path and self._dirty and time.time() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self) -> None:
+        """Merge the snapshot on disk into this graph, then write the union back atomically"""
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(f"{self.path}.lock", 'w') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                if os.path.exists(self.path) and os.path.getmtime(self.path) != self._snapshot_mtime:
+                    self._merge_snapshot(self.path)
+
+                with self._lock:
+                    courses = self._courses_snapshot()
+                    topics = list(self._index.signatures)
+                    signatures = (np.stack([self._index.signatures[key] for key in topics]) if topics
+                                  else np.zeros((0, NUM_PERM), dtype=np.uint32))
+                    self._dirty = False
+                    self._last_save = time.time()
+
+                meta = json.dumps({'version': SNAPSHOT_VERSION, 'courses': courses, 'topics': topics})
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez_compressed(f, meta=np.frombuffer(meta.encode('utf-8'), dtype=np.uint8),
+                                        signatures=signatures)
+                os.replace(tmp_path, self.path)
+                self._snapshot_mtime = os.path.getmtime(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning("Topic graph snapshot write failed: %s", e)
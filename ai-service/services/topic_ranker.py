@@ -0,0 +1,209 @@
+"""
+TF-IDF ranking of candidate topics, subtopics and key concepts.
+
+Fit the model once over past syllabi (PDF, TXT or MD files, directories
+of them, or the JSON entries of a RESULT_CACHE_DIR) and save it where the
+service looks for it (TOPIC_RANKER_PATH, default models/topic_tfidf.joblib):
+
+    python -m services.topic_ranker fit syllabi/ --from-cache cache/ --output models/topic_tfidf.joblib
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from services.mindmap_nodes import KeyConcept, Topic
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the vocabulary, so model size and per-request memory stay
+# fixed however many syllabi the model was fitted on
+MAX_FEATURES = 50_000
+
+
+def model_fingerprint(path: Optional[str]) -> Optional[str]:
+    """Short digest of a saved model file, or None if there is none"""
+    if not path:
+        return None
+    try:
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()[:12]
+    except OSError:
+        return None
+
+
+class TopicRanker:
+    """
+    Scores candidate topics, subtopics and key concepts against the document
+    they came from, so the mind map keeps the most distinctive ones instead
+    of the first N by position.
+
+    A candidate's score is the cosine between its TF-IDF vector and the
+    document's. The IDF weights come from a vectorizer fitted once over a
+    corpus of past syllabi, so terms every syllabus shares ("assessment",
+    "introduction") weigh little. A request only transforms its own text
+    and candidates, with all candidates scored in one sparse product. Its
+    cost depends on the document, not on the size of the corpus.
+    """
+
+    def __init__(self, vectorizer, documents: int = 0, fitted_at: Optional[float] = None):
+        self.vectorizer = vectorizer
+        self.documents = documents
+        self.fitted_at = fitted_at
+
+    @classmethod
+    def fit(cls, texts: Sequence[str], max_features: int = MAX_FEATURES) -> 'TopicRanker':
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        vectorizer = TfidfVectorizer(
+            stop_words='english',
+            ngram_range=(1, 2),
+            sublinear_tf=True,
+            max_features=max_features,
+            # With enough syllabi, terms nearly all of them use are boilerplate
+            max_df=0.9 if len(texts) >= 10 else 1.0,
+            dtype=np.float32
+        )
+        vectorizer.fit(texts)
+        return cls(vectorizer, documents=len(texts), fitted_at=time.time())
+
+    def save(self, path: str) -> None:
+        import joblib
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        joblib.dump({
+            'vectorizer': self.vectorizer,
+            'documents': self.documents,
+            'fitted_at': self.fitted_at
+        }, path)
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> Optional['TopicRanker']:
+        """The ranker saved at path, or None (positional selection) if it is missing or unreadable"""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            import joblib
+
+            data = joblib.load(path)
+            ranker = cls(data['vectorizer'], data.get('documents', 0), data.get('fitted_at'))
+            logger.info("Loaded topic ranker from %s (%d syllabi, %d terms)",
+                        path, ranker.documents, len(ranker.vectorizer.vocabulary_))
+            return ranker
+        except Exception as e:
+            logger.warning("Could not load topic ranker from %s: %s", path, e)
+            return None
+
+    def top(self, document, candidates: List[str], limit: int) -> List[int]:
+        """
+        Indices of the limit best-scoring candidates, in their original order
+        (ties keep document order). document is a vector from document_vector().
+        """
+        if len(candidates) <= limit:
+            return list(range(len(candidates)))
+        scores = self.scores(document, candidates)
+        best = np.argsort(-scores, kind='stable')[:limit]
+        return sorted(best.tolist())
+
+    def document_vector(self, text: str):
+        return self.vectorizer.transform([text])
+
+    def scores(self, document, candidates: List[str]) -> np.ndarray:
+        # Rows are L2-normalized by the vectorizer, so the product is a cosine
+        matrix = self.vectorizer.transform(candidates)
+        return (matrix @ document.T).toarray().ravel()
+
+    def rank(self, text: str, topics: List[Topic], key_concepts: List[KeyConcept],
+             max_topics: int, max_subtopics: int, max_concepts: int) -> Dict:
+        """Keep the best topics, subtopics per topic and key concepts for text"""
+        document = self.document_vector(text)
+
+        topic_texts = [' '.join([topic.name] + topic.subtopics) for topic in topics]
+        topics = [topics[i] for i in self.top(document, topic_texts, max_topics)]
+
+        ranked_topics = []
+        for topic in topics:
+            subtopics = topic.subtopics
+            if len(subtopics) > max_subtopics:
+                keep = self.top(document, subtopics, max_subtopics)
+                topic = topic.with_subtopics([subtopics[i] for i in keep])
+            ranked_topics.append(topic)
+
+        concept_texts = [f"{concept.name} {concept.description}" for concept in key_concepts]
+        key_concepts = [key_concepts[i] for i in self.top(document, concept_texts, max_concepts)]
+
+        return {'topics': ranked_topics, 'key_concepts': key_concepts}
+
+
+def iter_corpus(paths: List[str], cache_dirs: List[str]) -> Iterator[str]:
+    """Preprocessed text of every syllabus file under paths and every cached result in cache_dirs"""
+    from services.mindmap_service import MindMapService
+    from services.pdf_processor import PDFProcessor
+
+    pdf_processor = PDFProcessor(max_workers=1)
+    mindmap_service = MindMapService()
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for extension in ('pdf', 'txt', 'md'):
+                files.extend(glob.glob(os.path.join(path, '**', f'*.{extension}'), recursive=True))
+        else:
+            files.append(path)
+
+    for path in sorted(files):
+        try:
+            with open(path, 'rb') as f:
+                extraction = pdf_processor.extract(f)
+        except Exception as e:
+            logger.warning("Skipping %s: %s", path, e)
+            continue
+        yield '\n'.join(mindmap_service.preprocess_lines(extraction['text'], extraction['lines']))
+
+    for cache_dir in cache_dirs:
+        for path in sorted(glob.glob(os.path.join(cache_dir, '*.json'))):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    text = json.load(f).get('text')
+            except (OSError, ValueError, AttributeError):
+                continue
+            if text:
+                yield '\n'.join(mindmap_service.preprocess_lines(text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fit_parser = subparsers.add_parser('fit', help='fit the TF-IDF model over past syllabi and save it')
+    fit_parser.add_argument('paths', nargs='*', help='syllabus files or directories')
+    fit_parser.add_argument('--from-cache', nargs='+', default=[], metavar='DIR',
+                            help='also read extracted text from result cache directories')
+    fit_parser.add_argument('--output', default=os.path.join(os.getenv('ML_MODEL_PATH', './models'), 'topic_tfidf.joblib'))
+    fit_parser.add_argument('--max-features', type=int, default=MAX_FEATURES)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    texts = [text for text in iter_corpus(args.paths, args.from_cache) if text.strip()]
+    if not texts:
+        parser.error('no syllabus text found')
+
+    start = time.perf_counter()
+    ranker = TopicRanker.fit(texts, max_features=args.max_features)
+    ranker.save(args.output)
+    print(f"Fitted on {len(texts)} syllabi ({len(ranker.vectorizer.vocabulary_)} terms) "
+          f"in {time.perf_counter() - start:.2f}s -> {args.output} [{model_fingerprint(args.output)}]")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# Run from anywhere: make the ai-service packages (services, benchmarks) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def client():
+    """Flask test client for the service app (imported once, with its module-level services)"""
+    import app
+    app.app.testing = True
+    return app.app.test_client()
@@ -0,0 +1,52 @@
+import io
+
+import PyPDF2
+import pytest
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+from services.extraction_backends import PdfPlumberBackend, PyPDF2Backend, TextBackend, probe_backend
+from services.pdf_processor import PDFProcessor
+
+PAGES = [['Unit 1: Relational Model', '- Relations and keys'] * 8] * 2
+
+
+def two_column_pdf():
+    """Pages with a left and a right column of lines on alternating baselines"""
+    writer = PyPDF2.PdfWriter()
+    for page in PyPDF2.PdfReader(io.BytesIO(pages_to_pdf(PAGES))).pages:
+        ops = [b'BT /F1 10 Tf']
+        for row in range(12):
+            ops.append(b'1 0 0 1 40 %d Tm (Left column line %d) Tj' % (760 - 24 * row, row))
+            ops.append(b'1 0 0 1 320 %d Tm (Right column line %d) Tj' % (748 - 24 * row, row))
+        ops.append(b'ET')
+        page.get_contents().set_data(b'\n'.join(ops))
+        writer.add_page(page)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def test_probe_picks_a_backend_from_the_layout():
+    assert probe_backend(io.BytesIO(b'Unit 1: Relational Model\n- Keys\n')) == TextBackend.name
+    assert probe_backend(io.BytesIO(pages_to_pdf(PAGES))) == PyPDF2Backend.name
+    assert probe_backend(io.BytesIO(two_column_pdf())) == PdfPlumberBackend.name
+    assert probe_backend(io.BytesIO(b'%PDF-1.4 truncated')) == PyPDF2Backend.name
+
+
+@pytest.mark.parametrize('backend', [PyPDF2Backend.name, PdfPlumberBackend.name])
+def test_pdf_backends_extract_the_same_headings(backend):
+    pdf = pages_to_pdf(generate_pages(pages=2))
+    extraction = PDFProcessor(max_workers=1).extract(pdf, backend=backend)
+
+    assert extraction['backend'] == backend
+    assert 'Unit 1' in extraction['text']
+
+
+def test_unknown_backend_is_rejected(client):
+    with pytest.raises(ValueError):
+        PDFProcessor(max_workers=1).select_backend(io.BytesIO(pages_to_pdf(PAGES)), 'ocr')
+    response = client.post('/generate-mindmap', data={
+        'file': (io.BytesIO(pages_to_pdf(PAGES)), 'syllabus.pdf'), 'backend': 'ocr'
+    })
+
+    assert response.status_code == 400
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+from services.batch_processor import INSUFFICIENT_TEXT_ERROR, PREFLIGHT_ERRORS, BatchProcessor
+from services.extraction_backends import CORRUPT
+
+
+@pytest.fixture
+def processor():
+    processor = BatchProcessor(max_workers=1)
+    yield processor
+    if processor._pool is not None:
+        processor._pool.shutdown(cancel_futures=True)
+
+
+def by_file(results):
+    return {result['file']: result for result in results}
+
+
+def test_failing_documents_do_not_abort_the_batch(processor):
+    results = by_file(processor.iter_results([
+        ('syllabus.pdf', pages_to_pdf(generate_pages(pages=3))),
+        ('broken.pdf', b'%PDF-1.4 not really'),
+        ('short.txt', b'Unit 1')
+    ]))
+
+    assert results['syllabus.pdf']['success']
+    assert results['syllabus.pdf']['data']['mindmap']['topics']
+    assert results['broken.pdf']['error'] == PREFLIGHT_ERRORS[CORRUPT]
+    assert results['short.txt']['error'] == INSUFFICIENT_TEXT_ERROR
+
+
+def test_pool_is_replaced_after_a_process_dies(processor):
+    # A pool process killed mid-document (e.g. by the OOM killer) breaks the executor
+    with pytest.raises(Exception):
+        processor.submit(os._exit, 1).result(timeout=30)
+
+    results = list(processor.iter_results([('syllabus.pdf', pages_to_pdf(generate_pages(pages=2)))]))
+
+    assert results[0]['success'], results[0].get('error')
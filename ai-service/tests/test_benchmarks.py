@@ -0,0 +1,40 @@
+import pytest
+
+from benchmarks.corpus import CASES, build_case, generate_pages
+from benchmarks.pipeline import benchmark_case, compare
+from services.pdf_processor import PDFProcessor
+
+
+def test_corpus_is_deterministic():
+    assert generate_pages(pages=3, seed=5) == generate_pages(pages=3, seed=5)
+    assert generate_pages(pages=3, seed=5) != generate_pages(pages=3, seed=6)
+
+
+@pytest.mark.parametrize('name', ['small', 'numbered-bullets', 'no-periods', 'all-caps'])
+def test_case_pdfs_extract_to_their_text(name):
+    case = build_case(name)
+    processor = PDFProcessor(max_workers=1)
+    extraction = processor.extract(case['pdf'], backend='pypdf2')
+    text_lines = processor.extract(case['text'].encode('utf-8'), backend='text')['lines']
+
+    assert extraction['pages'] == len(case['pages']) == CASES[name]['pages']
+    # Page breaks may add blank lines
+    assert [line for line in extraction['lines'] if line] == [line for line in text_lines if line]
+
+
+def test_benchmark_reports_every_stage():
+    result = benchmark_case('small', repeat=1)
+
+    assert list(result['stages']) == [
+        'extract_text', 'clean_text', 'preprocess_text', 'extract_topics', 'extract_key_concepts', 'link_resources'
+    ]
+    assert result['topics'] > 0
+
+
+def test_compare_flags_regressions_beyond_the_threshold(capsys):
+    def run(seconds):
+        return {'results': {'small': {'stages': {'extract_text': {'seconds': seconds, 'peak_kb': 100.0}}}}}
+
+    assert compare(run(1.0), run(1.1), threshold=0.15) == 0
+    assert compare(run(1.0), run(1.3), threshold=0.15) == 1
+    assert 'REGRESSION' in capsys.readouterr().out
@@ -0,0 +1,57 @@
+import tracemalloc
+
+import pytest
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+from services.mindmap_service import MindMapService
+from services.pdf_processor import PDFProcessor
+
+CHAR_BUDGET = 200_000
+
+# Python heap ceiling for extraction + mind map under the character budget.
+# An unbounded run on the 600-page document peaks at roughly 28 MB.
+MEMORY_CEILING_MB = 8
+
+
+@pytest.fixture(scope='module')
+def large_pdf():
+    return pages_to_pdf(generate_pages(pages=600, lines_per_page=60))
+
+
+def run_pipeline(processor, pdf):
+    tracemalloc.start()
+    try:
+        extraction = processor.extract(pdf)
+        mindmap = MindMapService().generate_mindmap(extraction['text'], extraction['lines'])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return extraction, mindmap, peak / (1024 * 1024)
+
+
+def test_bounded_mode_stays_under_memory_ceiling(large_pdf):
+    processor = PDFProcessor(max_workers=1, max_chars=CHAR_BUDGET, bounded_memory=True)
+    extraction, mindmap, peak_mb = run_pipeline(processor, large_pdf)
+
+    assert extraction['truncated']
+    assert extraction['characters'] <= CHAR_BUDGET
+    assert extraction['pages'] < 600
+    assert mindmap['topics']
+    assert peak_mb < MEMORY_CEILING_MB, f"peak {peak_mb:.1f} MB exceeds {MEMORY_CEILING_MB} MB"
+
+
+def test_page_budget_cuts_extraction_off_early(large_pdf):
+    extraction = PDFProcessor(max_workers=1, max_pages=25, bounded_memory=True).extract(large_pdf)
+
+    assert extraction['pages'] == 25
+    assert extraction['truncated']
+    assert extraction['peak_rss_mb'] is None or extraction['peak_rss_mb'] > 0
+
+
+def test_documents_within_budget_are_not_truncated():
+    pdf = pages_to_pdf(generate_pages(pages=5))
+    bounded = PDFProcessor(max_workers=1, max_pages=5, max_chars=CHAR_BUDGET, bounded_memory=True).extract(pdf)
+    unbounded = PDFProcessor(max_workers=1).extract(pdf)
+
+    assert not bounded['truncated']
+    assert bounded['text'] == unbounded['text']
@@ -0,0 +1,78 @@
+import io
+import uuid
+
+import pytest
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+from services.budget import WorkBudget
+from services.pdf_processor import PDFProcessor
+
+
+@pytest.fixture(scope='module')
+def pdf():
+    return pages_to_pdf(generate_pages(pages=6, lines_per_page=30, seed=7))
+
+
+def test_optional_stages_stop_near_the_deadline():
+    budget = WorkBudget(seconds=10, reserve=0.25)
+
+    assert 9 < budget.remaining() <= 10
+    assert budget.allows('rank_content') and not budget.expired()
+    budget.deadline -= 8
+    assert not budget.allows('rank_content')
+    budget.deadline -= 5
+    assert budget.expired()
+    assert budget.report()['cuts'] == [{'stage': 'rank_content', 'reason': 'deadline'}]
+    assert budget.report()['degraded'] and not budget.report()['truncated']
+
+
+def test_budget_comes_from_the_request_or_the_environment(monkeypatch):
+    monkeypatch.delenv('MINDMAP_DEADLINE_SECONDS', raising=False)
+    monkeypatch.delenv('MINDMAP_MAX_REGEX_CHARS', raising=False)
+    assert WorkBudget.from_env() is None
+    assert WorkBudget.from_env(max_pages=2).max_pages == 2
+
+    monkeypatch.setenv('MINDMAP_DEADLINE_SECONDS', '5')
+    monkeypatch.setenv('MINDMAP_MAX_REGEX_CHARS', '1000')
+    budget = WorkBudget.from_env()
+    assert budget.seconds == 5.0 and budget.max_regex_chars == 1000
+    assert budget.limit_text('topics', 'x' * 2000) == 'x' * 1000
+    assert WorkBudget.from_env(seconds=2).seconds == 2
+
+
+def test_extraction_stops_at_the_page_and_character_allowance(pdf):
+    processor = PDFProcessor(max_workers=1)
+
+    budget = WorkBudget(max_pages=2)
+    result = processor.extract(io.BytesIO(pdf), budget=budget)
+    assert result['pages'] == 2 and result['truncated']
+    assert budget.report()['cuts'] == [{'stage': 'extract_pages', 'reason': 'pages'}]
+
+    budget = WorkBudget(max_chars=500)
+    result = processor.extract(io.BytesIO(pdf), budget=budget)
+    assert len(result['text']) <= 500 and result['truncated']
+
+    assert not processor.extract(io.BytesIO(pdf), budget=WorkBudget(seconds=60))['truncated']
+
+
+@pytest.mark.parametrize('field, value', [('deadlineSeconds', '-1'), ('maxPages', '-2'), ('maxChars', 'many')])
+def test_route_rejects_bad_budgets(client, pdf, field, value):
+    response = client.post('/api/ai/generate-mindmap',
+                           data={'file': (io.BytesIO(pdf), 'syllabus.pdf'), field: value})
+
+    assert response.status_code == 400
+    assert field in response.get_json()['error']
+
+
+def test_route_reports_a_truncated_result(client):
+    # Unique text, so the result cache cannot answer
+    pages = generate_pages(pages=6, lines_per_page=30, seed=7)
+    pages[0] = [f'Course {uuid.uuid4().hex}'] + pages[0]
+    response = client.post('/api/ai/generate-mindmap',
+                           data={'file': (io.BytesIO(pages_to_pdf(pages)), 'syllabus.pdf'), 'maxPages': '2'})
+    data = response.get_json()['data']
+
+    assert response.status_code == 200
+    assert data['extraction']['pages'] == 2
+    assert data['budget']['truncated']
+    assert 'extract_pages' in data['budget']['stageSeconds']
@@ -0,0 +1,28 @@
+import random
+import time
+
+from benchmarks.concept_extractor import adversarial_inputs, fuzz_text, generate_text, legacy_find_definitions
+from services.concept_extractor import ConceptExtractor
+
+
+def test_matches_the_legacy_regexes_on_fuzzed_text():
+    extractor = ConceptExtractor()
+    rng = random.Random(11)
+    texts = [fuzz_text(rng) if i % 2 else generate_text(rng, rng.randint(1, 120)) for i in range(2000)]
+
+    assert [text for text in texts if extractor.find_definitions(text) != legacy_find_definitions(text)] == []
+
+
+def test_matches_the_legacy_regexes_on_adversarial_text():
+    extractor = ConceptExtractor()
+    for name, text in adversarial_inputs(8000):
+        assert extractor.find_definitions(text) == legacy_find_definitions(text), name
+
+
+def test_long_runs_without_periods_stay_fast():
+    # The replaced regexes backtracked from every word of such runs
+    text = ' '.join(['word'] * 100_000) + ' is a ' + 'x' * 200_000
+    start = time.perf_counter()
+    ConceptExtractor().find_definitions(text)
+
+    assert time.perf_counter() - start < 2.0
@@ -0,0 +1,36 @@
+import io
+import os
+
+import pytest
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+from services import extraction_backends
+from services.extraction_backends import PyPDF2Backend
+
+
+@pytest.fixture
+def page_pool():
+    yield
+    if extraction_backends._page_pool is not None:
+        extraction_backends._page_pool.shutdown(cancel_futures=True)
+        extraction_backends._page_pool = None
+
+
+def test_parallel_pages_match_serial_extraction(page_pool):
+    pdf = pages_to_pdf(generate_pages(pages=8))
+    backend = PyPDF2Backend(max_workers=2)
+
+    assert list(backend.iter_pages(io.BytesIO(pdf), parallel=True)) == \
+        list(backend.iter_pages(io.BytesIO(pdf), parallel=False))
+
+
+def test_page_pool_is_replaced_after_a_process_dies(page_pool):
+    pdf = pages_to_pdf(generate_pages(pages=8))
+    backend = PyPDF2Backend(max_workers=2)
+    with pytest.raises(Exception):
+        extraction_backends._get_page_pool(2).submit(os._exit, 1).result(timeout=30)
+
+    pages = list(backend.iter_pages(io.BytesIO(pdf), parallel=True))
+
+    assert len(pages) == 8
+    assert pages == list(backend.iter_pages(io.BytesIO(pdf), parallel=False))
@@ -0,0 +1,55 @@
+from benchmarks.corpus import pages_to_pdf
+from services.incremental import IncrementalGenerator
+from services.mindmap_service import MindMapService
+from services.pdf_processor import PDFProcessor
+from services.result_cache import ResultCache
+
+COVER = ['Course Syllabus: Database Systems', 'Instructor: Dr. Rivera']
+UNIT_ONE = ['Unit 1: Relational Model', '- Relations and keys', '- Relational algebra']
+UNIT_TWO = ['Unit 2: Query Processing', '- Join algorithms', '- Cost estimation']
+
+
+def generator(store):
+    return IncrementalGenerator(PDFProcessor(max_workers=1), MindMapService(), store)
+
+
+def topic_names(result):
+    return [topic['name'] for topic in result['mindmap']['topics']]
+
+
+def test_unchanged_pages_are_reused_and_changes_are_diffed():
+    incremental = generator(ResultCache())
+    first = incremental.regenerate(pages_to_pdf([COVER, UNIT_ONE]), 'db-101')
+    second = incremental.regenerate(pages_to_pdf([COVER, UNIT_ONE, UNIT_TWO]), 'db-101')
+
+    assert first['diff'] is None
+    assert second['reuse']['pagesReused'] == 2
+    assert second['reuse']['pagesExtracted'] == 1
+    assert [topic['name'] for topic in second['diff']['added']] == ['Query Processing']
+    assert second['diff']['removed'] == []
+
+
+def test_revision_that_only_changes_a_form_xobject_is_reparsed():
+    incremental = generator(ResultCache())
+    incremental.regenerate(pages_to_pdf([COVER, UNIT_ONE], form_xobjects=True), 'db-101')
+    revised = incremental.regenerate(pages_to_pdf([COVER, UNIT_TWO], form_xobjects=True), 'db-101')
+
+    assert 'Query Processing' in topic_names(revised)
+    assert revised['reuse']['pagesReused'] == 1
+    assert revised['diff']['removed'] == ['Relational Model']
+
+
+def test_revisions_are_shared_through_the_store_directory(tmp_path):
+    # Two gunicorn workers: separate generators and caches over one directory
+    first_worker = generator(ResultCache(max_entries=0, disk_dir=str(tmp_path)))
+    second_worker = generator(ResultCache(max_entries=0, disk_dir=str(tmp_path)))
+
+    first_worker.regenerate(pages_to_pdf([COVER, UNIT_ONE]), 'db-101')
+    revised = second_worker.regenerate(pages_to_pdf([COVER, UNIT_ONE, UNIT_TWO]), 'db-101')
+    again = first_worker.regenerate(pages_to_pdf([COVER, UNIT_TWO]), 'db-101')
+
+    assert revised['reuse']['previousRevision']
+    assert [topic['name'] for topic in revised['diff']['added']] == ['Query Processing']
+    # The first worker diffs against the second worker's revision, not its own
+    assert again['diff']['removed'] == ['Relational Model']
+    assert again['diff']['added'] == []
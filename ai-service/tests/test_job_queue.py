@@ -0,0 +1,88 @@
+import os
+import pickle
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+from services.batch_processor import INSUFFICIENT_TEXT_ERROR, NO_TOPICS_ERROR
+from services.job_queue import COMPLETED, FAILED, QUEUED, RUNNING, JobQueue, SQLiteJobStore, run_job
+from services.result_cache import ResultCache
+
+NO_TOPICS = b'lorem ipsum dolor sit amet ' * 10
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(max_workers=1)
+    yield queue
+    if queue._pool is not None:
+        queue._pool.shutdown(cancel_futures=True)
+
+
+def wait_for(queue, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in (COMPLETED, FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish within {timeout}s')
+
+
+def test_pool_is_replaced_after_a_process_dies(queue):
+    with queue._lock:
+        killed = queue._get_pool().submit(os._exit, 1)
+    with pytest.raises(Exception):
+        killed.result(timeout=30)
+
+    job = wait_for(queue, queue.submit(pages_to_pdf(generate_pages(pages=2)), 'syllabus.pdf')['id'])
+
+    assert job['status'] == COMPLETED, job['error']
+    assert job['result']['mindmap']['topics']
+
+
+def queued_job(job_id='job-1'):
+    return {'id': job_id, 'status': QUEUED, 'submitted_at': time.time(), 'started_at': None,
+            'queue_seconds': None, 'expires_at': None}
+
+
+def test_document_without_topics_fails_the_job():
+    queue = JobQueue(max_workers=1, cache=ResultCache())
+    try:
+        failed = wait_for(queue, queue.submit(NO_TOPICS, 'notes.txt')['id'])
+        # The second upload is answered from the cache and fails the same way
+        cached = queue.submit(NO_TOPICS, 'notes.txt')
+        short = wait_for(queue, queue.submit(b'Unit 1', 'short.txt')['id'])
+    finally:
+        queue._pool.shutdown()
+
+    assert failed['status'] == FAILED
+    assert failed['error'] == NO_TOPICS_ERROR
+    assert failed['result'] is None
+    assert (cached['status'], cached['error']) == (FAILED, NO_TOPICS_ERROR)
+    assert short['error'] == INSUFFICIENT_TEXT_ERROR
+
+
+def test_pool_process_marks_a_shared_job_running(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / 'jobs.db'))
+    store.save(queued_job())
+
+    # The store travels to the pool process by path
+    run_job(b'Unit 1', None, None, 'job-1', pickle.loads(pickle.dumps(store)))
+    job = store.get('job-1')
+
+    assert job['status'] == RUNNING
+    assert job['started_at'] is not None
+    assert job['queue_seconds'] >= 0
+
+
+def test_memory_job_reports_running_once_the_pool_takes_it(queue):
+    queue.store.save(queued_job())
+    future = Future()
+    queue._futures['job-1'] = future
+
+    assert queue.get('job-1')['status'] == QUEUED
+    future.set_running_or_notify_cancel()
+    assert queue.get('job-1')['status'] == RUNNING
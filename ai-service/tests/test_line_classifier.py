@@ -0,0 +1,36 @@
+import pytest
+
+from benchmarks.line_classifier import generate_lines, legacy_classify
+from services.line_classifier import MAIN_TOPIC, SUBTOPIC, LineClassifier
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return LineClassifier()
+
+
+def test_classifier_matches_the_rules_it_replaced(classifier):
+    lines = generate_lines(5000, seed=7)
+    mismatches = [line for line in lines if classifier.classify(line) != legacy_classify(line)]
+
+    assert mismatches == []
+    assert all(classifier.classify(line, allow_subtopic=False) == legacy_classify(line, allow_subtopic=False)
+               for line in lines[:500])
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('Unit 3: Memory Management', (MAIN_TOPIC, 'Memory Management')),
+    ('CHAPTER 2 - OPERATING SYSTEMS', (MAIN_TOPIC, 'Operating Systems')),
+    ('Introduction to graph theory', (MAIN_TOPIC, 'Introduction to graph theory')),
+    ('- paging and segmentation;', (SUBTOPIC, 'paging and segmentation')),
+    ('    indented detail line', (SUBTOPIC, 'indented detail line')),
+    ('(b) page replacement', (SUBTOPIC, 'page replacement')),
+    ('the kernel schedules threads', (None, None)),
+    ('Abc', (None, None)),
+])
+def test_classify(classifier, line, expected):
+    assert classifier.classify(line) == expected
+
+
+def test_subtopics_need_a_current_topic(classifier):
+    assert classifier.classify('- paging', allow_subtopic=False) == (None, None)
@@ -0,0 +1,60 @@
+import pytest
+
+from services.metrics import Histogram, Metrics
+
+
+def series(registry, name):
+    prefix = f'campusflow_ai_{name}'
+    return [line for line in registry.render().splitlines() if line.startswith(prefix)]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency', 'Latency', buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value, route='/x')
+
+    assert list(histogram.render()) == [
+        'latency_bucket{route="/x",le="0.1"} 1',
+        'latency_bucket{route="/x",le="1"} 3',
+        'latency_bucket{route="/x",le="+Inf"} 4',
+        'latency_sum{route="/x"} 6.05',
+        'latency_count{route="/x"} 4'
+    ]
+
+
+def test_stage_timing_and_failures():
+    registry = Metrics()
+    with registry.stage('extract_pages'):
+        pass
+    with pytest.raises(ValueError):
+        with registry.stage('extract_pages'):
+            raise ValueError('broken page')
+
+    assert 'campusflow_ai_stage_duration_seconds_count{stage="extract_pages"} 2' in series(registry, 'stage_duration')
+    assert series(registry, 'stage_errors_total') == ['campusflow_ai_stage_errors_total{stage="extract_pages"} 1']
+
+
+def test_disabled_registry_records_nothing():
+    registry = Metrics(enabled=False)
+    with registry.stage('extract_pages'):
+        pass
+    registry.request_finished('/x', 'GET', 500, 0.1, 10)
+    registry.document_extracted('pypdf2', 3, 1000)
+
+    assert not [line for line in registry.render().splitlines() if not line.startswith('#')]
+
+
+def test_label_values_are_escaped():
+    registry = Metrics()
+    registry.request_finished('/a"b\\c', 'GET', 200, 0.01, None)
+
+    assert 'campusflow_ai_requests_total{method="GET",route="/a\\"b\\\\c",status="200"} 1' in series(registry, 'requests_total')
+
+
+def test_metrics_route_counts_requests(client):
+    client.get('/health')
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'campusflow_ai_requests_total{method="GET",route="/health",status="200"}' in response.get_data(as_text=True)
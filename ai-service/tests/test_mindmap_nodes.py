@@ -0,0 +1,67 @@
+import datetime
+import json
+
+import pytest
+
+from services import fast_json
+from services.mindmap_nodes import KeyConcept, Topic, concepts_to_dicts, topics_to_dicts
+
+PAYLOAD = {'topics': [{'name': 'Unité 1: Mémoire', 'subtopics': ['Paging'], 'description': ''}],
+           'score': 0.5, 'count': 3, 'ok': True, 'missing': None}
+
+
+def test_nodes_are_slotted():
+    topic = Topic('Virtual Memory')
+    concept = KeyConcept('Page Table', 'maps pages to frames')
+
+    for node in (topic, concept):
+        assert not hasattr(node, '__dict__')
+        with pytest.raises(AttributeError):
+            node.weight = 1
+
+
+def test_subtopics_are_deduplicated_in_order():
+    topic = Topic('Virtual Memory', ['Paging'])
+
+    assert topic.add_subtopic('Segmentation')
+    assert not topic.add_subtopic('Paging')
+    assert topic.subtopics == ['Paging', 'Segmentation']
+    # A trimmed copy keeps its own duplicate check
+    trimmed = topic.with_subtopics(topic.subtopics[:1])
+    assert trimmed.add_subtopic('Segmentation')
+    assert topic.subtopics == ['Paging', 'Segmentation']
+
+
+def test_dicts_keep_the_mind_map_shape():
+    topic = Topic('Virtual Memory', ['Paging'], 'Week 3')
+
+    assert topics_to_dicts([topic]) == [{'name': 'Virtual Memory', 'subtopics': ['Paging'], 'description': 'Week 3'}]
+    assert concepts_to_dicts([KeyConcept('TLB', 'a cache')]) == [{'name': 'TLB', 'description': 'a cache'}]
+    assert Topic.from_dict(topic.to_dict()) == topic
+    assert Topic.from_dict({'name': 'Paging'}) == Topic('Paging')
+
+
+def test_fallback_json_matches_the_json_module(monkeypatch):
+    monkeypatch.setattr(fast_json, 'orjson', None)
+
+    assert fast_json.dumps(PAYLOAD) == json.dumps(PAYLOAD, separators=(',', ':'))
+    assert fast_json.dumps(PAYLOAD, sort_keys=True) == json.dumps(PAYLOAD, separators=(',', ':'), sort_keys=True)
+    assert fast_json.dumps({'at': datetime.date(2024, 1, 2)}) == '{"at":"Tue, 02 Jan 2024 00:00:00 GMT"}'
+
+
+def test_orjson_output_decodes_like_the_json_module():
+    pytest.importorskip('orjson')
+
+    for sort_keys in (False, True):
+        encoded = fast_json.dumps(PAYLOAD, sort_keys=sort_keys)
+        assert json.loads(encoded) == PAYLOAD
+        assert list(json.loads(encoded)) == list(json.loads(json.dumps(PAYLOAD, sort_keys=sort_keys)))
+    # Integers orjson cannot write fall back to the json module
+    assert fast_json.dumps({'big': 2 ** 70}) == '{"big":1180591620717411303424}'
+
+
+def test_jsonify_responses_are_compact(client):
+    response = client.get('/health')
+
+    assert response.is_json
+    assert b'\n ' not in response.data
@@ -0,0 +1,72 @@
+import pytest
+
+from services.mindmap_service import MindMapService
+from services.nlp_engine import EngineUnavailableError, SpacyEngine, _chunk_text, get_engine
+
+
+class StubDoc:
+    noun_chunks = ()
+    sents = ()
+
+
+class StubNLP:
+    """Stands in for a loaded spaCy pipeline: records nlp.pipe calls, parses nothing"""
+
+    def __init__(self):
+        self.calls = []
+
+    def pipe(self, texts, batch_size):
+        texts = list(texts)
+        self.calls.append((len(texts), batch_size))
+        return [StubDoc() for _ in texts]
+
+
+def stub_engine(batch_size=16):
+    engine = SpacyEngine('stub', batch_size=batch_size)
+    engine._nlp = StubNLP()
+    return engine
+
+
+def syllabus_lines(units=20, bullets=12):
+    lines = []
+    for unit in range(1, units + 1):
+        lines.append(f'Unit {unit}: Topic Number {unit}')
+        lines.extend(f'- Detail {bullet} of unit {unit}' for bullet in range(1, bullets + 1))
+    return lines
+
+
+def test_long_sections_are_chunked_between_lines():
+    lines = ['x' * 40] * 10
+
+    chunks = _chunk_text(lines, limit=100)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert ' '.join(chunks) == ' '.join(lines)
+
+
+def test_one_pipe_call_per_document_and_the_callers_limits():
+    engine = stub_engine()
+    service = MindMapService(spacy_engine=engine)
+    analysis = engine.analyze(service.split_sections(syllabus_lines()), service,
+                              topic_limit=30, subtopic_limit=12, concept_limit=5)
+
+    assert engine.nlp.calls == [(20, 16)]
+    assert len(analysis['topics']) == 20
+    assert all(len(topic.subtopics) == 12 for topic in analysis['topics'])
+
+
+def test_spacy_engine_honours_the_service_limits():
+    lines = syllabus_lines()
+    text = '\n'.join(lines)
+    service = MindMapService(spacy_engine=stub_engine(), default_engine='spacy')
+
+    assert service.generate_mindmap(text, lines)['topics'] == MindMapService().generate_mindmap(text, lines)['topics']
+
+
+def test_missing_model_is_reported_on_use():
+    engine = SpacyEngine('no_such_model')
+
+    assert not engine.available
+    with pytest.raises(EngineUnavailableError):
+        engine.nlp
+    assert get_engine('no_such_model') is get_engine('no_such_model')
@@ -0,0 +1,60 @@
+import io
+
+import pytest
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+from services.extraction_backends import page_fingerprints
+from services.page_store import PageStore
+from services.pdf_processor import PDFProcessor
+
+
+def form_pdf(*pages):
+    """Pages whose content is only 'q /Fm0 Do Q'; the text sits in the form XObject"""
+    return pages_to_pdf([list(lines) for lines in pages], form_xobjects=True)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PageStore(str(tmp_path), boilerplate_documents=2)
+
+
+def test_fingerprints_cover_form_xobjects():
+    first = form_pdf(['Unit 1: Relational Algebra', '- Selection'])
+    second = form_pdf(['Unit 1: Operating Systems', '- Scheduling'])
+
+    assert page_fingerprints(io.BytesIO(first)) != page_fingerprints(io.BytesIO(second))
+    assert page_fingerprints(io.BytesIO(first)) == page_fingerprints(io.BytesIO(form_pdf(
+        ['Unit 1: Relational Algebra', '- Selection']
+    )))
+
+
+def test_stored_pages_never_leak_into_another_document(store):
+    processor = PDFProcessor(max_workers=1, page_store=store)
+    first = processor.extract(form_pdf(['Unit 1: Relational Algebra', '- Selection']))
+    second = processor.extract(form_pdf(['Unit 1: Operating Systems', '- Scheduling']))
+
+    assert 'Relational Algebra' in first['text']
+    assert 'Operating Systems' in second['text']
+    assert second['stored_pages'] == 0
+
+
+def test_repeat_extraction_reads_pages_from_the_store(store):
+    pdf = pages_to_pdf(generate_pages(pages=4))
+    processor = PDFProcessor(max_workers=1, page_store=store)
+    first = processor.extract(pdf)
+    second = processor.extract(pdf)
+
+    assert first['stored_pages'] == 0
+    assert second['stored_pages'] == 4
+    assert second['text'] == first['text'] == PDFProcessor(max_workers=1).extract(pdf)['text']
+
+
+def test_boilerplate_needs_the_same_form_content(store):
+    shared = ['Academic Integrity Policy', '- Plagiarism is not tolerated']
+    for course in ('Databases', 'Networks'):
+        store.observe(page_fingerprints(io.BytesIO(form_pdf([f'Unit 1: {course}'], shared))))
+    boilerplate = store.observe(page_fingerprints(io.BytesIO(form_pdf(['Unit 1: Compilers'], shared))))
+    other = store.observe(page_fingerprints(io.BytesIO(form_pdf(['Unit 1: Graphics'], ['Course Schedule']))))
+
+    assert len(boilerplate) == 1
+    assert not other
@@ -0,0 +1,88 @@
+import io
+import json
+
+import PyPDF2
+import pytest
+from PIL import Image
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+from services.batch_processor import PREFLIGHT_ERRORS, BatchProcessor
+from services.extraction_backends import ENCRYPTED, IMAGE_ONLY, TEXT_DOCUMENT
+from services.pdf_processor import PDFProcessor
+
+
+def scanned(pages):
+    """A PDF of blank page images with no text layer, like a scanner produces"""
+    images = [Image.new('RGB', (850, 1100), 'white') for _ in range(pages)]
+    buffer = io.BytesIO()
+    images[0].save(buffer, 'PDF', save_all=True, append_images=images[1:])
+    return buffer.getvalue()
+
+
+def combine(*pdfs, password=None):
+    writer = PyPDF2.PdfWriter()
+    for pdf in pdfs:
+        for page in PyPDF2.PdfReader(io.BytesIO(pdf)).pages:
+            writer.add_page(page)
+    if password:
+        writer.encrypt(password, 'owner')
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope='module')
+def scanned_cover():
+    # Three scanned cover pages (the whole pre-flight sample) before the text
+    return combine(scanned(3), pages_to_pdf(generate_pages(pages=5)))
+
+
+def post(client, data, name='syllabus.pdf'):
+    return client.post('/api/ai/generate-mindmap', data={'file': (io.BytesIO(data), name)})
+
+
+def test_scanned_cover_pages_do_not_reject_the_document(client, scanned_cover):
+    report = PDFProcessor(max_workers=1).preflight(scanned_cover)
+    response = post(client, scanned_cover)
+
+    assert report['kind'] == IMAGE_ONLY
+    assert report['usable']
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['data']['mindmap']['topics']
+
+
+def test_documents_without_any_text_are_still_rejected(client):
+    response = post(client, scanned(4))
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == PREFLIGHT_ERRORS[IMAGE_ONLY]
+
+
+def test_encrypted_documents_are_rejected_before_extraction(client):
+    response = post(client, combine(pages_to_pdf(generate_pages(pages=2)), password='secret'))
+
+    assert response.status_code == 400
+    assert response.get_json()['preflight']['kind'] == ENCRYPTED
+
+
+def test_batch_extracts_documents_with_a_scanned_cover(scanned_cover):
+    processor = BatchProcessor(max_workers=1)
+    try:
+        results = {result['file']: result for result in processor.iter_results([
+            ('cover.pdf', scanned_cover), ('scan.pdf', scanned(2))
+        ])}
+    finally:
+        processor._pool.shutdown()
+
+    assert results['cover.pdf']['success']
+    assert results['scan.pdf']['error'] == PREFLIGHT_ERRORS[IMAGE_ONLY]
+
+
+@pytest.mark.parametrize('encoding', ['utf-16', 'utf-32'])
+def test_wide_text_uploads_pass_the_pre_flight_check(client, encoding):
+    text = '\n'.join(line for page in generate_pages(pages=2) for line in page)
+    report = PDFProcessor(max_workers=1).preflight(text.encode(encoding))
+    response = post(client, text.encode(encoding), name='syllabus.txt')
+
+    assert (report['format'], report['kind']) == ('text', TEXT_DOCUMENT)
+    assert response.status_code == 200, json.dumps(response.get_json())[:200]
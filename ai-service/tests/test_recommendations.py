@@ -0,0 +1,55 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from services.recommendations import RecommendationScorer, read_columnar_json, read_csv_chunks, split_frame
+
+PERFORMANCE = [
+    {'studentId': 's1', 'topic': 'Graph Theory', 'score': 42},
+    {'studentId': 's1', 'topic': 'Sorting', 'score': 80},
+    {'studentId': 's2', 'topic': 'Graph Theory', 'score': 60},
+    {'studentId': 's2', 'topic': 'Paging', 'score': 75},
+]
+
+
+def read_lines(lines):
+    return [json.loads(line) for line in lines]
+
+
+def test_scores_match_the_per_request_route(client):
+    legacy = client.post('/api/ai/recommendations', json={'performance': PERFORMANCE}).get_json()['data']
+    scored = RecommendationScorer().score(pd.DataFrame(PERFORMANCE))
+
+    assert list(scored['priority']) == [item['priority'] for item in legacy] == ['high', 'low', 'medium', 'low']
+    assert list(scored['message']) == [item['message'] for item in legacy]
+    assert [list(pair) for pair in zip(scored['videoUrl'], scored['articleUrl'])] == [item['resources'] for item in legacy]
+
+
+def test_student_summaries_combine_chunks():
+    frame = read_columnar_json({key: [row[key] for row in PERFORMANCE] for key in ('studentId', 'topic', 'score')})
+    lines = read_lines(RecommendationScorer(chunk_size=3).iter_ndjson(split_frame(frame, 3), aggregate=True))
+    students = [line for line in lines if line['type'] == 'students'][0]['table']
+    summary = {row[0]: dict(zip(students['columns'], row)) for row in students['data']}
+
+    assert lines[-1] == {'type': 'done', 'rows': 4, 'chunks': 2, 'students': 2}
+    assert summary['s1']['averageScore'] == 61.0
+    assert summary['s2']['weakestTopic'] == 'Graph Theory'
+    assert (summary['s1']['high'], summary['s2']['medium']) == (1, 1)
+
+
+@pytest.mark.parametrize('payload', [{'topic': ['Sorting']}, {'performance': [{'topic': 'Sorting'}]}])
+def test_input_without_scores_is_rejected(payload):
+    with pytest.raises(ValueError, match='score'):
+        read_columnar_json(payload)
+
+
+def test_csv_without_required_columns_is_rejected_up_front(client):
+    with pytest.raises(ValueError, match='topic'):
+        read_csv_chunks(io.StringIO('studentId,score\ns1,40\n'), chunk_size=10)
+    response = client.post('/api/ai/recommendations/batch', data={
+        'file': (io.BytesIO(b'studentId,score\ns1,40\n'), 'scores.csv')
+    })
+
+    assert response.status_code == 400
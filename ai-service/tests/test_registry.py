@@ -0,0 +1,48 @@
+import threading
+
+from services import registry as registry_module
+from services.registry import ServiceRegistry
+
+
+def test_services_are_built_once_and_shared():
+    registry = ServiceRegistry(pdf_workers=1)
+    assert not registry.status()['ready']
+
+    processor = registry.pdf_processor
+    service = registry.mindmap_service
+    registry.warm_up()
+
+    assert registry.status()['ready']
+    assert registry.status()['warmupSeconds'] >= 0
+    assert registry.pdf_processor is processor
+    assert registry.mindmap_service is service
+
+
+def test_concurrent_first_requests_share_one_warm_up(monkeypatch):
+    built = []
+    real_processor = registry_module.PDFProcessor
+
+    def counting_processor(*args, **kwargs):
+        built.append(1)
+        return real_processor(*args, **kwargs)
+
+    monkeypatch.setattr(registry_module, 'PDFProcessor', counting_processor)
+    registry = ServiceRegistry(pdf_workers=1)
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(registry.pdf_processor)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert all(processor is seen[0] for processor in seen)
+
+
+def test_ready_route_reports_the_warm_up(client):
+    from app import registry
+    registry.warm_up()
+    response = client.get('/ready')
+
+    assert response.status_code == 200
+    assert response.get_json()['ready']
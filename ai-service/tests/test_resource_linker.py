@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from services.mindmap_service import MindMapService
+from services.resource_linker import ResourceLinker
+
+
+def test_links_are_built_once_per_topic():
+    linker = ResourceLinker(max_entries=2)
+    first = linker.links_for('Graph Theory')
+
+    assert linker.links_for('Graph Theory') is first
+    assert linker.bulk(['Paging', 'Paging', 'Graph Theory']).keys() == {'Paging', 'Graph Theory'}
+    assert linker.stats()['hits'] == 2
+    linker.links_for('Sorting')
+    # Graph Theory was used last, so Paging is dropped
+    assert list(linker._entries) == ['Graph Theory', 'Sorting']
+
+
+def test_generated_urls_are_encoded():
+    links = {link['type']: link['url'] for link in ResourceLinker.generate_links('C++ & Rust')}
+
+    assert links['video'] == 'https://www.youtube.com/results?search_query=C%2B%2B+%26+Rust+tutorial'
+    assert links['article'] == 'https://en.wikipedia.org/wiki/C%2B%2B_%26_Rust'
+    assert links['tutorial'] == 'https://www.geeksforgeeks.org/c-rust/'
+
+
+def test_curated_index_replaces_generated_links(tmp_path):
+    path = tmp_path / 'resources.json'
+    path.write_text(json.dumps({'Graph  theory': [{'url': 'https://example.edu/graphs', 'title': 'Graphs'}]}))
+    linker = ResourceLinker(index_path=str(path))
+
+    assert linker.links_for('graph Theory') == [{'type': 'article', 'title': 'Graphs', 'url': 'https://example.edu/graphs'}]
+    path.write_text(json.dumps({'Graphs': [{'title': 'no url'}]}))
+    with pytest.raises(ValueError):
+        linker.load_index(str(path))
+
+
+def test_mind_maps_and_find_references_share_the_linker(client):
+    from app import registry
+    linker = registry.mindmap_service.resource_linker
+    mindmap_links = MindMapService(linker).link_resources([{'name': 'Dynamic Programming'}])
+    response = client.post('/api/ai/find-references', json={'topics': ['Dynamic Programming']})
+
+    assert response.get_json()['data'][0]['resources'] == mindmap_links[0]['links']
+    assert linker.stats()['hits'] >= 1
@@ -0,0 +1,49 @@
+import io
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+from services.result_cache import ResultCache, pipeline_variant
+
+
+def test_keys_depend_on_content_and_options_only():
+    cache = ResultCache()
+    pdf = pages_to_pdf(generate_pages(pages=2))
+
+    assert cache.make_key(pdf) == cache.make_key(io.BytesIO(pdf))
+    assert cache.make_key(pdf) != cache.make_key(pdf + b'\n')
+    assert cache.make_key(pdf, variant=pipeline_variant('pdfplumber')) != cache.make_key(pdf)
+    # The default engine shares entries with requests that do not name one
+    assert pipeline_variant(None, 'regex') is None
+    assert ResultCache(namespace='ranker-1').make_key(pdf) != cache.make_key(pdf)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.set('a', {'n': 1})
+    cache.set('b', {'n': 2})
+    cache.get('a')
+    cache.set('c', {'n': 3})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'n': 1}
+    assert cache.stats()['evictions'] == 1
+
+
+def test_disk_tier_is_shared_between_caches(tmp_path):
+    ResultCache(disk_dir=str(tmp_path)).set('key', {'mindmap': {'topics': []}})
+    other = ResultCache(disk_dir=str(tmp_path))
+
+    assert other.get('key') == {'mindmap': {'topics': []}}
+    assert other.stats()['disk_hits'] == 1
+
+
+def test_repeat_upload_is_served_from_the_cache(client):
+    from app import result_cache
+    pdf = pages_to_pdf(generate_pages(pages=3, seed=101))
+
+    first = client.post('/generate-mindmap', data={'file': (io.BytesIO(pdf), 'syllabus.pdf')})
+    hits = result_cache.stats()['hits']
+    second = client.post('/generate-mindmap', data={'file': (io.BytesIO(pdf), 'syllabus.pdf')})
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert result_cache.stats()['hits'] == hits + 1
@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import pytest
+
+from services.budget import WorkBudget
+from services.metrics import metrics
+from services.serving import HEAVY, LIGHT, PipelinePool, RouteLimiter
+
+
+class FakeProcessor:
+    """Stands in for BatchProcessor: submit() returns a future the test controls"""
+
+    def __init__(self, entry=None):
+        self.entry = entry
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+        future = Future()
+        if self.entry is not None:
+            future.set_result(dict(self.entry))
+        return future
+
+
+def stage_count(name):
+    prefix = f'campusflow_ai_stage_duration_seconds_count{{stage="{name}"}} '
+    for line in metrics.render().splitlines():
+        if line.startswith(prefix):
+            return int(float(line[len(prefix):]))
+    return 0
+
+
+def test_full_route_class_rejects_instead_of_queueing():
+    limiter = RouteLimiter({HEAVY: (1, 0), LIGHT: (0, 0)}, queue_timeout=0.1)
+
+    assert limiter.acquire(HEAVY)
+    assert not limiter.acquire(HEAVY)
+    assert limiter.acquire(LIGHT)
+    limiter.release(HEAVY)
+    assert limiter.acquire(HEAVY)
+    assert limiter.stats()[HEAVY]['rejected'] == 1
+
+
+def test_queued_request_runs_once_a_slot_frees():
+    limiter = RouteLimiter({HEAVY: (1, 1)}, queue_timeout=5)
+    limiter.acquire(HEAVY)
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(limiter.acquire(HEAVY)))
+    waiter.start()
+    limiter.release(HEAVY)
+    waiter.join(5)
+
+    assert acquired == [True]
+
+
+def test_pool_stage_timings_reach_this_process():
+    events = [('stage_finished', ('pool_test_stage', 0.25, False))]
+    pool = PipelinePool(FakeProcessor({'text': 'x', 'metrics': events}), timeout=5)
+    before = stage_count('pool_test_stage')
+    entry = pool.run(b'%PDF-')
+
+    assert 'metrics' not in entry
+    assert stage_count('pool_test_stage') == before + 1
+
+
+def test_hung_pool_process_times_out_with_the_budget(monkeypatch):
+    pool = PipelinePool(FakeProcessor(), timeout=30)
+    budget = WorkBudget(seconds=0.1)
+
+    assert pool.result_timeout(budget) <= 0.1 + PipelinePool.DEADLINE_GRACE_SECONDS
+    assert pool.result_timeout(None) == 30
+    monkeypatch.setattr(PipelinePool, 'DEADLINE_GRACE_SECONDS', 0.0)
+    with pytest.raises(FutureTimeoutError):
+        pool.run(b'%PDF-', budget=budget)
+    # The slot is free again for the next upload
+    assert pool._slots.acquire(blocking=False)
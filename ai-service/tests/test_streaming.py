@@ -0,0 +1,52 @@
+import io
+import json
+
+import pytest
+
+from benchmarks.corpus import build_case, generate_pages, pages_to_pdf
+from services.mindmap_service import MindMapService
+from services.pdf_processor import PDFProcessor
+
+
+def ndjson_events(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+@pytest.mark.parametrize('name', ['small', 'dense-headings', 'no-structure'])
+def test_streamed_mind_map_matches_generate_mindmap(name):
+    pdf = build_case(name)['pdf']
+    processor = PDFProcessor(max_workers=1)
+    service = MindMapService()
+    extraction = processor.extract(pdf, backend='pypdf2')
+
+    events = list(service.iter_mindmap(processor.iter_page_lines(pdf, backend='pypdf2')))
+
+    assert events[-1] == ('mindmap', service.generate_mindmap(extraction['text'], extraction['lines']))
+    assert [data for event, data in events if event == 'topic'] == events[-1][1]['topics']
+
+
+def test_route_streams_topics_before_the_summary(client):
+    pdf = pages_to_pdf(generate_pages(pages=4, seed=21))
+    response = client.post('/generate-mindmap/stream', data={'file': (io.BytesIO(pdf), 'syllabus.pdf')})
+    events = ndjson_events(response)
+    names = [event['event'] for event in events]
+    full = client.post('/generate-mindmap', data={'file': (io.BytesIO(pdf), 'syllabus.pdf')}).get_json()
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert names[0] == 'course_info'
+    assert names[-2:] == ['resources', 'done']
+    assert [event['data']['name'] for event in events if event['event'] == 'topic'] == \
+        [topic['name'] for topic in full['topics']]
+
+
+def test_sse_format_and_error_events(client):
+    response = client.post('/generate-mindmap/stream', headers={'Accept': 'text/event-stream'},
+                           data={'file': (io.BytesIO(b'Unit 1'), 'notes.txt')})
+    body = response.get_data(as_text=True)
+
+    assert response.mimetype == 'text/event-stream'
+    assert body.startswith('event: course_info\ndata: ')
+    assert 'event: error\ndata: ' in body
+    assert client.post('/generate-mindmap/stream', data={
+        'file': (io.BytesIO(b'Unit 1'), 'notes.txt'), 'format': 'xml'
+    }).status_code == 400
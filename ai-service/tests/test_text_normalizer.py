@@ -0,0 +1,32 @@
+from benchmarks.corpus import generate_pages, pages_to_text
+from services.mindmap_service import MindMapService
+from services.text_normalizer import LineNormalizer, normalize_lines, strip_boilerplate
+
+
+def test_lines_survive_cleaning():
+    text = '\n\n Unit 1:\tRelational   Model \r\n- Keys ,\x07 and joins\n\n\n\n12\n- Algebra\n\n'
+
+    assert normalize_lines(text) == ['Unit 1: Relational Model', '- Keys, and joins', '', '- Algebra']
+
+
+def test_page_by_page_feeding_matches_the_whole_text():
+    pages = ['\n'.join(lines) + '\n\n' for lines in generate_pages(pages=6, seed=3)]
+    normalizer = LineNormalizer()
+    fed = [line for page in pages for line in normalizer.feed(page)]
+
+    assert fed == normalize_lines(''.join(pages))
+
+
+def test_boilerplate_labels_are_stripped():
+    assert strip_boilerplate(['Course Syllabus Page 3', 'Unit 2: Networks']) == ['Course', 'Unit 2: Networks']
+
+
+def test_topics_come_from_the_line_structure():
+    text = pages_to_text([[
+        'Unit 1: Relational Model', '- Relations and keys',
+        'Unit 2: Query Processing', '- Join algorithms'
+    ]])
+    mindmap = MindMapService().generate_mindmap(text, normalize_lines(text))
+
+    assert [topic['name'] for topic in mindmap['topics']] == ['Relational Model', 'Query Processing']
+    assert mindmap['topics'][0]['subtopics'] == ['Relations and keys']
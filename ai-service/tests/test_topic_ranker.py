@@ -0,0 +1,50 @@
+import pytest
+
+from services.mindmap_nodes import KeyConcept, Topic
+from services.mindmap_service import MAX_KEY_CONCEPTS, MAX_SUBTOPICS, MAX_TOPICS, MindMapService
+from services.topic_ranker import TopicRanker
+
+BOILERPLATE = 'Course policies: attendance, grading and academic integrity.'
+SUBJECTS = ['virtual memory paging', 'deadlock detection', 'process scheduling', 'file systems',
+            'relational algebra', 'query optimization', 'graph traversal', 'dynamic programming',
+            'linear regression', 'neural networks', 'compiler parsing', 'type inference']
+
+
+@pytest.fixture(scope='module')
+def ranker():
+    # Every syllabus carries the boilerplate; each has its own subject
+    texts = [f'{BOILERPLATE} This course covers {subject}. {subject.title()} in depth.' for subject in SUBJECTS]
+    return TopicRanker.fit(texts)
+
+
+def test_distinctive_candidates_beat_boilerplate(ranker):
+    document = ranker.document_vector(f'{BOILERPLATE} Deadlock detection and virtual memory paging.')
+    candidates = ['Deadlock Detection', 'Attendance and Grading', 'Virtual Memory Paging']
+
+    # The two best, kept in document order rather than score order
+    assert ranker.top(document, candidates, 2) == [0, 2]
+    assert ranker.top(document, candidates, 5) == [0, 1, 2]
+
+
+def test_saved_model_round_trips(ranker, tmp_path):
+    path = str(tmp_path / 'models' / 'topic_tfidf.joblib')
+    ranker.save(path)
+    loaded = TopicRanker.load(path)
+
+    assert loaded.documents == len(SUBJECTS)
+    assert loaded.vectorizer.vocabulary_ == ranker.vectorizer.vocabulary_
+    assert TopicRanker.load(str(tmp_path / 'missing.joblib')) is None
+
+
+def test_ranked_mind_map_keeps_its_size(ranker):
+    topics = [Topic(f'Unit {i}', subtopics=[f'Reading {j}' for j in range(12)]) for i in range(40)]
+    topics[30] = Topic('Deadlock Detection', subtopics=['Deadlock avoidance'])
+    concepts = [KeyConcept(f'Term {i}', 'see the notes') for i in range(30)]
+    text = 'Deadlock detection finds cycles in the wait-for graph.'
+    kept_topics, kept_concepts = MindMapService(topic_ranker=ranker).rank_content(text, topics, concepts)
+
+    assert len(kept_topics) == MAX_TOPICS
+    assert all(len(topic.subtopics) <= MAX_SUBTOPICS for topic in kept_topics)
+    assert len(kept_concepts) == MAX_KEY_CONCEPTS
+    # Found by its score, not by its position
+    assert 'Deadlock Detection' in [topic.name for topic in kept_topics]
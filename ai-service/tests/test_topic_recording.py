@@ -0,0 +1,43 @@
+import io
+import json
+import uuid
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+
+
+def course_ids():
+    from app import topic_graph
+    with topic_graph._lock:
+        return set(topic_graph._courses_snapshot())
+
+
+def upload(name, pages=3):
+    return io.BytesIO(pages_to_pdf(generate_pages(pages=pages))), name
+
+
+def test_batch_uploads_add_no_courses(client):
+    before = course_ids()
+    response = client.post('/api/ai/generate-mindmap/batch', data={
+        'files': [upload('syllabus.pdf'), upload('outline.pdf', pages=4)]
+    })
+
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert results[-1]['succeeded'] == 2
+    assert course_ids() == before
+
+
+def test_incremental_uploads_record_only_a_course_id(client):
+    document_id = f'doc-{uuid.uuid4().hex}'
+    course_id = f'course-{uuid.uuid4().hex}'
+    before = course_ids()
+
+    anonymous = client.post('/api/ai/generate-mindmap/incremental',
+                            data={'file': upload('syllabus.pdf'), 'documentId': document_id})
+    assert anonymous.status_code == 200
+    assert course_ids() == before
+
+    named = client.post('/api/ai/generate-mindmap/incremental',
+                        data={'file': upload('syllabus.pdf'), 'documentId': document_id, 'courseId': course_id})
+    assert named.status_code == 200
+    assert course_ids() == before | {course_id}
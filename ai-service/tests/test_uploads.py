@@ -0,0 +1,40 @@
+import io
+
+from benchmarks.corpus import generate_pages, pages_to_pdf
+from services.pdf_processor import PDFProcessor
+
+
+def test_extraction_reads_streams_bytes_and_paths_alike(tmp_path):
+    pdf = pages_to_pdf(generate_pages(pages=3))
+    path = tmp_path / 'syllabus.pdf'
+    path.write_bytes(pdf)
+    stream = io.BytesIO(pdf)
+    stream.seek(100)
+    processor = PDFProcessor(max_workers=1)
+
+    from_stream = processor.extract_text(stream)
+
+    assert from_stream == processor.extract_text(pdf) == processor.extract_text(str(path))
+    # The caller's stream is rewound and left open for the cache and pre-flight passes
+    assert not stream.closed
+
+
+def test_small_uploads_stay_in_memory():
+    from app import UPLOAD_SPOOL_BYTES, UploadRequest
+
+    spool = UploadRequest._get_file_stream(None, UPLOAD_SPOOL_BYTES, 'application/pdf', 'syllabus.pdf')
+    spool.write(b'x' * (UPLOAD_SPOOL_BYTES // 2))
+    assert not spool._rolled
+    spool.write(b'x' * UPLOAD_SPOOL_BYTES)
+    assert spool._rolled
+
+
+def test_upload_is_parsed_from_the_request_stream(client, tmp_path, monkeypatch):
+    # Nothing is written next to the app: run from an empty directory
+    monkeypatch.chdir(tmp_path)
+    pdf = pages_to_pdf(generate_pages(pages=2))
+    response = client.post('/api/ai/parse-syllabus', data={'file': (io.BytesIO(pdf), 'syllabus.pdf')})
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['text'] == PDFProcessor(max_workers=1).extract_text(pdf)[:500]
+    assert list(tmp_path.iterdir()) == []